@@ -1,6 +1,8 @@
 export interface AppConfig {
   port: number;
   oddsSourceUrl?: string;
+  oddsNdjsonUrl?: string;
+  oddsSnapshotPath?: string;
   alertEdgeThreshold: number;
   pollIntervalMs: number;
   betmgm: {
@@ -31,6 +33,8 @@ export function getConfig(): AppConfig {
   return {
     port: Number(process.env.PORT ?? 4000),
     oddsSourceUrl: process.env.ODDS_SOURCE_URL || undefined,
+    oddsNdjsonUrl: process.env.ODDS_NDJSON_URL || undefined,
+    oddsSnapshotPath: process.env.ODDS_SNAPSHOT_PATH || undefined,
     alertEdgeThreshold: Number(process.env.ALERT_EDGE_THRESHOLD ?? 3),
     pollIntervalMs: Number(process.env.POLL_INTERVAL_MS ?? 4000),
     betmgm: {
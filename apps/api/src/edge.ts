@@ -28,7 +28,8 @@ function edgePercent(offered: number, fair: number): number {
   return ((offered / fair) - 1) * 100;
 }
 
-export function computeValueSignals(matches: MatchOdds[], thresholdPercent: number): ValueSignal[] {
+/** Books priced on the same fixture, keyed as `computeValueSignals` groups them */
+export function groupMatches(matches: MatchOdds[]): Map<string, MatchOdds[]> {
   const grouped = new Map<string, MatchOdds[]>();
 
   for (const match of matches) {
@@ -38,59 +39,75 @@ export function computeValueSignals(matches: MatchOdds[], thresholdPercent: numb
     grouped.set(key, bucket);
   }
 
-  const generatedAtIso = new Date().toISOString();
+  return grouped;
+}
+
+/** Signals of one fixture group; each group's consensus depends only on its own books */
+export function computeGroupSignals(
+  books: MatchOdds[],
+  thresholdPercent: number,
+  generatedAtIso: string
+): ValueSignal[] {
   const output: ValueSignal[] = [];
+  if (books.length === 0) {
+    return output;
+  }
 
-  for (const [, books] of grouped) {
-    if (books.length === 0) {
-      continue;
+  const fairSamples = books.map((book) => {
+    const normalized = normalizeTwoWayMarket(book);
+    const offered: [number, number] = [book.outcomes[0].decimalOdds, book.outcomes[1].decimalOdds];
+    const fair: [number, number] = [fairOdds(normalized.first), fairOdds(normalized.second)];
+    return {
+      matchId: book.id,
+      bookmaker: book.bookmaker,
+      teams: book.teams,
+      offered,
+      fair
+    };
+  });
+
+  const fairOne = fairSamples.reduce((sum, sample) => sum + sample.fair[0], 0) / fairSamples.length;
+  const fairTwo = fairSamples.reduce((sum, sample) => sum + sample.fair[1], 0) / fairSamples.length;
+
+  for (const sample of fairSamples) {
+    const teamAEdge = edgePercent(sample.offered[0], fairOne);
+    const teamBEdge = edgePercent(sample.offered[1], fairTwo);
+
+    if (teamAEdge >= thresholdPercent) {
+      output.push({
+        matchId: sample.matchId,
+        bookmaker: sample.bookmaker,
+        team: sample.teams[0],
+        offeredOdds: sample.offered[0],
+        fairOdds: Number(fairOne.toFixed(3)),
+        edgePercent: Number(teamAEdge.toFixed(2)),
+        generatedAtIso
+      });
     }
 
-    const fairSamples = books.map((book) => {
-      const normalized = normalizeTwoWayMarket(book);
-      const offered: [number, number] = [book.outcomes[0].decimalOdds, book.outcomes[1].decimalOdds];
-      const fair: [number, number] = [fairOdds(normalized.first), fairOdds(normalized.second)];
-      return {
-        matchId: book.id,
-        bookmaker: book.bookmaker,
-        teams: book.teams,
-        offered,
-        fair
-      };
-    });
-
-    const fairOne = fairSamples.reduce((sum, sample) => sum + sample.fair[0], 0) / fairSamples.length;
-    const fairTwo = fairSamples.reduce((sum, sample) => sum + sample.fair[1], 0) / fairSamples.length;
-
-    for (const sample of fairSamples) {
-      const teamAEdge = edgePercent(sample.offered[0], fairOne);
-      const teamBEdge = edgePercent(sample.offered[1], fairTwo);
-
-      if (teamAEdge >= thresholdPercent) {
-        output.push({
-          matchId: sample.matchId,
-          bookmaker: sample.bookmaker,
-          team: sample.teams[0],
-          offeredOdds: sample.offered[0],
-          fairOdds: Number(fairOne.toFixed(3)),
-          edgePercent: Number(teamAEdge.toFixed(2)),
-          generatedAtIso
-        });
-      }
-
-      if (teamBEdge >= thresholdPercent) {
-        output.push({
-          matchId: sample.matchId,
-          bookmaker: sample.bookmaker,
-          team: sample.teams[1],
-          offeredOdds: sample.offered[1],
-          fairOdds: Number(fairTwo.toFixed(3)),
-          edgePercent: Number(teamBEdge.toFixed(2)),
-          generatedAtIso
-        });
-      }
+    if (teamBEdge >= thresholdPercent) {
+      output.push({
+        matchId: sample.matchId,
+        bookmaker: sample.bookmaker,
+        team: sample.teams[1],
+        offeredOdds: sample.offered[1],
+        fairOdds: Number(fairTwo.toFixed(3)),
+        edgePercent: Number(teamBEdge.toFixed(2)),
+        generatedAtIso
+      });
     }
   }
 
+  return output;
+}
+
+export function computeValueSignals(matches: MatchOdds[], thresholdPercent: number): ValueSignal[] {
+  const generatedAtIso = new Date().toISOString();
+  const output: ValueSignal[] = [];
+
+  for (const [, books] of groupMatches(matches)) {
+    output.push(...computeGroupSignals(books, thresholdPercent, generatedAtIso));
+  }
+
   return output.sort((a, b) => b.edgePercent - a.edgePercent);
 }
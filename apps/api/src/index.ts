@@ -1,7 +1,10 @@
 import { createServer, type IncomingMessage, type ServerResponse } from "node:http";
+import type { FeedSnapshot } from "@portfolio/shared";
 import { getConfig } from "./config.js";
 import { MockScraper } from "./scraper.mock.js";
 import { HttpScraper } from "./scraper.http.js";
+import { NdjsonScraper } from "./scraper.ndjson.js";
+import { SnapshotScraper } from "./scraper.snapshot.js";
 import { BetMgmScraper } from "./scraper.betmgm.js";
 import { PinnacleScraper } from "./scraper.pinnacle.js";
 import { Pipeline } from "./pipeline.js";
@@ -13,6 +16,12 @@ const scrapers: OddsScraper[] = [new MockScraper()];
 if (config.oddsSourceUrl) {
   scrapers.push(new HttpScraper(config.oddsSourceUrl));
 }
+if (config.oddsNdjsonUrl) {
+  scrapers.push(new NdjsonScraper(config.oddsNdjsonUrl));
+}
+if (config.oddsSnapshotPath) {
+  scrapers.push(new SnapshotScraper(config.oddsSnapshotPath));
+}
 if (config.betmgm.enabled) {
   scrapers.push(new BetMgmScraper({
     market: config.betmgm.market,
@@ -36,9 +45,18 @@ if (config.pinnacle.enabled) {
   }
 }
 
-const pipeline = new Pipeline(scrapers, config.alertEdgeThreshold);
 const clients = new Set<ServerResponse>();
 
+function broadcast(snapshot: FeedSnapshot): void {
+  const payload = `event: snapshot\ndata: ${JSON.stringify(snapshot)}\n\n`;
+
+  for (const client of clients) {
+    client.write(payload);
+  }
+}
+
+const pipeline = new Pipeline(scrapers, config.alertEdgeThreshold, broadcast);
+
 function sendJson(res: ServerResponse, status: number, body: unknown): void {
   res.statusCode = status;
   res.setHeader("Content-Type", "application/json");
@@ -89,20 +107,12 @@ function onRequest(req: IncomingMessage, res: ServerResponse): void {
 
 const server = createServer(onRequest);
 
-async function publish(): Promise<void> {
-  const snapshot = await pipeline.tick();
-  const payload = `event: snapshot\ndata: ${JSON.stringify(snapshot)}\n\n`;
-
-  for (const client of clients) {
-    client.write(payload);
-  }
-}
-
+// Ticks that fire while a slow cycle is still running join it rather than overlap it
 setInterval(() => {
-  void publish();
+  void pipeline.tick();
 }, config.pollIntervalMs);
 
-void publish();
+void pipeline.tick();
 
 server.listen(config.port, () => {
   console.log(
@@ -1,6 +1,20 @@
-import type { FeedSnapshot, MatchOdds } from "@portfolio/shared";
+import type { FeedSnapshot, MatchOdds, ValueSignal } from "@portfolio/shared";
 import type { OddsScraper } from "./types.js";
-import { computeValueSignals } from "./edge.js";
+import { computeGroupSignals, groupMatches } from "./edge.js";
+
+interface GroupSignals {
+  fingerprint: string;
+  signals: ValueSignal[];
+}
+
+function groupFingerprint(books: MatchOdds[]): string {
+  return books
+    .map((book) => `${book.id}:${book.outcomes.map((outcome) => outcome.decimalOdds).join("/")}`)
+    .join("|");
+}
+
+// While streams are running, partial snapshots are rebuilt at most this often
+const STREAM_PUBLISH_INTERVAL_MS = 250;
 
 export class Pipeline {
   private snapshot: FeedSnapshot = {
@@ -9,31 +23,111 @@ export class Pipeline {
     valueSignals: []
   };
 
+  // Records each scraper contributes to the snapshot
+  private readonly latest = new Map<OddsScraper, MatchOdds[]>();
+  private running: Promise<FeedSnapshot> | null = null;
+  private lastPublishMs = 0;
+  // Signals per fixture group with the prices they were computed from
+  private groupSignals = new Map<string, GroupSignals>();
+  private recomputedGroups = 0;
+
   public constructor(
     private readonly scrapers: OddsScraper[],
-    private readonly thresholdPercent: number
+    private readonly thresholdPercent: number,
+    private readonly onUpdate?: (snapshot: FeedSnapshot) => void
   ) {}
 
   public current(): FeedSnapshot {
     return this.snapshot;
   }
 
-  public async tick(): Promise<FeedSnapshot> {
-    const settled = await Promise.allSettled(this.scrapers.map((scraper) => scraper.scrape()));
+  /** Fixture groups whose signals the last publish had to recompute */
+  public lastRecomputedGroups(): number {
+    return this.recomputedGroups;
+  }
+
+  /**
+   * Runs one cycle of every scraper. Streaming scrapers feed their records
+   * in as they arrive, so `onUpdate` sees partial snapshots before the
+   * slowest source finishes. A tick requested while one is still running
+   * joins it instead of starting an overlapping cycle.
+   */
+  public tick(): Promise<FeedSnapshot> {
+    if (!this.running) {
+      this.running = this.run().finally(() => {
+        this.running = null;
+      });
+    }
+    return this.running;
+  }
+
+  private async run(): Promise<FeedSnapshot> {
+    await Promise.allSettled(this.scrapers.map((scraper) => this.collect(scraper)));
+    return this.publish();
+  }
+
+  private async collect(scraper: OddsScraper): Promise<void> {
+    if (!scraper.stream) {
+      try {
+        this.latest.set(scraper, await scraper.scrape());
+      } catch (error) {
+        this.latest.delete(scraper);
+        throw error;
+      }
+      return;
+    }
+
+    // Streamed records replace last cycle's by id as they land; once the
+    // stream ends, only what it delivered is kept
+    const previous = this.latest.get(scraper) ?? [];
+    const fresh = new Map<string, MatchOdds>();
+    try {
+      for await (const record of scraper.stream()) {
+        fresh.set(record.id, record);
+        this.latest.set(scraper, [
+          ...previous.filter((match) => !fresh.has(match.id)),
+          ...fresh.values()
+        ]);
+        if (Date.now() - this.lastPublishMs >= STREAM_PUBLISH_INTERVAL_MS) {
+          this.publish();
+        }
+      }
+    } finally {
+      this.latest.set(scraper, [...fresh.values()]);
+    }
+  }
 
-    const matches: MatchOdds[] = [];
+  /**
+   * Edges are only recomputed for fixture groups whose prices moved since
+   * the last publish (a dirty set); the others keep their signals.
+   */
+  private publish(): FeedSnapshot {
+    const matches = this.scrapers.flatMap((scraper) => this.latest.get(scraper) ?? []);
+    const generatedAtIso = new Date().toISOString();
+    const next = new Map<string, GroupSignals>();
+    this.recomputedGroups = 0;
 
-    for (const result of settled) {
-      if (result.status === "fulfilled") {
-        matches.push(...result.value);
+    for (const [key, books] of groupMatches(matches)) {
+      const fingerprint = groupFingerprint(books);
+      const cached = this.groupSignals.get(key);
+      if (cached && cached.fingerprint === fingerprint) {
+        next.set(key, cached);
+        continue;
       }
+      this.recomputedGroups += 1;
+      next.set(key, { fingerprint, signals: computeGroupSignals(books, this.thresholdPercent, generatedAtIso) });
     }
+    this.groupSignals = next;
 
     this.snapshot = {
-      receivedAtIso: new Date().toISOString(),
+      receivedAtIso: generatedAtIso,
       matches,
-      valueSignals: computeValueSignals(matches, this.thresholdPercent)
+      valueSignals: [...next.values()]
+        .flatMap((group) => group.signals)
+        .sort((a, b) => b.edgePercent - a.edgePercent)
     };
+    this.lastPublishMs = Date.now();
+    this.onUpdate?.(this.snapshot);
 
     return this.snapshot;
   }
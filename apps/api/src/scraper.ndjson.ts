@@ -0,0 +1,131 @@
+import type { Bookmaker, MatchOdds } from "@portfolio/shared";
+import type { OddsScraper } from "./types.js";
+
+export const BOOKMAKERS: ReadonlySet<string> = new Set<Bookmaker>([
+  "pinnacle",
+  "betmgm",
+  "stake",
+  "thunderpick",
+  "ggbet",
+  "mockbook"
+]);
+
+function isOutcome(value: unknown): value is { team: string; decimalOdds: number } {
+  const outcome = value as { team?: unknown; decimalOdds?: unknown } | null;
+  return (
+    typeof outcome?.team === "string" &&
+    typeof outcome.decimalOdds === "number" &&
+    outcome.decimalOdds > 1
+  );
+}
+
+export function parseNdjsonRecord(line: string): MatchOdds | null {
+  const trimmed = line.trim();
+  if (!trimmed) {
+    return null;
+  }
+
+  let record: Partial<MatchOdds>;
+  try {
+    record = JSON.parse(trimmed) as Partial<MatchOdds>;
+  } catch {
+    return null;
+  }
+
+  const teams = record.teams;
+  const outcomes = record.outcomes;
+  if (
+    typeof record.id !== "string" ||
+    typeof record.bookmaker !== "string" ||
+    !BOOKMAKERS.has(record.bookmaker) ||
+    !Array.isArray(teams) || teams.length !== 2 ||
+    !Array.isArray(outcomes) || outcomes.length !== 2 ||
+    !isOutcome(outcomes[0]) || !isOutcome(outcomes[1])
+  ) {
+    return null;
+  }
+
+  const now = new Date().toISOString();
+
+  return {
+    id: record.id,
+    bookmaker: record.bookmaker,
+    league: record.league ?? "Unknown",
+    startTimeIso: record.startTimeIso ?? now,
+    teams: [String(teams[0]), String(teams[1])],
+    market: "match_winner",
+    outcomes: [outcomes[0], outcomes[1]],
+    scrapedAtIso: record.scrapedAtIso ?? now
+  };
+}
+
+async function* chunksOf(body: ReadableStream<Uint8Array>): AsyncGenerator<Uint8Array> {
+  const reader = body.getReader();
+  try {
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) {
+        return;
+      }
+      yield value;
+    }
+  } finally {
+    reader.releaseLock();
+  }
+}
+
+export async function* readLines(body: AsyncIterable<Uint8Array>): AsyncGenerator<string> {
+  const decoder = new TextDecoder();
+  let buffered = "";
+
+  for await (const chunk of body) {
+    buffered += decoder.decode(chunk, { stream: true });
+    let newline = buffered.indexOf("\n");
+    while (newline !== -1) {
+      yield buffered.slice(0, newline);
+      buffered = buffered.slice(newline + 1);
+      newline = buffered.indexOf("\n");
+    }
+  }
+
+  buffered += decoder.decode();
+  if (buffered) {
+    yield buffered;
+  }
+}
+
+/**
+ * Consumes the NDJSON stream served by `scrapers/ndjson.py --http`.
+ * `stream()` yields each record as soon as its line arrives, before the
+ * Python side has finished the cycle.
+ */
+export class NdjsonScraper implements OddsScraper {
+  public readonly source = "ndjson-source";
+
+  public constructor(private readonly url: string) {}
+
+  public async *stream(): AsyncGenerator<MatchOdds> {
+    const response = await fetch(this.url, {
+      headers: { Accept: "application/x-ndjson" }
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`NDJSON scraper source failed: ${response.status}`);
+    }
+
+    for await (const line of readLines(chunksOf(response.body))) {
+      const record = parseNdjsonRecord(line);
+      if (record) {
+        yield record;
+      }
+    }
+  }
+
+  public async scrape(): Promise<MatchOdds[]> {
+    const matches: MatchOdds[] = [];
+    for await (const record of this.stream()) {
+      matches.push(record);
+    }
+    return matches;
+  }
+}
@@ -0,0 +1,266 @@
+import { closeSync, fstatSync, openSync, readSync } from "node:fs";
+import type { Bookmaker, MatchOdds } from "@portfolio/shared";
+import type { OddsScraper } from "./types.js";
+import { BOOKMAKERS } from "./scraper.ndjson.js";
+
+// Layout written by scrapers/snapshot.py
+const MAGIC = "ODDSNAP1";
+const LAYOUT_VERSION = 2;
+const HEADER_SIZE = 64;
+const RECORD_SIZE = 32;
+const STATUS_NAMES = ["open", "suspended", "closed"] as const;
+
+export interface SnapshotEntry {
+  source: string;
+  event: string;
+  market: string;
+  outcome: string;
+  odds: number | null;
+  previous: number | null;
+  status: string;
+  updatedAt: number;
+}
+
+export interface SnapshotEvent {
+  league: string | null;
+  startTimeIso: string | null;
+}
+
+type SnapshotKey = [string, string, string, string];
+
+function finite(value: number): number | null {
+  return Number.isNaN(value) ? null : value;
+}
+
+/**
+ * Reads the latest-odds table the Python scrapers keep in a shared file.
+ * Records are copied with positional reads and checked against their
+ * seqlock counter, so a record caught mid-write is re-read instead of
+ * returned torn. Slot names are cached per incarnation of the file: a new
+ * inode or creation stamp (the writer recreated it) drops the cache.
+ */
+export class OddsSnapshotReader {
+  private keys: Array<SnapshotKey | undefined> = [];
+  private events = new Map<string, SnapshotEvent>();
+  private readonly offsets = { ids: 0, events: 0 };
+  private readonly pending = { ids: "", events: "" };
+  private incarnation = "";
+
+  public constructor(
+    private readonly path: string,
+    // A writer preempted mid-record holds it odd for a scheduler slice, so retry on a time budget
+    private readonly retryMs = 50
+  ) {}
+
+  private read(fd: number, length: number, position: number): Buffer {
+    const buffer = Buffer.alloc(length);
+    let offset = 0;
+    while (offset < length) {
+      const bytes = readSync(fd, buffer, offset, length - offset, position + offset);
+      if (bytes === 0) {
+        break;
+      }
+      offset += bytes;
+    }
+    return buffer;
+  }
+
+  private header(fd: number): { used: number; generation: bigint; createdAt: number; heartbeat: number } {
+    const header = this.read(fd, HEADER_SIZE, 0);
+    const magic = header.toString("latin1", 0, 8);
+    const version = header.readUInt32LE(8);
+    const recordSize = header.readUInt32LE(12);
+    if (magic !== MAGIC || version !== LAYOUT_VERSION || recordSize !== RECORD_SIZE) {
+      throw new Error(`${this.path} is not an odds snapshot`);
+    }
+    return {
+      used: header.readUInt32LE(20),
+      generation: header.readBigUInt64LE(24),
+      createdAt: header.readDoubleLE(32),
+      heartbeat: header.readDoubleLE(40)
+    };
+  }
+
+  private followWriter(fd: number, createdAt: number): void {
+    const incarnation = `${fstatSync(fd).ino}:${createdAt}`;
+    if (incarnation !== this.incarnation) {
+      this.incarnation = incarnation;
+      this.keys = [];
+      this.events = new Map();
+      this.offsets.ids = this.offsets.events = 0;
+      this.pending.ids = this.pending.events = "";
+    }
+  }
+
+  /** Complete lines appended to `<path>.<log>` since the last call */
+  private tail(log: "ids" | "events"): string[] {
+    let fd: number;
+    try {
+      fd = openSync(`${this.path}.${log}`, "r");
+    } catch {
+      return [];
+    }
+    try {
+      const chunks: string[] = [this.pending[log]];
+      const buffer = Buffer.alloc(64 * 1024);
+      let bytes = readSync(fd, buffer, 0, buffer.length, this.offsets[log]);
+      while (bytes > 0) {
+        this.offsets[log] += bytes;
+        chunks.push(buffer.toString("utf8", 0, bytes));
+        bytes = readSync(fd, buffer, 0, buffer.length, this.offsets[log]);
+      }
+
+      const text = chunks.join("");
+      const complete = text.lastIndexOf("\n") + 1;
+      this.pending[log] = text.slice(complete);
+      return text.slice(0, complete).split("\n").filter((line) => line);
+    } finally {
+      closeSync(fd);
+    }
+  }
+
+  private refreshIds(): void {
+    for (const line of this.tail("ids")) {
+      const [slot, ...key] = JSON.parse(line) as [number, string, string, string, string];
+      this.keys[slot] = key as SnapshotKey;
+    }
+  }
+
+  /** League and start time the writer last described for an event */
+  public event(source: string, event: string): SnapshotEvent | undefined {
+    for (const line of this.tail("events")) {
+      const [lineSource, lineEvent, league, startTimeIso] = JSON.parse(line) as [
+        string, string, string | null, string | null
+      ];
+      this.events.set(`${lineSource}\u0000${lineEvent}`, { league, startTimeIso });
+    }
+    return this.events.get(`${source}\u0000${event}`);
+  }
+
+  private decode(slot: number, record: Buffer, offset: number): SnapshotEntry | null {
+    const key = this.keys[slot];
+    if (!key || record.readUInt32LE(offset) === 0) {
+      return null;
+    }
+    const [source, event, market, outcome] = key;
+    return {
+      source,
+      event,
+      market,
+      outcome,
+      odds: finite(record.readDoubleLE(offset + 8)),
+      previous: finite(record.readDoubleLE(offset + 16)),
+      status: STATUS_NAMES[record.readUInt32LE(offset + 4)] ?? "open",
+      updatedAt: record.readDoubleLE(offset + 24)
+    };
+  }
+
+  private readSlot(fd: number, slot: number): Buffer {
+    const position = HEADER_SIZE + slot * RECORD_SIZE;
+    const deadline = Date.now() + this.retryMs;
+    do {
+      const record = this.read(fd, RECORD_SIZE, position);
+      const seq = record.readUInt32LE(0);
+      if (seq % 2 === 0 && this.read(fd, 4, position).readUInt32LE(0) === seq) {
+        return record;
+      }
+    } while (Date.now() < deadline);
+    throw new Error(`snapshot slot ${slot} kept changing while being read`);
+  }
+
+  /**
+   * Every published price. The record region is copied once, then its
+   * counters are read a second time; only slots that were odd or moved in
+   * between are re-read one by one.
+   */
+  public entries(): { generation: bigint; heartbeat: number; entries: SnapshotEntry[] } {
+    const fd = openSync(this.path, "r");
+    try {
+      const { used, generation, createdAt, heartbeat } = this.header(fd);
+      this.followWriter(fd, createdAt);
+      if (used > this.keys.length) {
+        this.refreshIds();
+      }
+
+      const records = this.read(fd, used * RECORD_SIZE, HEADER_SIZE);
+      const recheck = this.read(fd, used * RECORD_SIZE, HEADER_SIZE);
+      const entries: SnapshotEntry[] = [];
+      for (let slot = 0; slot < used; slot += 1) {
+        const offset = slot * RECORD_SIZE;
+        const seq = records.readUInt32LE(offset);
+        const entry = seq % 2 === 0 && recheck.readUInt32LE(offset) === seq
+          ? this.decode(slot, records, offset)
+          : this.decode(slot, this.readSlot(fd, slot), 0);
+        if (entry) {
+          entries.push(entry);
+        }
+      }
+      return { generation, heartbeat, entries };
+    } finally {
+      closeSync(fd);
+    }
+  }
+}
+
+/**
+ * Turns the snapshot's open two-way `match_winner` prices back into
+ * `MatchOdds`. Outcomes keep the order the Python side first published them
+ * in, which is home then away. Closed outcomes are dropped before grouping,
+ * so an event whose outcome was renamed still has two; a suspended outcome
+ * keeps its event off the board. Nothing is served once the writer's
+ * heartbeat is older than `maxAgeMs`.
+ */
+export class SnapshotScraper implements OddsScraper {
+  public readonly source = "snapshot-source";
+  private readonly reader: OddsSnapshotReader;
+
+  public constructor(path: string, private readonly maxAgeMs = 5 * 60 * 1000) {
+    this.reader = new OddsSnapshotReader(path);
+  }
+
+  public async scrape(): Promise<MatchOdds[]> {
+    const { heartbeat, entries } = this.reader.entries();
+    if (Date.now() - heartbeat * 1000 > this.maxAgeMs) {
+      return [];
+    }
+
+    const events = new Map<string, SnapshotEntry[]>();
+    for (const entry of entries) {
+      // A renamed outcome (TBD -> the real team) leaves its old slot closed next to the new one
+      if (entry.market !== "match_winner" || entry.status === "closed" || !BOOKMAKERS.has(entry.source)) {
+        continue;
+      }
+      const key = `${entry.source}\u0000${entry.event}`;
+      const outcomes = events.get(key) ?? [];
+      outcomes.push(entry);
+      events.set(key, outcomes);
+    }
+
+    const matches: MatchOdds[] = [];
+    for (const outcomes of events.values()) {
+      const [home, away] = outcomes;
+      if (
+        outcomes.length !== 2 ||
+        outcomes.some((outcome) => outcome.status !== "open" || outcome.odds === null || outcome.odds <= 1)
+      ) {
+        continue;
+      }
+      const scrapedAtIso = new Date(Math.max(home.updatedAt, away.updatedAt) * 1000).toISOString();
+      const described = this.reader.event(home.source, home.event);
+      matches.push({
+        id: home.event,
+        bookmaker: home.source as Bookmaker,
+        league: described?.league ?? "Unknown",
+        startTimeIso: described?.startTimeIso ?? scrapedAtIso,
+        teams: [home.outcome, away.outcome],
+        market: "match_winner",
+        outcomes: [
+          { team: home.outcome, decimalOdds: home.odds as number },
+          { team: away.outcome, decimalOdds: away.odds as number }
+        ],
+        scrapedAtIso
+      });
+    }
+    return matches;
+  }
+}
@@ -3,4 +3,6 @@ import type { MatchOdds } from "@portfolio/shared";
 export interface OddsScraper {
   source: string;
   scrape(): Promise<MatchOdds[]>;
+  /** Yields records as they arrive; the pipeline prefers it over `scrape` when present */
+  stream?(): AsyncIterable<MatchOdds>;
 }
@@ -0,0 +1,46 @@
+import test from "node:test";
+import assert from "node:assert/strict";
+import { parseNdjsonRecord, readLines } from "../src/scraper.ndjson.js";
+
+const record = {
+  id: "stake-42",
+  bookmaker: "stake",
+  league: "ESL Pro League",
+  startTimeIso: "2026-10-20T18:00:00Z",
+  teams: ["Vitality", "MOUZ"],
+  market: "match_winner",
+  outcomes: [
+    { team: "Vitality", decimalOdds: 1.64 },
+    { team: "MOUZ", decimalOdds: 2.38 }
+  ],
+  scrapedAtIso: "2026-10-20T12:00:00Z"
+};
+
+test("parseNdjsonRecord accepts a MatchOdds line", () => {
+  const parsed = parseNdjsonRecord(JSON.stringify(record));
+  assert.equal(parsed?.id, "stake-42");
+  assert.equal(parsed?.outcomes[1].decimalOdds, 2.38);
+});
+
+test("parseNdjsonRecord rejects blank, malformed and incomplete lines", () => {
+  assert.equal(parseNdjsonRecord(""), null);
+  assert.equal(parseNdjsonRecord("{not json"), null);
+  assert.equal(parseNdjsonRecord(JSON.stringify({ ...record, bookmaker: "unknown" })), null);
+  assert.equal(parseNdjsonRecord(JSON.stringify({ ...record, outcomes: [record.outcomes[0]] })), null);
+});
+
+test("readLines splits records across chunk boundaries", async () => {
+  const encoder = new TextEncoder();
+  const line = JSON.stringify(record);
+  async function* chunks(): AsyncGenerator<Uint8Array> {
+    yield encoder.encode(`${line}\n${line.slice(0, 10)}`);
+    yield encoder.encode(`${line.slice(10)}\n`);
+  }
+
+  const lines: string[] = [];
+  for await (const value of readLines(chunks())) {
+    lines.push(value);
+  }
+
+  assert.deepEqual(lines, [line, line]);
+});
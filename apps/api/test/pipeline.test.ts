@@ -0,0 +1,145 @@
+import test from "node:test";
+import assert from "node:assert/strict";
+import type { FeedSnapshot, MatchOdds } from "@portfolio/shared";
+import { Pipeline } from "../src/pipeline.js";
+import type { OddsScraper } from "../src/types.js";
+
+function match(id: string, odds: number): MatchOdds {
+  return {
+    id,
+    bookmaker: "stake",
+    league: "Test League",
+    startTimeIso: "2026-10-20T18:00:00Z",
+    teams: ["A", "B"],
+    market: "match_winner",
+    outcomes: [
+      { team: "A", decimalOdds: odds },
+      { team: "B", decimalOdds: odds }
+    ],
+    scrapedAtIso: "2026-10-20T12:00:00Z"
+  };
+}
+
+class GatedStream implements OddsScraper {
+  public readonly source = "gated";
+  public cycles = 0;
+  private release: () => void = () => {};
+
+  public constructor(private readonly records: MatchOdds[]) {}
+
+  public open(): void {
+    this.release();
+  }
+
+  public async *stream(): AsyncGenerator<MatchOdds> {
+    this.cycles += 1;
+    const [first, ...rest] = this.records;
+    yield first;
+    await new Promise<void>((resolve) => {
+      this.release = resolve;
+    });
+    yield* rest;
+  }
+
+  public async scrape(): Promise<MatchOdds[]> {
+    throw new Error("the pipeline should stream");
+  }
+}
+
+test("Pipeline publishes streamed records before the stream ends", async () => {
+  const scraper = new GatedStream([match("stake-1", 1.9), match("stake-2", 2.1)]);
+  const updates: FeedSnapshot[] = [];
+  const pipeline = new Pipeline([scraper], 5, (snapshot) => updates.push(snapshot));
+
+  const tick = pipeline.tick();
+  await new Promise((resolve) => setImmediate(resolve));
+  assert.deepEqual(pipeline.current().matches.map((m) => m.id), ["stake-1"]);
+
+  scraper.open();
+  const snapshot = await tick;
+  assert.deepEqual(snapshot.matches.map((m) => m.id), ["stake-1", "stake-2"]);
+  assert.equal(updates.at(-1), snapshot);
+});
+
+test("Pipeline joins a running tick instead of overlapping it", async () => {
+  const scraper = new GatedStream([match("stake-1", 1.9)]);
+  const pipeline = new Pipeline([scraper], 5);
+
+  const first = pipeline.tick();
+  const second = pipeline.tick();
+  assert.equal(first, second);
+
+  await new Promise((resolve) => setImmediate(resolve));
+  scraper.open();
+  await first;
+  assert.equal(scraper.cycles, 1);
+});
+
+test("Pipeline drops records a finished stream no longer delivers", async () => {
+  const board = [match("stake-1", 1.9), match("stake-2", 2.1)];
+  const scraper = new GatedStream(board);
+  const pipeline = new Pipeline([scraper], 5);
+
+  let tick = pipeline.tick();
+  await new Promise((resolve) => setImmediate(resolve));
+  scraper.open();
+  await tick;
+
+  board.splice(1, 1, match("stake-3", 2.4));
+  tick = pipeline.tick();
+  await new Promise((resolve) => setImmediate(resolve));
+  // Mid-stream the previous cycle's records stay visible
+  assert.deepEqual(pipeline.current().matches.map((m) => m.id).sort(), ["stake-1", "stake-2"]);
+  scraper.open();
+  const snapshot = await tick;
+  assert.deepEqual(snapshot.matches.map((m) => m.id), ["stake-1", "stake-3"]);
+});
+
+class BoardScraper implements OddsScraper {
+  public readonly source = "board";
+
+  public constructor(public records: MatchOdds[]) {}
+
+  public async scrape(): Promise<MatchOdds[]> {
+    return this.records;
+  }
+}
+
+function priced(id: string, bookmaker: MatchOdds["bookmaker"], teams: [string, string], odds: [number, number]): MatchOdds {
+  return {
+    ...match(id, odds[0]),
+    bookmaker,
+    teams,
+    outcomes: [
+      { team: teams[0], decimalOdds: odds[0] },
+      { team: teams[1], decimalOdds: odds[1] }
+    ]
+  };
+}
+
+test("Pipeline only recomputes signals of fixtures whose prices moved", async () => {
+  const scraper = new BoardScraper([
+    priced("pinnacle-1", "pinnacle", ["A", "B"], [1.8, 2.1]),
+    priced("betmgm-1", "betmgm", ["A", "B"], [2.1, 1.8]),
+    priced("pinnacle-2", "pinnacle", ["C", "D"], [1.8, 2.1]),
+    priced("betmgm-2", "betmgm", ["C", "D"], [2.1, 1.8])
+  ]);
+  const pipeline = new Pipeline([scraper], 3);
+
+  const first = await pipeline.tick();
+  assert.equal(pipeline.lastRecomputedGroups(), 2);
+  assert.equal(first.valueSignals.length, 4);
+
+  await pipeline.tick();
+  assert.equal(pipeline.lastRecomputedGroups(), 0);
+
+  scraper.records = scraper.records.map((record) =>
+    record.id === "betmgm-2" ? priced("betmgm-2", "betmgm", ["C", "D"], [2.3, 1.8]) : record
+  );
+  const third = await pipeline.tick();
+  assert.equal(pipeline.lastRecomputedGroups(), 1);
+  const unchanged = (snapshot: FeedSnapshot) =>
+    snapshot.valueSignals.filter((signal) => signal.matchId.endsWith("-1"));
+  assert.deepEqual(unchanged(third), unchanged(first));
+  assert.equal(third.valueSignals.find((signal) => signal.matchId === "betmgm-2")?.offeredOdds, 2.3);
+});
@@ -0,0 +1,126 @@
+import test from "node:test";
+import assert from "node:assert/strict";
+import { mkdtempSync, renameSync, writeFileSync } from "node:fs";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+import { OddsSnapshotReader, SnapshotScraper } from "../src/scraper.snapshot.js";
+
+type Row = [string, string, string, string, number, number];
+
+interface SnapshotOptions {
+  seqs?: number[];
+  heartbeat?: number;
+  createdAt?: number;
+  events?: Array<[string, string, string, string]>;
+  path?: string;
+}
+
+// Same layout as scrapers/snapshot.py: 64-byte header, 32-byte seqlocked records
+function writeSnapshot(rows: Row[], options: SnapshotOptions = {}): string {
+  const seqs = options.seqs ?? rows.map(() => 2);
+  const path = options.path ?? join(mkdtempSync(join(tmpdir(), "odds-snapshot-")), "odds.snapshot");
+  const buffer = Buffer.alloc(64 + rows.length * 32);
+  buffer.write("ODDSNAP1", 0, "latin1");
+  buffer.writeUInt32LE(2, 8);
+  buffer.writeUInt32LE(32, 12);
+  buffer.writeUInt32LE(rows.length, 16);
+  buffer.writeUInt32LE(rows.length, 20);
+  buffer.writeBigUInt64LE(7n, 24);
+  buffer.writeDoubleLE(options.createdAt ?? 1_760_000_000, 32);
+  buffer.writeDoubleLE(options.heartbeat ?? Date.now() / 1000, 40);
+  rows.forEach(([, , , , odds, status], slot) => {
+    const offset = 64 + slot * 32;
+    buffer.writeUInt32LE(seqs[slot], offset);
+    buffer.writeUInt32LE(status, offset + 4);
+    buffer.writeDoubleLE(odds, offset + 8);
+    buffer.writeDoubleLE(odds, offset + 16);
+    buffer.writeDoubleLE(1_760_000_000, offset + 24);
+  });
+  // Written aside and renamed into place, like a writer recreating the file
+  writeFileSync(`${path}.tmp`, buffer);
+  renameSync(`${path}.tmp`, path);
+  writeFileSync(`${path}.ids`, rows.map((row, slot) => JSON.stringify([slot, ...row.slice(0, 4)])).join("\n") + "\n");
+  writeFileSync(`${path}.events`, (options.events ?? []).map((event) => JSON.stringify(event) + "\n").join(""));
+  return path;
+}
+
+const rows: Row[] = [
+  ["stake", "stake-42", "match_winner", "Vitality", 1.64, 0],
+  ["stake", "stake-42", "match_winner", "MOUZ", 2.38, 0],
+  ["pinnacle", "pinnacle-7", "match_winner", "NAVI", 1.9, 0],
+  ["pinnacle", "pinnacle-7", "match_winner", "FaZe", 1.95, 1],
+  ["pinnacle", "pinnacle-7", "handicap:0:-1.5", "home", 2.6, 0]
+];
+
+test("OddsSnapshotReader decodes every published record with its key", () => {
+  const { generation, entries } = new OddsSnapshotReader(writeSnapshot(rows)).entries();
+  assert.equal(generation, 7n);
+  assert.equal(entries.length, 5);
+  assert.deepEqual(
+    { ...entries[3], updatedAt: 0 },
+    {
+      source: "pinnacle",
+      event: "pinnacle-7",
+      market: "match_winner",
+      outcome: "FaZe",
+      odds: 1.95,
+      previous: 1.95,
+      status: "suspended",
+      updatedAt: 0
+    }
+  );
+});
+
+test("OddsSnapshotReader skips empty slots and rejects a record stuck mid-write", () => {
+  const empty = new OddsSnapshotReader(writeSnapshot(rows, { seqs: [2, 0, 2, 2, 2] })).entries();
+  assert.equal(empty.entries.length, 4);
+
+  assert.throws(() => new OddsSnapshotReader(writeSnapshot(rows, { seqs: [2, 3, 2, 2, 2] }), 5).entries(), /kept changing/);
+});
+
+test("SnapshotScraper rebuilds open two-way match_winner prices as MatchOdds", async () => {
+  const matches = await new SnapshotScraper(writeSnapshot(rows)).scrape();
+  assert.equal(matches.length, 1);
+  assert.equal(matches[0].id, "stake-42");
+  assert.deepEqual(matches[0].teams, ["Vitality", "MOUZ"]);
+  assert.equal(matches[0].outcomes[1].decimalOdds, 2.38);
+});
+
+test("SnapshotScraper skips the closed slot an outcome leaves behind when it is renamed", async () => {
+  const renamed: Row[] = [
+    ["stake", "stake-42", "match_winner", "Vitality", 1.64, 0],
+    ["stake", "stake-42", "match_winner", "TBD", 2.2, 2],
+    ["stake", "stake-42", "match_winner", "MOUZ", 2.38, 0]
+  ];
+  const [match] = await new SnapshotScraper(writeSnapshot(renamed)).scrape();
+  assert.deepEqual(match.teams, ["Vitality", "MOUZ"]);
+  assert.deepEqual(match.outcomes.map((outcome) => outcome.decimalOdds), [1.64, 2.38]);
+});
+
+test("SnapshotScraper takes league and start time from the event log", async () => {
+  const path = writeSnapshot(rows, {
+    events: [
+      ["stake", "stake-42", "ESL Pro League", "2026-10-20T17:00:00+00:00"],
+      ["stake", "stake-42", "ESL Pro League", "2026-10-20T18:00:00+00:00"]
+    ]
+  });
+  const [match] = await new SnapshotScraper(path).scrape();
+  assert.equal(match.league, "ESL Pro League");
+  assert.equal(match.startTimeIso, "2026-10-20T18:00:00+00:00");
+});
+
+test("SnapshotScraper serves nothing once the writer's heartbeat is stale", async () => {
+  const path = writeSnapshot(rows, { heartbeat: Date.now() / 1000 - 600 });
+  assert.deepEqual(await new SnapshotScraper(path, 60_000).scrape(), []);
+});
+
+test("OddsSnapshotReader drops cached slot names when the writer recreates the file", () => {
+  const path = writeSnapshot(rows);
+  const reader = new OddsSnapshotReader(path);
+  assert.equal(reader.entries().entries[0].event, "stake-42");
+
+  writeSnapshot([["thunderpick", "thunderpick-9", "match_winner", "G2", 1.7, 0]], { path, createdAt: 1_770_000_000 });
+  const { entries } = reader.entries();
+  assert.equal(entries.length, 1);
+  assert.equal(entries[0].source, "thunderpick");
+});
@@ -1,4 +1,4 @@
-export type Bookmaker = "pinnacle" | "betmgm" | "stake" | "thunderpick" | "mockbook";
+export type Bookmaker = "pinnacle" | "betmgm" | "stake" | "thunderpick" | "ggbet" | "mockbook";
 
 export interface OutcomeOdds {
   team: string;
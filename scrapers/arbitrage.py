@@ -0,0 +1,157 @@
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class ArbOpportunity:
+    market: Hashable
+    # outcome -> (book, decimal odds) of the best price
+    legs: Dict[Hashable, Tuple[str, float]]
+    implied_sum: float
+    detected_at: float = field(default_factory=time.time)
+
+    @property
+    def margin_percent(self) -> float:
+        return (1.0 / self.implied_sum - 1.0) * 100.0
+
+    def stakes(self, bankroll: float) -> Dict[Hashable, float]:
+        """Stake per outcome that returns the same payout whichever outcome wins"""
+        return {
+            outcome: bankroll * (1.0 / price) / self.implied_sum
+            for outcome, (_, price) in self.legs.items()
+        }
+
+
+class OutcomePrices:
+    """Max-heap of one outcome's prices across books with lazy deletion"""
+
+    def __init__(self):
+        self.prices: Dict[str, float] = {}
+        self.heap: List[Tuple[float, int, str]] = []
+
+    def set(self, book: str, price: float, seq: int):
+        self.prices[book] = price
+        heapq.heappush(self.heap, (-price, seq, book))
+        # Superseded entries pile up under steady updates; rebuild once they dominate
+        if len(self.heap) > 4 * len(self.prices) + 8:
+            self.heap = [(-p, seq, b) for b, p in self.prices.items()]
+            heapq.heapify(self.heap)
+
+    def remove(self, book: str):
+        self.prices.pop(book, None)
+
+    def best(self) -> Optional[Tuple[str, float]]:
+        while self.heap:
+            negative, _, book = self.heap[0]
+            if self.prices.get(book) == -negative:
+                return book, -negative
+            heapq.heappop(self.heap)
+        return None
+
+
+class ArbDetector:
+    """Incremental surebet detector over canonical markets.
+
+    Every price update touches one outcome heap (O(log n) in the number of
+    books) and re-sums only that market's best prices, so opportunities are
+    reported from inside ``update`` without rescanning the board.
+    ``on_open``/``on_close`` fire when a market crosses ``min_margin_percent``.
+
+    A market is only evaluated once its full outcome set is known (through
+    ``declare`` or ``update(..., outcomes=...)``): summing the outcomes seen so
+    far would report a surebet on home and away before anyone priced the draw.
+    """
+
+    def __init__(self, on_open: Optional[Callable[[ArbOpportunity], None]] = None,
+                 on_close: Optional[Callable[[Hashable], None]] = None,
+                 min_margin_percent: float = 0.0):
+        self.on_open = on_open
+        self.on_close = on_close
+        self.min_margin_percent = min_margin_percent
+        self.markets: Dict[Hashable, Dict[Hashable, OutcomePrices]] = {}
+        self.declared: Dict[Hashable, FrozenSet[Hashable]] = {}
+        self.active: Dict[Hashable, ArbOpportunity] = {}
+        self._seq = itertools.count()
+
+    def _declare(self, market: Hashable, outcomes: Iterable[Hashable]):
+        declared = frozenset(outcomes)
+        if len(declared) < 2:
+            raise ValueError(f"market {market!r} needs at least two outcomes")
+        self.declared[market] = declared
+
+    def declare(self, market: Hashable, outcomes: Iterable[Hashable]) -> Optional[ArbOpportunity]:
+        """Set the complete outcome set of a market and re-evaluate it"""
+        self._declare(market, outcomes)
+        return self._evaluate(market, self.markets.setdefault(market, {}))
+
+    def update(self, market: Hashable, outcome: Hashable, book: str, price: Optional[float],
+               outcomes: Optional[Iterable[Hashable]] = None) -> Optional[ArbOpportunity]:
+        """Apply one price (None or <= 1 withdraws it) and re-evaluate its market.
+
+        ``outcomes`` declares the market's complete outcome set, like ``declare``.
+        """
+        if outcomes is not None:
+            self._declare(market, outcomes)
+        outcomes = self.markets.setdefault(market, {})
+        prices = outcomes.setdefault(outcome, OutcomePrices())
+        if price is None or price <= 1.0:
+            prices.remove(book)
+        else:
+            prices.set(book, price, next(self._seq))
+        return self._evaluate(market, outcomes)
+
+    def remove_book(self, market: Hashable, book: str) -> Optional[ArbOpportunity]:
+        """Withdraw every price a book had on a market, e.g. when it suspends"""
+        outcomes = self.markets.get(market)
+        if not outcomes:
+            return None
+        for prices in outcomes.values():
+            prices.remove(book)
+        return self._evaluate(market, outcomes)
+
+    def _evaluate(self, market: Hashable, outcomes: Dict[Hashable, OutcomePrices]) -> Optional[ArbOpportunity]:
+        # Prices on outcomes outside the declared set are kept but never summed
+        legs = {} if market in self.declared else None
+        for outcome in self.declared.get(market, ()):
+            prices = outcomes.get(outcome)
+            best = prices.best() if prices is not None else None
+            if best is None:
+                # A leg nobody prices can't be covered
+                legs = None
+                break
+            legs[outcome] = best
+
+        opportunity = None
+        if legs:
+            implied_sum = sum(1.0 / price for _, price in legs.values())
+            candidate = ArbOpportunity(market, legs, implied_sum)
+            if candidate.margin_percent > self.min_margin_percent:
+                opportunity = candidate
+
+        previous = self.active.get(market)
+        if opportunity is None:
+            if previous is not None:
+                del self.active[market]
+                if self.on_close:
+                    self.on_close(market)
+            return None
+
+        if previous is None or previous.legs != opportunity.legs:
+            self.active[market] = opportunity
+            if self.on_open:
+                self.on_open(opportunity)
+        return opportunity
+
+
+if __name__ == "__main__":
+    detector = ArbDetector(on_open=lambda opp: print(
+        f"ARB {opp.market}: {opp.margin_percent:.2f}% "
+        + ", ".join(f"{outcome}@{book} {price}" for outcome, (book, price) in opp.legs.items())
+    ))
+    detector.declare(("navi-faze", "match_winner"), ("home", "away"))
+    detector.update(("navi-faze", "match_winner"), "home", "pinnacle", 1.95)
+    detector.update(("navi-faze", "match_winner"), "away", "pinnacle", 1.90)
+    detector.update(("navi-faze", "match_winner"), "home", "betmgm", 2.15)
@@ -1,6 +1,14 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
+import sys
+from odds_records import match_odds_record
+from markets import MATCH_WINNER, classify_market, home_side_line, normalize_outcome, period_from_name
+import metrics
+import profiling
+from concurrency import pool_size
+from http_client import create_session
 
 def format_price(price):
     """Convert American odds to decimal odds"""
@@ -15,13 +23,14 @@ def format_odds(odds):
 
 def format_handicap(line):
     """Format handicap line to show correct value"""
-    # The line values are in thousandths, so we need to divide by 1000
-    # and round to 1 decimal place
-    return round(line / 1000, 1)
+    # The line values are in thousandths; quarter lines such as 2250 keep both decimals
+    return round(line / 1000, 3)
+
+KAMBI_HOST = 'eu1.offering-api.kambicdn.com'
 
 def get_event_markets(event_id: int) -> dict:
     """Fetch all markets for a specific event"""
-    url = f'https://eu1.offering-api.kambicdn.com/offering/v2018/betmgmse/betoffer/event/{event_id}.json'
+    url = f'https://{KAMBI_HOST}/offering/v2018/betmgmse/betoffer/event/{event_id}.json'
     params = {
         'lang': 'sv_SE',
         'market': 'SE',
@@ -39,23 +48,59 @@ def get_event_markets(event_id: int) -> dict:
     }
     
     try:
-        response = requests.get(url, params=params, headers=headers)
+        response = SESSION.get(url, params=params, headers=headers)
         response.raise_for_status()
-        return response.json()
+        # Runs on the fetch pool's threads, outside the cycle's own profile
+        with profiling.stage('betmgm', 'markets'):
+            return response.json()
     except Exception as e:
-        print(f"Error fetching markets for event {event_id}: {e}")
+        print(f"Error fetching markets for event {event_id}: {e}", file=sys.stderr)
         return None
 
+def fetch_event_markets(event_ids) -> dict:
+    """Fetch markets for many events at once: {event_id: markets or None}.
+
+    The pool is sized for the Kambi host's maximum; how many requests are
+    actually in flight is up to its adaptive concurrency controller.
+    """
+    event_ids = list(event_ids)
+    if not event_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(len(event_ids), pool_size(KAMBI_HOST))) as pool:
+        return dict(zip(event_ids, pool.map(get_event_markets, event_ids)))
+
+# Cookie-less session for the Kambi CDN
+SESSION = create_session(pool_maxsize=pool_size(KAMBI_HOST), source="betmgm")
+# Warmed-up session and the last board, kept across cycles and checkpoints
+_session = None
+last_events = None
+
+def get_session():
+    """Session with the site cookies, warmed up once rather than every cycle"""
+    global _session
+    if _session is None:
+        _session = create_session(source="betmgm")
+        # First, visit the main page to get necessary cookies
+        _session.get('https://www.betmgm.se/sport')
+    return _session
+
+def checkpoint_state():
+    cookies = requests.utils.dict_from_cookiejar(_session.cookies) if _session is not None else {}
+    return {'cookies': cookies, 'events': last_events}
+
+def restore_state(state):
+    """Reuse saved cookies instead of the warm-up request, and the last board until the next fetch"""
+    global _session, last_events
+    if state['cookies']:
+        _session = create_session(source="betmgm")
+        _session.cookies.update(state['cookies'])
+    last_events = state['events']
+
 def get_esports_events():
     """Fetch esports events from BetMGM API"""
+    global _session, last_events
     url = 'https://www.betmgm.se/api/lmbas'
-    
-    # Create a session to maintain cookies
-    session = requests.Session()
-    
-    # First, visit the main page to get necessary cookies
-    main_page_url = 'https://www.betmgm.se/sport'
-    session.get(main_page_url)
+    session = get_session()
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36',
@@ -201,9 +246,12 @@ def get_esports_events():
     try:
         response = session.post(url, headers=headers, json=payload)
         response.raise_for_status()
-        return response.json()
+        last_events = response.json()
+        return last_events
     except Exception as e:
-        print(f"Error fetching events: {e}")
+        print(f"Error fetching events: {e}", file=sys.stderr)
+        # Cookies may have expired; warm up a fresh session next time
+        _session = None
         return None
 
 def translate_market_name(name):
@@ -251,11 +299,13 @@ def translate_market_name(name):
         name = name.replace(swedish, english)
     return name
 
-def display_events(data):
-    """Display events in a readable format"""
+def display_events(data, fetch_markets=None):
+    """Display events in a readable format; ``fetch_markets(event_id)`` defaults to the Kambi API"""
     if not data or 'data' not in data:
         print("No data available")
         return
+    if fetch_markets is None:
+        fetch_markets = fetch_event_markets(event['id'] for _, event in iter_events(data) if 'id' in event).get
     
     try:
         sport_events = data['data']['viewer']['sports']['sportsEvents']
@@ -298,18 +348,20 @@ def display_events(data):
                             print(f"Info: {score['info']}")
                     
                     # Fetch and display detailed markets
-                    markets_data = get_event_markets(event['id'])
+                    markets_data = fetch_markets(event['id'])
                     if markets_data and 'betOffers' in markets_data:
                         print("\nAvailable markets:")
-                        for market in markets_data['betOffers']:
-                            if market.get('criterion', {}).get('label'):
-                                market_name = market['criterion'].get('englishLabel', market['criterion']['label'])
-                                print(f"\n{market_name}:")
-                                for outcome in market.get('outcomes', []):
-                                    if outcome['status'] == 'OPEN':
-                                        line_info = f" [Line: {format_handicap(outcome['line'])}]" if outcome.get('line') else ""
-                                        outcome_label = outcome.get('englishLabel', outcome['label'])
-                                        print(f"  {outcome_label}: {format_odds(outcome['odds'])}{line_info}")
+                        with metrics.parse_timer('betmgm', 'markets'), profiling.stage('betmgm', 'markets'):
+                            for market in markets_data['betOffers']:
+                                if market.get('criterion', {}).get('label'):
+                                    market_name = market['criterion'].get('englishLabel', market['criterion']['label'])
+                                    print(f"\n{market_name}:")
+                                    for outcome in market.get('outcomes', []):
+                                        if outcome['status'] == 'OPEN':
+                                            line_info = f" [Line: {format_handicap(outcome['line'])}]" if outcome.get('line') else ""
+                                            outcome_label = outcome.get('englishLabel', outcome['label'])
+                                            print(f"  {outcome_label}: {format_odds(outcome['odds'])}{line_info}")
+                        metrics.count_records('betmgm', 'markets', len(markets_data['betOffers']))
                     else:
                         print("\nNo additional markets available")
                     
@@ -317,6 +369,95 @@ def display_events(data):
         print(f"Error accessing data structure: {e}")
         return
 
+def iter_events(data):
+    """Yield (league name, event) pairs from a sportsEvents response"""
+    try:
+        groups = data['data']['viewer']['sports']['sportsEvents']['groups'] or []
+    except (KeyError, TypeError):
+        return
+    for group in groups:
+        for sub_group in (group or {}).get('groups') or []:
+            for event in (sub_group or {}).get('events') or []:
+                if event:
+                    yield sub_group.get('name'), event
+
+def _open_outcomes(offer):
+    return [o for o in offer.get('outcomes') or [] if o.get('status') == 'OPEN' and o.get('odds')]
+
+def choose_match_offer(offers):
+    """Pick the match winner offer, falling back to the first two-way open offer"""
+    two_way = [offer for offer in offers or [] if len(_open_outcomes(offer)) >= 2]
+    for offer in two_way:
+        criterion = offer.get('criterion') or {}
+        title = (criterion.get('englishLabel') or criterion.get('label') or '').lower()
+        if 'match' in title or 'winner' in title:
+            return offer
+    return two_way[0] if two_way else None
+
+def event_teams(event):
+    if event.get('homeName') and event.get('awayName'):
+        return event['homeName'], event['awayName']
+    participants = event.get('participants') or []
+    home = next((p.get('name') for p in participants if p.get('home')), None)
+    away = next((p.get('name') for p in participants if p.get('home') is False), None)
+    if home and away:
+        return home, away
+    if len(participants) >= 2:
+        return participants[0].get('name'), participants[1].get('name')
+    return None
+
+@metrics.produces('betmgm', 'match_odds')
+def iter_match_odds(data):
+    """Yield MatchOdds-shaped records for the match winner offer of every event"""
+    for league, event in iter_events(data):
+        teams = event_teams(event)
+        offer = choose_match_offer(event.get('betOffers'))
+        if not teams or not offer:
+            continue
+
+        first, second = _open_outcomes(offer)[:2]
+        # Keep outcome order aligned with (home, away)
+        away = teams[1].lower()
+        if away in (first.get('participant') or first.get('label') or '').lower():
+            first, second = second, first
+
+        record = match_odds_record(
+            'betmgm', event.get('id'), league, event.get('start'), teams,
+            [format_odds(first['odds']), format_odds(second['odds'])]
+        )
+        if record:
+            yield record
+
+def emit_markets(table, event, markets_data=None):
+    """Add every open betOffer outcome of an event to a MarketTable.
+
+    Uses the detailed ``get_event_markets`` payload when given, otherwise the
+    betOffers embedded in the event list.
+    """
+    teams = event_teams(event) or ('', '')
+    offers = (markets_data or {}).get('betOffers') or event.get('betOffers') or []
+    for offer in offers:
+        criterion = offer.get('criterion') or {}
+        name = translate_market_name(criterion.get('englishLabel') or criterion.get('label') or '')
+        market_type = classify_market(name)
+        period = period_from_name(name)
+        for outcome in _open_outcomes(offer):
+            label = outcome.get('type') if market_type != MATCH_WINNER else (
+                outcome.get('participant') or outcome.get('englishLabel') or outcome.get('label'))
+            side = normalize_outcome(label or '', teams)
+            line = format_handicap(outcome['line']) if outcome.get('line') is not None else None
+            table.append('betmgm', event['id'], market_type, period, home_side_line(market_type, side, line),
+                         side, format_odds(outcome['odds']))
+
+def emit_board_markets(table, data):
+    """Add the betOffers of every event in a sportsEvents response to a MarketTable"""
+    rows = len(table)
+    with metrics.parse_timer('betmgm', 'market_table'), profiling.stage('betmgm', 'market_table'):
+        for _, event in iter_events(data):
+            if 'id' in event:
+                emit_markets(table, event)
+    metrics.count_records('betmgm', 'market_table', len(table) - rows)
+
 def main():
     data = get_esports_events()
     if data:
@@ -0,0 +1,160 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from canonical import TeamCanonicalizer
+from edge import OddsFrame, compute_edges
+from event_matching import EventMatcher
+
+SignalKey = Tuple[Hashable, str, str]
+
+
+@dataclass
+class SignalDiff:
+    added: List[Dict] = field(default_factory=list)
+    changed: List[Dict] = field(default_factory=list)
+    removed: List[SignalKey] = field(default_factory=list)
+    recomputed_groups: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class OddsBoard:
+    """Latest MatchOdds records per cross-book fixture with dirty-set signal publishing.
+
+    Fixtures are grouped by their ``EventMatcher`` id, so the same teams in
+    another league or on another day are a separate group. ``upsert`` marks a
+    fixture dirty only when one of its prices actually moved. ``publish``
+    recomputes edges for dirty fixtures alone, which is exact because each
+    fixture's consensus only depends on its own books, and returns the
+    signal-level diff against the previous publish.
+    """
+
+    def __init__(self, canonicalizer: Optional[TeamCanonicalizer] = None,
+                 threshold_percent: float = 3.0, devig: Optional[Callable] = None,
+                 matcher: Optional[EventMatcher] = None):
+        self.matcher = matcher or EventMatcher(canonicalizer)
+        self.canonicalizer = self.matcher.canonicalizer
+        self.threshold_percent = threshold_percent
+        self.devig = devig
+        # group key -> bookmaker -> record
+        self.groups: Dict[Hashable, Dict[str, Dict]] = {}
+        self.record_groups: Dict[str, Hashable] = {}
+        # scope (e.g. a scheduler task) -> record ids its last sync listed
+        self.scopes: Dict[str, Set[str]] = {}
+        self.dirty: Set[Hashable] = set()
+        # group key -> signal key -> signal
+        self.signals: Dict[Hashable, Dict[SignalKey, Dict]] = {}
+
+    def group_key(self, record: Dict) -> Hashable:
+        return self.matcher.match_record(record)[0], record["market"]
+
+    @staticmethod
+    def _prices(record: Dict) -> Tuple:
+        return tuple((outcome["team"], outcome["decimalOdds"]) for outcome in record["outcomes"])
+
+    def upsert(self, record: Dict) -> bool:
+        """Store a record; returns True when it changed its fixture"""
+        key = self.group_key(record)
+        previous_key = self.record_groups.get(record["id"])
+        if previous_key is not None and previous_key != key:
+            self._remove(record["id"])
+
+        books = self.groups.setdefault(key, {})
+        previous = books.get(record["bookmaker"])
+        books[record["bookmaker"]] = record
+        self.record_groups[record["id"]] = key
+        if previous is not None and self._prices(previous) == self._prices(record):
+            return False
+        self.dirty.add(key)
+        return True
+
+    def upsert_many(self, records: Iterable[Dict]) -> int:
+        return sum(self.upsert(record) for record in records)
+
+    def sync(self, scope: str, records: Iterable[Dict]) -> int:
+        """Upsert the complete board of ``scope`` and remove the records it no longer lists"""
+        listed, changed = set(), 0
+        for record in records:
+            listed.add(record["id"])
+            changed += self.upsert(record)
+        for record_id in self.scopes.get(scope, set()) - listed:
+            self.remove(record_id)
+            changed += 1
+        self.scopes[scope] = listed
+        return changed
+
+    def _remove(self, record_id: str) -> Optional[Dict]:
+        key = self.record_groups.pop(record_id, None)
+        if key is None:
+            return None
+        books = self.groups.get(key, {})
+        removed = None
+        for bookmaker, record in list(books.items()):
+            if record["id"] == record_id:
+                removed = books.pop(bookmaker)
+        if not books:
+            self.groups.pop(key, None)
+        self.dirty.add(key)
+        return removed
+
+    def remove(self, record_id: str):
+        """Drop a record, and its cross-book event once no book lists it"""
+        removed = self._remove(record_id)
+        if removed is not None:
+            self.matcher.remove(removed["bookmaker"], record_id)
+
+    def _rows(self, keys: Iterable[Hashable]):
+        resolve = self.canonicalizer.resolve
+        for key in keys:
+            for bookmaker, record in self.groups.get(key, {}).items():
+                for outcome in record["outcomes"]:
+                    yield key, record["market"], resolve(outcome["team"]), bookmaker, outcome["decimalOdds"]
+
+    def publish(self) -> SignalDiff:
+        """Recompute signals for dirty fixtures and diff them against the last publish"""
+        dirty, self.dirty = self.dirty, set()
+        diff = SignalDiff(recomputed_groups=len(dirty))
+        if not dirty:
+            return diff
+
+        fresh: Dict[Hashable, Dict[SignalKey, Dict]] = {key: {} for key in dirty}
+        frame = OddsFrame.from_records(self._rows(dirty))
+        if len(frame):
+            result = compute_edges(frame, self.devig)
+            generated_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+            for row in (result.edge_percent >= self.threshold_percent).nonzero()[0]:
+                key, _ = frame.markets[frame.market[row]]
+                bookmaker = frame.books[frame.book[row]]
+                team = frame.outcomes[frame.outcome[row]][-1]
+                fresh[key][(key, bookmaker, team)] = {
+                    "matchId": self.groups[key][bookmaker]["id"],
+                    "bookmaker": bookmaker,
+                    "team": team,
+                    "offeredOdds": float(frame.odds[row]),
+                    "fairOdds": round(float(result.fair_odds[row]), 3),
+                    "edgePercent": round(float(result.edge_percent[row]), 2),
+                    "generatedAtIso": generated_at,
+                }
+
+        for key, signals in fresh.items():
+            previous = self.signals.get(key, {})
+            for signal_key, signal in signals.items():
+                old = previous.get(signal_key)
+                if old is None:
+                    diff.added.append(signal)
+                elif (old["offeredOdds"], old["fairOdds"], old["edgePercent"]) != \
+                        (signal["offeredOdds"], signal["fairOdds"], signal["edgePercent"]):
+                    diff.changed.append(signal)
+            diff.removed.extend(signal_key for signal_key in previous if signal_key not in signals)
+            if signals:
+                self.signals[key] = signals
+            else:
+                self.signals.pop(key, None)
+
+        return diff
+
+    def all_signals(self) -> List[Dict]:
+        signals = [signal for group in self.signals.values() for signal in group.values()]
+        return sorted(signals, key=lambda signal: -signal["edgePercent"])
@@ -0,0 +1,283 @@
+import asyncio
+import heapq
+import itertools
+import math
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from odds_records import american_to_decimal
+
+LIVE_STATES = {"live", "started", "inplay", "in_play", "in-play", "running"}
+
+
+def _field(event: Any, name: str) -> Any:
+    if isinstance(event, dict):
+        return event.get(name)
+    return getattr(event, name, None)
+
+
+def event_start(event: Any) -> Optional[datetime]:
+    """Kickoff time from BetMGM ``start`` (epoch ms), ``startTime`` or GGBet ``startAt``"""
+    for name in ("start", "startTime", "start_time", "startAt"):
+        value = _field(event, name)
+        if value is None:
+            continue
+        if isinstance(value, datetime):
+            return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+        if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+            return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc)
+        try:
+            return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            continue
+    return None
+
+
+def event_is_live(event: Any) -> bool:
+    """Live flag from Thunderpick ``isLive``, BetMGM ``state`` or Stake/GGBet ``status``"""
+    if _field(event, "isLive"):
+        return True
+    for name in ("state", "status"):
+        value = _field(event, name)
+        if isinstance(value, str) and value.lower() in LIVE_STATES:
+            return True
+    return False
+
+
+def prices_from_markets(markets: Any) -> Dict[Hashable, float]:
+    """Flatten one event's markets to decimal outcome prices.
+
+    Understands a BetMGM betoffer payload, a Stake fixture, a GGBet match
+    (raw or parsed), and lists of Thunderpick markets or Pinnacle straight
+    markets. Keys only need to be stable between fetches of the same event.
+    """
+    prices: Dict[Hashable, float] = {}
+    if isinstance(markets, list):
+        for market in markets:
+            if isinstance(market, dict) and "prices" in market:
+                # Pinnacle straight market: American prices per designation
+                for price in market["prices"]:
+                    if price.get("price"):
+                        key = (market.get("type"), market.get("period"), price.get("designation"), price.get("points"))
+                        prices[key] = american_to_decimal(price["price"])
+                continue
+            for selection in _field(market, "selections") or []:
+                if _field(selection, "odds"):
+                    prices[_field(selection, "id")] = float(_field(selection, "odds"))
+        return prices
+
+    if isinstance(markets, dict):
+        for offer in markets.get("betOffers", []):
+            for outcome in offer.get("outcomes", []):
+                if outcome.get("odds"):
+                    key = outcome.get("id") or (offer.get("criterion", {}).get("label"), outcome.get("label"),
+                                                outcome.get("line"))
+                    prices[key] = outcome["odds"] / 1000
+        # Stake fixture: outcomes carry no id, so key them by their names
+        for group in markets.get("groups", []):
+            for market in group.get("markets", []):
+                for outcome in market.get("outcomes", []):
+                    if outcome.get("active", True) and outcome.get("odds"):
+                        key = (group.get("name"), market.get("name"), outcome.get("name"))
+                        prices[key] = float(outcome["odds"])
+    # GGBet match, either the websocket payload or ggbet.Match
+    for market in _field(markets, "markets") or []:
+        for odd in _field(market, "odds") or []:
+            active = _field(odd, "isActive") if isinstance(odd, dict) else _field(odd, "is_active")
+            if active is not False and _field(odd, "value"):
+                prices[_field(odd, "id")] = float(_field(odd, "value"))
+    return prices
+
+
+@dataclass
+class CadencePolicy:
+    """Maps kickoff distance, live state and volatility to a refresh interval in seconds"""
+    live_interval: float = 5.0
+    # (seconds until kickoff, interval) bands, checked in order
+    bands: Tuple[Tuple[float, float], ...] = (
+        (15 * 60, 15.0),
+        (60 * 60, 30.0),
+        (6 * 3600, 120.0),
+        (24 * 3600, 600.0),
+    )
+    far_interval: float = 1800.0
+    min_interval: float = 2.0
+    # Interval is divided by (1 + volatility_weight * volatility)
+    volatility_weight: float = 20.0
+
+    def interval(self, start: Optional[datetime], live: bool, volatility: float = 0.0,
+                 now: Optional[datetime] = None) -> float:
+        if live:
+            base = self.live_interval
+        elif start is None:
+            base = self.far_interval
+        else:
+            until = (start - (now or datetime.now(timezone.utc))).total_seconds()
+            base = next((interval for limit, interval in self.bands if until <= limit), self.far_interval)
+        return max(self.min_interval, base / (1.0 + self.volatility_weight * volatility))
+
+
+@dataclass
+class EventCadence:
+    key: Hashable
+    start: Optional[datetime] = None
+    live: bool = False
+    volatility: float = 0.0
+    interval: float = 0.0
+    due: float = 0.0
+    prices: Optional[Dict[Hashable, float]] = None
+    in_flight: bool = False
+
+
+class CadenceScheduler:
+    """Priority queue of per-event market fetches ordered by next due time.
+
+    ``observe`` registers or updates an event from a match-list payload.
+    ``pop_due`` hands out due events and marks them in flight; ``complete``
+    feeds the fetched prices back in and schedules the next fetch one
+    interval after the fetch finished, so a slow fetch is never overlapped
+    by the next one and a moving market is refreshed sooner. Rescheduling is
+    lazy: stale heap entries are skipped when popped.
+    """
+
+    def __init__(self, policy: Optional[CadencePolicy] = None, smoothing: float = 0.3):
+        self.policy = policy or CadencePolicy()
+        self.smoothing = smoothing
+        self.events: Dict[Hashable, EventCadence] = {}
+        self.heap: List[Tuple[float, int, Hashable]] = []
+        self._seq = itertools.count()
+
+    def _schedule(self, state: EventCadence, due: float):
+        state.due = due
+        heapq.heappush(self.heap, (due, next(self._seq), state.key))
+
+    def _refresh_interval(self, state: EventCadence, now: float):
+        state.interval = self.policy.interval(state.start, state.live, state.volatility)
+        # Pull the next fetch forward when the event got hotter; never push it back.
+        # In-flight events are scheduled by ``complete`` instead.
+        if not state.in_flight and state.due > now + state.interval:
+            self._schedule(state, now + state.interval)
+
+    def observe(self, key: Hashable, event: Any):
+        """Register an event or update its kickoff and live state from a list payload"""
+        now = time.monotonic()
+        state = self.events.get(key)
+        if state is None:
+            state = self.events[key] = EventCadence(key)
+            self._schedule(state, now)
+        state.start = event_start(event)
+        state.live = event_is_live(event)
+        self._refresh_interval(state, now)
+
+    def record_prices(self, key: Hashable, prices: Dict[Hashable, float]):
+        """Update an event's volatility from the mean relative move of its shared outcomes"""
+        state = self.events.get(key)
+        if state is None:
+            return
+        self._update_volatility(state, prices)
+        self._refresh_interval(state, time.monotonic())
+
+    def _update_volatility(self, state: EventCadence, prices: Dict[Hashable, float]):
+        if state.prices:
+            moves = [
+                abs(math.log(price / state.prices[outcome]))
+                for outcome, price in prices.items()
+                if price > 0 and state.prices.get(outcome, 0) > 0
+            ]
+            if moves:
+                move = sum(moves) / len(moves)
+                state.volatility += self.smoothing * (move - state.volatility)
+        state.prices = prices
+
+    def complete(self, key: Hashable, prices: Optional[Dict[Hashable, float]] = None,
+                 now: Optional[float] = None):
+        """Finish an in-flight fetch and schedule the next one; ``prices`` is None when it failed"""
+        state = self.events.get(key)
+        if state is None:
+            return
+        now = time.monotonic() if now is None else now
+        state.in_flight = False
+        if prices is not None:
+            self._update_volatility(state, prices)
+        state.interval = self.policy.interval(state.start, state.live, state.volatility)
+        self._schedule(state, now + state.interval)
+
+    def forget(self, key: Hashable):
+        self.events.pop(key, None)
+
+    def pop_due(self, now: Optional[float] = None) -> List[Hashable]:
+        """Pop every event due by ``now`` and mark it in flight until ``complete``"""
+        now = time.monotonic() if now is None else now
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            at, _, key = heapq.heappop(self.heap)
+            state = self.events.get(key)
+            if state is None or state.due != at:
+                continue
+            due.append(key)
+            state.in_flight = True
+            # Invalidates any heap entry left for the event until ``complete`` reschedules it
+            state.due = math.inf
+        return due
+
+    def seconds_until_next(self) -> Optional[float]:
+        while self.heap:
+            at, _, key = self.heap[0]
+            state = self.events.get(key)
+            if state is not None and state.due == at:
+                return max(0.0, at - time.monotonic())
+            heapq.heappop(self.heap)
+        return None
+
+    async def run(self, fetch: Callable[[Hashable], Any], on_markets: Optional[Callable[[Hashable, Any], None]] = None,
+                  max_concurrency: int = 8, idle: float = 1.0):
+        """Fetch markets for due events forever, feeding prices back into the cadence.
+
+        ``fetch`` is a blocking callable such as ``get_event_markets`` or
+        ``ThunderpickScraper.get_match_markets`` and receives the event key.
+        """
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(max_concurrency)
+
+        async def fetch_one(key: Hashable):
+            markets = None
+            try:
+                async with slots:
+                    markets = await loop.run_in_executor(None, fetch, key)
+            except Exception as e:
+                print(f"Error fetching markets for event {key}: {e}", file=sys.stderr)
+            finally:
+                self.complete(key, prices_from_markets(markets) if markets is not None else None)
+            if markets is not None and on_markets:
+                on_markets(key, markets)
+
+        pending = set()
+        while True:
+            for key in self.pop_due():
+                task = asyncio.ensure_future(fetch_one(key))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            wait = self.seconds_until_next()
+            await asyncio.sleep(idle if wait is None else min(wait, idle))
+
+
+if __name__ == "__main__":
+    from thunderpick import ThunderpickScraper
+
+    scraper = ThunderpickScraper()
+    cadence = CadenceScheduler()
+    for match in scraper.get_matches():
+        cadence.observe(match.id, match)
+
+    def show(match_id, markets):
+        state = cadence.events[match_id]
+        print(f"{match_id}: {len(markets)} markets, next in {state.interval:.0f}s "
+              f"(live={state.live}, volatility={state.volatility:.4f})")
+
+    try:
+        asyncio.run(cadence.run(scraper.get_match_markets, show))
+    except KeyboardInterrupt:
+        pass
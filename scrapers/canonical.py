@@ -0,0 +1,167 @@
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Known spellings that share no useful trigrams with the canonical name
+DEFAULT_ALIASES = {
+    "navi": "Natus Vincere",
+    "na'vi": "Natus Vincere",
+    "faze": "FaZe Clan",
+    "nip": "Ninjas in Pyjamas",
+    "col": "Complexity",
+    "vp": "Virtus.pro",
+    "mouz": "MOUZ",
+    "mousesports": "MOUZ",
+    "liquid": "Team Liquid",
+    "tl": "Team Liquid",
+    "g2": "G2 Esports",
+    "t1": "T1",
+    "fnc": "Fnatic",
+    "c9": "Cloud9",
+    "eg": "Evil Geniuses",
+    "gen.g": "Gen.G",
+    "geng": "Gen.G",
+}
+
+# Tokens bookmakers add or drop at will; ignored unless they are the whole name.
+# "Academy" is not one of them: an academy roster is a different team.
+NOISE_TOKENS = {"team", "esports", "esport", "e-sports", "gaming", "club"}
+# Dropped only as a whole leading or trailing word ("GG Esports", "Spirit GG"),
+# never when punctuation stripping produced them ("G.G.") or mid-name
+AFFIX_TOKENS = {"gg"}
+
+# Words that mark a different roster of the same organisation; fuzzy matching
+# never crosses them, so "Vitality Academy" does not resolve to "Vitality"
+ROSTER_TOKENS = {"academy", "youth", "junior", "juniors", "female", "women"}
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_EDGE_PUNCTUATION = re.compile(r"^[^\w]+|[^\w]+$")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents and punctuation, and drop noise tokens"""
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = text.replace("&", " and ")
+    words = [(_PUNCTUATION.sub("", word), _EDGE_PUNCTUATION.sub("", word)) for word in text.split()]
+    words = [(token, word) for token, word in words if token]
+    tokens = [token for token, _ in words]
+    last = len(words) - 1
+    kept = [
+        token for i, (token, word) in enumerate(words)
+        if token not in NOISE_TOKENS and not (word in AFFIX_TOKENS and i in (0, last))
+    ]
+    return " ".join(kept or tokens)
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TeamCanonicalizer:
+    """Resolves bookmaker team names to one canonical spelling.
+
+    Lookups go alias table, then exact normalized match, then fuzzy match
+    restricted to names sharing trigrams with the query (a trigram inverted
+    index), scored by Dice similarity. Names that match nothing become new
+    canonical entries. Resolved names are kept in an LRU cache.
+    """
+
+    def __init__(self, aliases: Optional[Dict[str, str]] = None, threshold: float = 0.6,
+                 cache_size: int = 20000, max_posting: int = 500):
+        self.threshold = threshold
+        self.cache_size = cache_size
+        # Trigrams shared by more names than this carry no signal and are skipped
+        self.max_posting = max_posting
+        self.canonical: Dict[str, str] = {}
+        self.grams: Dict[str, Set[str]] = {}
+        self.index: Dict[str, Set[str]] = {}
+        self.aliases: Dict[str, str] = {}
+        self.cache: "OrderedDict[str, str]" = OrderedDict()
+        self.lock = threading.Lock()
+
+        for alias, name in (DEFAULT_ALIASES if aliases is None else aliases).items():
+            self.add_alias(alias, name)
+
+    def _register(self, key: str, name: str):
+        self.canonical[key] = name
+        grams = self.grams[key] = trigrams(key)
+        for gram in grams:
+            self.index.setdefault(gram, set()).add(key)
+
+    def add_alias(self, alias: str, name: str):
+        """Map ``alias`` to canonical ``name``, registering ``name`` if it is new"""
+        with self.lock:
+            key = normalize_name(name)
+            if key not in self.canonical:
+                self._register(key, name)
+            self.aliases[normalize_name(alias)] = key
+            self.cache.clear()
+
+    def _best_match(self, key: str) -> Optional[str]:
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            posting = self.index.get(gram)
+            if posting and len(posting) <= self.max_posting:
+                shared.update(posting)
+
+        roster = ROSTER_TOKENS.intersection(key.split())
+        best, best_score = None, self.threshold
+        for candidate, count in shared.items():
+            if ROSTER_TOKENS.intersection(candidate.split()) != roster:
+                continue
+            score = 2 * count / (len(grams) + len(self.grams[candidate]))
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def _resolve_key(self, name: str) -> str:
+        key = normalize_name(name)
+        if key in self.aliases:
+            return self.aliases[key]
+        if key in self.canonical:
+            return key
+        match = self._best_match(key)
+        if match is not None:
+            return match
+        self._register(key, name)
+        return key
+
+    def checkpoint_state(self) -> Dict:
+        with self.lock:
+            return {"canonical": dict(self.canonical), "aliases": dict(self.aliases)}
+
+    def restore_state(self, state: Dict):
+        """Re-register learned canonical names; the trigram index is rebuilt rather than stored"""
+        with self.lock:
+            for key, name in state["canonical"].items():
+                if key not in self.canonical:
+                    self._register(key, name)
+            self.aliases.update(state["aliases"])
+            self.cache.clear()
+
+    def resolve(self, name: str) -> str:
+        """Canonical display name for ``name``"""
+        with self.lock:
+            cached = self.cache.get(name)
+            if cached is not None:
+                self.cache.move_to_end(name)
+                return cached
+
+            resolved = self.canonical[self._resolve_key(name)]
+            self.cache[name] = resolved
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            return resolved
+
+    def resolve_many(self, names: Iterable[str]) -> List[str]:
+        return [self.resolve(name) for name in names]
+
+    def match_key(self, home: str, away: str, league: str = "") -> Tuple[str, str, str]:
+        """Order-independent grouping key for a fixture across books"""
+        first, second = sorted((self.resolve(home), self.resolve(away)))
+        return first, second, normalize_name(league) if league else ""
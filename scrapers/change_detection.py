@@ -0,0 +1,60 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, List, Tuple
+
+
+def fingerprint(parts: Iterable[Any]) -> str:
+    """Hash a flat sequence of primitive values into a short stable digest"""
+    digest = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+@dataclass
+class ChangeSet:
+    added: List[Any] = field(default_factory=list)
+    changed: List[Any] = field(default_factory=list)
+    removed: List[Hashable] = field(default_factory=list)
+    unchanged: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class ChangeDetector:
+    """Remembers the last fingerprint per key and reports what moved between polls"""
+
+    def __init__(self):
+        self.fingerprints: Dict[Hashable, str] = {}
+
+    def update(self, items: Iterable[Tuple[Hashable, str, Any]]) -> ChangeSet:
+        """Diff (key, fingerprint, payload) items against the previous poll.
+
+        Keys missing from ``items`` are reported as removed, so every call must
+        describe the complete board for the scope this detector tracks.
+        """
+        changes = ChangeSet()
+        current: Dict[Hashable, str] = {}
+
+        for key, digest, payload in items:
+            current[key] = digest
+            previous = self.fingerprints.get(key)
+            if previous is None:
+                changes.added.append(payload)
+            elif previous != digest:
+                changes.changed.append(payload)
+            else:
+                changes.unchanged += 1
+
+        changes.removed = [key for key in self.fingerprints if key not in current]
+        self.fingerprints = current
+        return changes
+
+    def forget(self, key: Hashable):
+        """Drop a key so the next poll reports it as added again"""
+        self.fingerprints.pop(key, None)
+
+    def reset(self):
+        self.fingerprints.clear()
@@ -0,0 +1,104 @@
+import gzip
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]):
+    """Write ``state`` to ``path`` atomically: a reader sees the old file or the new one, never half of either"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".checkpoint-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=3) as out:
+            pickle.dump({"version": CHECKPOINT_VERSION, "saved_at": time.time(), "state": state},
+                        out, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(tmp_path, "rb") as written:
+            os.fsync(written.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    # Persist the rename itself
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def load_checkpoint(path: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """State saved at ``path``, or None when it is missing, unreadable, from another version or too old"""
+    try:
+        with gzip.open(path, "rb") as source:
+            envelope = pickle.load(source)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Ignoring unreadable checkpoint {path}: {e}")
+        return None
+
+    if envelope.get("version") != CHECKPOINT_VERSION:
+        print(f"Ignoring checkpoint {path} from version {envelope.get('version')}")
+        return None
+    if max_age is not None and time.time() - envelope["saved_at"] > max_age:
+        print(f"Ignoring checkpoint {path} older than {max_age:.0f}s")
+        return None
+    return envelope["state"]
+
+
+class Checkpointer:
+    """Periodic checkpoint of every registered component's state.
+
+    A component is anything with ``checkpoint_state() -> dict`` and
+    ``restore_state(dict)``: scraper instances, or modules such as
+    ``betmgm`` and ``pinnacle`` that keep their state at module level.
+    The file is only trusted for ``max_age`` seconds, since odds and
+    tokens older than that are cheaper to refetch than to reconcile.
+    """
+
+    def __init__(self, path: str, interval: float = 60.0, max_age: Optional[float] = 3600.0):
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self.components: Dict[str, Any] = {}
+        self.last_saved = 0.0
+
+    def register(self, name: str, component: Any):
+        self.components[name] = component
+
+    def restore(self) -> List[str]:
+        """Restore every component found in the checkpoint; returns their names"""
+        state = load_checkpoint(self.path, self.max_age) or {}
+        restored = []
+        for name, component in self.components.items():
+            if name not in state:
+                continue
+            try:
+                component.restore_state(state[name])
+                restored.append(name)
+            except Exception as e:
+                print(f"Could not restore {name} from checkpoint: {e}")
+        return restored
+
+    def save(self):
+        state = {}
+        for name, component in self.components.items():
+            try:
+                state[name] = component.checkpoint_state()
+            except Exception as e:
+                print(f"Could not checkpoint {name}: {e}")
+        save_checkpoint(self.path, state)
+        self.last_saved = time.monotonic()
+
+    def maybe_save(self) -> bool:
+        """Save if ``interval`` seconds passed since the last save"""
+        if time.monotonic() - self.last_saved < self.interval:
+            return False
+        self.save()
+        return True
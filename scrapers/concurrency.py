@@ -0,0 +1,144 @@
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+OK, ERROR, THROTTLED, TIMEOUT = "ok", "error", "throttled", "timeout"
+
+
+def outcome_for_status(status: int) -> str:
+    if status in (429, 503):
+        return THROTTLED
+    if status >= 500:
+        return ERROR
+    return OK
+
+
+class AdaptiveLimit:
+    """AIMD limit on in-flight requests to one upstream host.
+
+    Every ``window`` completions (at least one per allowed slot) the limit is
+    re-evaluated: when the window's p95 latency stayed within
+    ``latency_tolerance`` times the host's baseline, its error rate under
+    ``max_error_rate`` and the limit was actually reached, it grows by one.
+    A latency spike or too many errors multiply it by ``backoff``. Throttling
+    and timeouts cut it at once, but only once per epoch: requests already in
+    flight when the limit drops report into the old epoch and are ignored, so
+    one burst of 429s is one cut rather than one per request.
+
+    The baseline is the best p95 seen, allowed to drift up 10% per window so
+    the limit follows the host's latency over the day instead of fighting it.
+    """
+
+    def __init__(self, host: str, initial: float = 4, min_limit: int = 1, max_limit: int = 32,
+                 window: int = 20, latency_tolerance: float = 2.0, latency_floor: float = 0.05,
+                 max_error_rate: float = 0.1, backoff: float = 0.5):
+        self.host = host
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.window = window
+        self.latency_tolerance = latency_tolerance
+        # Below this p95 latency noise is not a spike, whatever the baseline
+        self.latency_floor = latency_floor
+        self.max_error_rate = max_error_rate
+        self.backoff = backoff
+        self.baseline: Optional[float] = None
+        self.in_flight = 0
+        self.epoch = 0
+        self.latencies: Deque[float] = deque()
+        self.errors = 0
+        self.peak_in_flight = 0
+        self.condition = threading.Condition()
+
+    @property
+    def allowed(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def acquire(self, timeout: Optional[float] = None) -> int:
+        """Wait for a free slot; returns the epoch to hand back to ``release``"""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.in_flight < self.allowed, timeout):
+                raise TimeoutError(f"no free request slot for {self.host} within {timeout}s")
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return self.epoch
+
+    def release(self, epoch: int, latency: float, outcome: str = OK):
+        with self.condition:
+            self.in_flight -= 1
+            if epoch == self.epoch:
+                if outcome in (THROTTLED, TIMEOUT):
+                    self._decrease()
+                else:
+                    self.latencies.append(latency)
+                    self.errors += outcome == ERROR
+                    if len(self.latencies) >= max(self.window, self.allowed):
+                        self._evaluate()
+            self.condition.notify_all()
+
+    def _reset_window(self):
+        self.latencies.clear()
+        self.errors = 0
+        self.peak_in_flight = self.in_flight
+
+    def _decrease(self):
+        self.limit = max(float(self.min_limit), self.limit * self.backoff)
+        self.epoch += 1
+        self._reset_window()
+
+    def _evaluate(self):
+        ordered = sorted(self.latencies)
+        p95 = ordered[int(0.95 * (len(ordered) - 1))]
+        error_rate = self.errors / len(ordered)
+        self.baseline = p95 if self.baseline is None else min(p95, self.baseline * 1.1)
+
+        if error_rate > self.max_error_rate or p95 > max(self.baseline * self.latency_tolerance, self.latency_floor):
+            self._decrease()
+            return
+        if self.peak_in_flight >= self.allowed:
+            self.limit = min(float(self.max_limit), self.limit + 1)
+        self._reset_window()
+
+
+# (initial, max) in-flight requests per host; CONCURRENCY_LIMITS overrides them
+# as "host=initial/max,..." and CONCURRENCY_DEFAULT=initial/max covers the rest
+HOST_CONCURRENCY: Dict[str, Tuple[int, int]] = {
+    # Kambi's CDN takes whatever we throw at it
+    "eu1.offering-api.kambicdn.com": (8, 64),
+    # Pinnacle's guest API starts failing well before that
+    "guest.api.arcadia.pinnacle.se": (2, 8),
+    "thunderpick.io": (4, 8),
+}
+
+
+def _parse_limits(spec: str) -> Tuple[int, int]:
+    initial, _, maximum = spec.partition("/")
+    return int(initial), int(maximum or initial)
+
+
+DEFAULT_CONCURRENCY = _parse_limits(os.getenv("CONCURRENCY_DEFAULT", "4/16"))
+_overrides = {
+    host.strip().lower(): _parse_limits(spec)
+    for host, _, spec in (entry.partition("=") for entry in os.getenv("CONCURRENCY_LIMITS", "").split(",") if entry)
+}
+_controllers: Dict[str, AdaptiveLimit] = {}
+_controllers_lock = threading.Lock()
+
+
+def controller_for(host: Optional[str]) -> AdaptiveLimit:
+    """The process-wide concurrency controller for ``host``, created on first use"""
+    host = (host or "").lower()
+    controller = _controllers.get(host)
+    if controller is None:
+        with _controllers_lock:
+            controller = _controllers.get(host)
+            if controller is None:
+                initial, maximum = _overrides.get(host) or HOST_CONCURRENCY.get(host, DEFAULT_CONCURRENCY)
+                controller = _controllers[host] = AdaptiveLimit(host, initial, max_limit=maximum)
+    return controller
+
+
+def pool_size(host: str) -> int:
+    """Threads a batch fetcher needs to let ``host``'s controller reach its maximum"""
+    return controller_for(host).max_limit
@@ -0,0 +1,187 @@
+import argparse
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+def decimal_from_american(prices: np.ndarray) -> np.ndarray:
+    """Pinnacle American prices to decimal odds"""
+    prices = np.asarray(prices, dtype=np.float64)
+    return np.where(prices > 0, prices / 100.0 + 1.0, 100.0 / np.abs(prices) + 1.0)
+
+
+def decimal_from_kambi(odds: np.ndarray) -> np.ndarray:
+    """BetMGM/Kambi odds in thousandths to decimal odds"""
+    return np.asarray(odds, dtype=np.float64) / 1000.0
+
+
+def pinnacle_arrays(markets: Iterable[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """(decimal odds, market group ids) from Pinnacle straight markets.
+
+    Suspended sides come back without a price; a market left with fewer than
+    two priced outcomes is skipped, as in ``betmgm_arrays``.
+    """
+    prices, group = [], []
+    index = 0
+    for market in markets:
+        priced = [price["price"] for price in market.get("prices") or [] if price.get("price") is not None]
+        if len(priced) < 2:
+            continue
+        prices.extend(priced)
+        group.extend([index] * len(priced))
+        index += 1
+    return decimal_from_american(np.asarray(prices, dtype=np.float64)), np.asarray(group, dtype=np.int64)
+
+
+def betmgm_arrays(bet_offers: Iterable[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """(decimal odds, market group ids) from the open outcomes of Kambi betOffers"""
+    odds, group = [], []
+    index = 0
+    for offer in bet_offers:
+        outcomes = [o for o in offer.get("outcomes", []) if o.get("status") == "OPEN" and o.get("odds")]
+        if len(outcomes) < 2:
+            continue
+        for outcome in outcomes:
+            odds.append(outcome["odds"])
+            group.append(index)
+        index += 1
+    return decimal_from_kambi(np.asarray(odds)), np.asarray(group, dtype=np.int64)
+
+
+def _group_sum(values: np.ndarray, group: np.ndarray, n_groups: int) -> np.ndarray:
+    return np.bincount(group, weights=values, minlength=n_groups)
+
+
+def multiplicative(implied: np.ndarray, group: np.ndarray, **_) -> np.ndarray:
+    """Scale each market's implied probabilities to sum to one"""
+    n_groups = group.max() + 1 if len(group) else 0
+    return implied / _group_sum(implied, group, n_groups)[group]
+
+
+def additive(implied: np.ndarray, group: np.ndarray, **_) -> np.ndarray:
+    """Subtract an equal share of the overround from every outcome"""
+    n_groups = group.max() + 1 if len(group) else 0
+    total = _group_sum(implied, group, n_groups)
+    counts = np.bincount(group, minlength=n_groups)
+    probabilities = np.clip(implied - ((total - 1.0) / counts)[group], 1e-9, None)
+    # Longshots can go negative under large margins; clip and renormalize
+    return multiplicative(probabilities, group)
+
+
+def power(implied: np.ndarray, group: np.ndarray, iterations: int = 30, tol: float = 1e-12, **_) -> np.ndarray:
+    """Solve sum(p_i ** k) = 1 per market with a vectorized Newton iteration on k"""
+    n_groups = group.max() + 1 if len(group) else 0
+    k = np.ones(n_groups)
+    log_p = np.log(implied)
+    for _ in range(iterations):
+        powered = np.exp(k[group] * log_p)
+        f = _group_sum(powered, group, n_groups) - 1.0
+        df = _group_sum(powered * log_p, group, n_groups)
+        step = np.divide(f, df, out=np.zeros_like(f), where=df != 0)
+        k = np.clip(k - step, 1e-3, 100.0)
+        if np.max(np.abs(step), initial=0.0) < tol:
+            break
+    return multiplicative(np.exp(k[group] * log_p), group)
+
+
+def shin(implied: np.ndarray, group: np.ndarray, iterations: int = 60, **_) -> np.ndarray:
+    """Shin's insider-trading model: bisect the insider share z per market"""
+    n_groups = group.max() + 1 if len(group) else 0
+    total = _group_sum(implied, group, n_groups)
+    ratio = implied ** 2 / total[group]
+
+    def probabilities(z: np.ndarray) -> np.ndarray:
+        zg = z[group]
+        return (np.sqrt(zg ** 2 + 4.0 * (1.0 - zg) * ratio) - zg) / (2.0 * (1.0 - zg))
+
+    # sum(p(z)) falls as z rises, from sqrt(total) at z=0
+    lo, hi = np.zeros(n_groups), np.full(n_groups, 0.99)
+    for _ in range(iterations):
+        mid = (lo + hi) / 2.0
+        too_high = _group_sum(probabilities(mid), group, n_groups) > 1.0
+        lo = np.where(too_high, mid, lo)
+        hi = np.where(too_high, hi, mid)
+    return multiplicative(probabilities((lo + hi) / 2.0), group)
+
+
+METHODS: Dict[str, Callable[..., np.ndarray]] = {
+    "multiplicative": multiplicative,
+    "additive": additive,
+    "power": power,
+    "shin": shin,
+}
+
+
+def remove_vig(implied: np.ndarray, group: np.ndarray, method: str = "multiplicative", **options) -> np.ndarray:
+    """Fair probabilities for every outcome of every market in one batch.
+
+    ``group`` holds a dense market id (0..n-1) per outcome. The signature
+    matches the ``devig`` hook of ``edge.compute_edges``.
+    """
+    return METHODS[method](np.asarray(implied, dtype=np.float64), np.asarray(group, dtype=np.int64), **options)
+
+
+def _solve_market(implied: List[float], method: str) -> List[float]:
+    """Reference solver for one market, as a per-market loop would do it"""
+    total = sum(implied)
+    if method == "multiplicative":
+        return [p / total for p in implied]
+    if method == "additive":
+        share = (total - 1.0) / len(implied)
+        clipped = [max(p - share, 1e-9) for p in implied]
+        return [p / sum(clipped) for p in clipped]
+    if method == "power":
+        lo, hi = 1e-3, 100.0
+        for _ in range(60):
+            k = (lo + hi) / 2.0
+            lo, hi = (k, hi) if sum(p ** k for p in implied) > 1.0 else (lo, k)
+        powered = [p ** ((lo + hi) / 2.0) for p in implied]
+        return [p / sum(powered) for p in powered]
+    lo, hi = 0.0, 0.99
+    for _ in range(60):
+        z = (lo + hi) / 2.0
+        fair = [(math.sqrt(z * z + 4 * (1 - z) * p * p / total) - z) / (2 * (1 - z)) for p in implied]
+        lo, hi = (z, hi) if sum(fair) > 1.0 else (lo, z)
+    z = (lo + hi) / 2.0
+    fair = [(math.sqrt(z * z + 4 * (1 - z) * p * p / total) - z) / (2 * (1 - z)) for p in implied]
+    return [p / sum(fair) for p in fair]
+
+
+def benchmark(n_markets: int = 20_000, outcomes: int = 2, seed: int = 7) -> Dict[str, Dict[str, float]]:
+    """Time the batch solvers against a per-market loop on a synthetic cycle"""
+    rng = np.random.default_rng(seed)
+    true_p = rng.dirichlet(np.ones(outcomes), size=n_markets)
+    margin = 1.0 + rng.uniform(0.02, 0.08, size=(n_markets, 1))
+    implied = np.clip(true_p * margin, 1e-3, 0.999).reshape(-1)
+    group = np.repeat(np.arange(n_markets), outcomes)
+    per_market = implied.reshape(n_markets, outcomes).tolist()
+
+    results = {}
+    for method in METHODS:
+        started = time.perf_counter()
+        batch = remove_vig(implied, group, method)
+        batch_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        looped = np.concatenate([_solve_market(market, method) for market in per_market])
+        loop_time = time.perf_counter() - started
+
+        results[method] = {
+            "batch_ms": batch_time * 1000,
+            "loop_ms": loop_time * 1000,
+            "speedup": loop_time / batch_time,
+            "max_abs_diff": float(np.max(np.abs(batch - looped))),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batch de-vig against a per-market loop")
+    parser.add_argument("--markets", type=int, default=20_000)
+    parser.add_argument("--outcomes", type=int, default=2)
+    args = parser.parse_args()
+    for method, stats in benchmark(args.markets, args.outcomes).items():
+        print(f"{method:>14}: batch {stats['batch_ms']:8.2f} ms, loop {stats['loop_ms']:8.2f} ms, "
+              f"{stats['speedup']:6.1f}x, max diff {stats['max_abs_diff']:.2e}")
@@ -0,0 +1,164 @@
+import bisect
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from canonical import TeamCanonicalizer, normalize_name
+from change_detection import fingerprint
+
+MemberKey = Tuple[str, str]
+
+# Game titles as books report them, keyed by their normalized name without spaces
+GAME_ALIASES = {
+    "cs2": "cs2",
+    "counterstrike2": "cs2",
+    "counterstrike": "cs2",
+    "csgo": "cs2",
+    "counterstrikeglobaloffensive": "cs2",
+    "dota2": "dota2",
+    "dota": "dota2",
+    "lol": "lol",
+    "leagueoflegends": "lol",
+    "valorant": "valorant",
+    "r6": "r6",
+    "rainbowsix": "r6",
+    "rainbowsixsiege": "r6",
+    "rocketleague": "rocketleague",
+}
+
+
+def canonical_game(name: str) -> str:
+    """Shared id for a game title, so "CS2" and "Counter-Strike 2" share a bucket"""
+    compact = normalize_name(name or "").replace(" ", "")
+    return GAME_ALIASES.get(compact, compact)
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # Books report UTC; a naive datetime must not pick up the host's timezone
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
+
+
+@dataclass
+class CrossBookEvent:
+    id: str
+    game: str
+    start: datetime
+    teams: Tuple[str, str]
+    # (source, source event id) -> match confidence
+    members: Dict[MemberKey, float] = field(default_factory=dict)
+
+
+class EventMatcher:
+    """Assigns stable cross-book ids to fixtures offered by several bookmakers.
+
+    Events are bucketed by canonical game title into a start-time-sorted
+    list, so a new event is only compared with events of the same game that
+    kick off within ``window``. Confidence combines team agreement with
+    kickoff distance. Naive start times are taken as UTC.
+    """
+
+    def __init__(self, canonicalizer: Optional[TeamCanonicalizer] = None,
+                 window: timedelta = timedelta(minutes=30), min_confidence: float = 0.5):
+        self.canonicalizer = canonicalizer or TeamCanonicalizer()
+        self.window = window.total_seconds()
+        self.min_confidence = min_confidence
+        # game -> sorted [(start timestamp, event id)]
+        self.starts: Dict[str, List[Tuple[float, str]]] = {}
+        self.events: Dict[str, CrossBookEvent] = {}
+        self.members: Dict[MemberKey, str] = {}
+        self.lock = threading.Lock()
+
+    def _score(self, event: CrossBookEvent, teams: Tuple[str, str], delta: float) -> float:
+        shared = len(set(event.teams) & set(teams))
+        team_score = 1.0 if shared == 2 else 0.5 if shared == 1 else 0.0
+        return round(team_score * (1.0 - 0.5 * abs(delta) / self.window), 3)
+
+    def _candidates(self, game: str, start: float) -> List[Tuple[float, str]]:
+        bucket = self.starts.get(game, [])
+        lo = bisect.bisect_left(bucket, (start - self.window, ""))
+        hi = bisect.bisect_right(bucket, (start + self.window, "\U0010ffff"))
+        return bucket[lo:hi]
+
+    def _new_event(self, game: str, start: datetime, teams: Tuple[str, str]) -> CrossBookEvent:
+        base = "xb-" + fingerprint((game, *teams, start.strftime("%Y-%m-%dT%H")))
+        event_id, suffix = base, 1
+        while event_id in self.events:
+            suffix += 1
+            event_id = f"{base}-{suffix}"
+        event = self.events[event_id] = CrossBookEvent(event_id, game, start, teams)
+        bisect.insort(self.starts.setdefault(game, []), (start.timestamp(), event_id))
+        return event
+
+    def match(self, source: str, event_id: str, game: str, start: datetime,
+              home: str, away: str) -> Tuple[str, float]:
+        """Return (cross-book id, confidence) for one bookmaker event"""
+        key = (source, str(event_id))
+        game = canonical_game(game)
+        start = _as_utc(start)
+        teams = tuple(sorted(self.canonicalizer.resolve_many((home, away))))
+
+        with self.lock:
+            existing = self.members.get(key)
+            if existing is not None:
+                event = self.events[existing]
+                return existing, event.members[key]
+
+            timestamp = start.timestamp()
+            best, best_score = None, self.min_confidence
+            for other_start, candidate_id in self._candidates(game, timestamp):
+                candidate = self.events[candidate_id]
+                # A book lists a fixture once, so a cluster never takes two events from one source
+                if any(member_source == source for member_source, _ in candidate.members):
+                    continue
+                score = self._score(candidate, teams, timestamp - other_start)
+                if score >= best_score:
+                    best, best_score = candidate, score
+
+            if best is None:
+                best, best_score = self._new_event(game, start, teams), 1.0
+
+            best.members[key] = best_score
+            self.members[key] = best.id
+            return best.id, best_score
+
+    def match_record(self, record: Dict) -> Tuple[str, float]:
+        """Cross-book id for a MatchOdds-shaped record.
+
+        The records carry no game title, so they share one bucket unless a
+        record sets ``game``; kickoff window and teams still have to agree.
+        """
+        start = datetime.fromisoformat(record["startTimeIso"].replace("Z", "+00:00"))
+        home, away = record["teams"]
+        return self.match(record["bookmaker"], record["id"], record.get("game") or "", start, home, away)
+
+    def checkpoint_state(self) -> Dict:
+        with self.lock:
+            return {
+                "canonicalizer": self.canonicalizer.checkpoint_state(),
+                "starts": {game: list(bucket) for game, bucket in self.starts.items()},
+                "events": dict(self.events),
+                "members": dict(self.members),
+            }
+
+    def restore_state(self, state: Dict):
+        """Restore cross-book ids so books keep matching onto the same events after a restart"""
+        self.canonicalizer.restore_state(state["canonicalizer"])
+        with self.lock:
+            self.starts = state["starts"]
+            self.events = state["events"]
+            self.members = state["members"]
+
+    def remove(self, source: str, event_id: str):
+        """Drop a bookmaker event, and its cross-book event once no book lists it"""
+        key = (source, str(event_id))
+        with self.lock:
+            cross_id = self.members.pop(key, None)
+            if cross_id is None:
+                return
+            event = self.events[cross_id]
+            event.members.pop(key, None)
+            if not event.members:
+                del self.events[cross_id]
+                bucket = self.starts[event.game]
+                bucket.remove((event.start.timestamp(), cross_id))
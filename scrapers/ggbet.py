@@ -1,11 +1,20 @@
 import json
 import asyncio
+import os
+import time
+import sys
 import aiohttp
 import websockets
 import websockets.extensions.permessage_deflate
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
 from dataclasses import dataclass
+import metrics
+import profiling
+from odds_records import match_odds_record
+from rate_limit import limiter_for, parse_retry_after
+from markets import classify_market, normalize_outcome, period_from_name
 
 @dataclass
 class Team:
@@ -55,8 +64,10 @@ class Match:
     best_of: Optional[int]
 
 class GGBetScraper:
-    WS_URL = "wss://gg-b-gql.gg.bet/graphql"
-    API_URL = "https://api.gg.bet"
+    WS_URL = os.getenv("GGBET_WS_URL", "wss://gg-b-gql.gg.bet/graphql")
+    API_URL = os.getenv("GGBET_API_URL", "https://api.gg.bet")
+    # Anonymous tokens are reused across reconnects and restarts for this long
+    TOKEN_TTL = 30 * 60
     
     def __init__(self):
         self.session = None
@@ -64,6 +75,7 @@ class GGBetScraper:
         self.subscription_id = None
         self.matches: Dict[str, Match] = {}
         self.auth_token = None
+        self.token_obtained_at = 0.0
 
     async def get_auth_token(self):
         """Get authentication token from GG.bet API."""
@@ -83,29 +95,44 @@ class GGBetScraper:
                 "platform": "web"
             }
             
+            limiter = limiter_for(urlsplit(url).hostname)
+            await limiter.acquire_async()
+            started = time.perf_counter()
             async with aiohttp.ClientSession() as session:
                 async with session.post(url, headers=headers, json=payload) as response:
+                    body = await response.read()
+                    limiter.feedback(response.status, parse_retry_after(response.headers.get("Retry-After")))
+                    if metrics.ENABLED:
+                        metrics.observe_request('ggbet', '/auth/anonymous', time.perf_counter() - started,
+                                                response.status, len(body))
                     if response.status == 200:
-                        result = await response.json()
+                        result = metrics.loads('ggbet', '/auth/anonymous', body)
                         self.auth_token = result.get("token")
                         if not self.auth_token:
                             raise Exception("No token in response")
-                        print("Successfully obtained auth token")
+                        self.token_obtained_at = time.time()
+                        print("Successfully obtained auth token", file=sys.stderr)
                     else:
                         error_text = await response.text()
                         raise Exception(f"Failed to get auth token: {response.status}, {error_text}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if metrics.ENABLED:
+                metrics.observe_error('ggbet', '/auth/anonymous',
+                                      'timeout' if isinstance(e, asyncio.TimeoutError) else 'connection')
+            print(f"Error getting auth token: {e}", file=sys.stderr)
+            raise
         except Exception as e:
-            print(f"Error getting auth token: {e}")
+            print(f"Error getting auth token: {e}", file=sys.stderr)
             raise
 
     async def connect(self):
         """Connect to GG.bet WebSocket"""
         try:
-            # First get the auth token
-            await self.get_auth_token()
+            # First get the auth token, unless a recent one survived a reconnect or restart
+            if not self.auth_token or time.time() - self.token_obtained_at > self.TOKEN_TTL:
+                await self.get_auth_token()
             
             headers = {
-                'Host': 'gg-b-gql.gg.bet',
                 'Origin': 'https://gg.bet',
                 'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
                 'Accept-Language': 'en-US,en;q=0.9',
@@ -127,7 +154,7 @@ class GGBetScraper:
                 subprotocols=['graphql-ws'],
                 compression=None
             )
-            print("Connected to GG.bet WebSocket")
+            print("Connected to GG.bet WebSocket", file=sys.stderr)
             
             # Send connection init message with auth token
             await self.ws.send(json.dumps({
@@ -141,13 +168,15 @@ class GGBetScraper:
             
             # Wait for connection acknowledgment
             response = await self.ws.recv()
-            print(f"Connection response: {response}")
+            print(f"Connection response: {response}", file=sys.stderr)
             
             # Subscribe to matches
             await self.subscribe_to_matches()
             
         except Exception as e:
-            print(f"Error connecting to WebSocket: {e}")
+            print(f"Error connecting to WebSocket: {e}", file=sys.stderr)
+            # The token may be the stale one; fetch a fresh one next time
+            self.auth_token = None
             raise
 
     async def subscribe_to_matches(self):
@@ -196,7 +225,7 @@ class GGBetScraper:
         }
         
         await self.ws.send(json.dumps(subscribe_message))
-        print("Subscribed to esports matches")
+        print("Subscribed to esports matches", file=sys.stderr)
 
     def _parse_match(self, event_data: Dict) -> Match:
         """Parse raw match data into Match object"""
@@ -276,32 +305,136 @@ class GGBetScraper:
             best_of=best_of
         )
 
+    def _handle_message(self, data: Dict) -> bool:
+        """Apply one graphql-ws message; returns False once the stream has ended"""
+        if data.get("type") == "connection_error":
+            print(f"Connection error: {data.get('payload', {}).get('message')}", file=sys.stderr)
+            return False
+        elif data.get("type") == "next":
+            # Handle match data
+            match_data = data.get("payload", {}).get("data", {}).get("matches")
+            if match_data:
+                self._store_matches(match_data)
+        elif data.get("type") == "error":
+            print(f"Subscription error: {data.get('payload')}", file=sys.stderr)
+            return False
+        elif data.get("type") == "complete":
+            print("Subscription completed", file=sys.stderr)
+            return False
+        return True
+
+    def _store_matches(self, match_data):
+        """Parse match payloads into ``self.matches``, keeping any that fail to parse out"""
+        parsed = 0
+        with metrics.parse_timer('ggbet', 'match'), profiling.stage('ggbet', 'match'):
+            for event_data in match_data if isinstance(match_data, list) else [match_data]:
+                try:
+                    match = self._parse_match(event_data)
+                except (KeyError, TypeError, ValueError, StopIteration) as e:
+                    print(f"Error parsing match update: {e}", file=sys.stderr)
+                    continue
+                self.matches[match.id] = match
+                parsed += 1
+        metrics.count_records('ggbet', 'match', parsed)
+
+    @metrics.produces('ggbet', 'match_odds')
+    def iter_match_odds(self) -> Iterator[Dict]:
+        """Yield MatchOdds-shaped records for the winner market of every known match"""
+        for match in list(self.matches.values()):
+            two_way = [
+                market for market in match.markets
+                if len([odd for odd in market.odds if odd.is_active]) == 2
+            ]
+            market = next((m for m in two_way if 'winner' in m.name.lower()), two_way[0] if two_way else None)
+            if market is None:
+                continue
+
+            odds = [odd for odd in market.odds if odd.is_active]
+            # Keep outcome order aligned with (home, away)
+            if match.away_team.id in odds[0].competitor_ids:
+                odds.reverse()
+            record = match_odds_record(
+                'ggbet', match.id, match.tournament.name, match.start_time,
+                [match.home_team.name, match.away_team.name], [odd.value for odd in odds]
+            )
+            if record:
+                yield record
+
+    def emit_markets(self, table):
+        """Add every active odd of every known match to a MarketTable"""
+        for match in list(self.matches.values()):
+            teams = (match.home_team.name, match.away_team.name)
+            for market in match.markets:
+                specifiers = {s['name']: s['value'] for s in market.specifiers}
+                market_type = classify_market(market.name)
+                period = int(specifiers['map']) if specifiers.get('map', '').isdigit() else period_from_name(market.name)
+                line = next((float(specifiers[name]) for name in ('handicap', 'hcp', 'total')
+                             if name in specifiers), None)
+                for odd in market.odds:
+                    if not odd.is_active:
+                        continue
+                    if match.home_team.id in odd.competitor_ids:
+                        side = 'home'
+                    elif match.away_team.id in odd.competitor_ids:
+                        side = 'away'
+                    else:
+                        side = normalize_outcome(odd.name, teams)
+                    table.append('ggbet', match.id, market_type, period, line, side, odd.value)
+
     async def listen_for_updates(self):
         """Listen for WebSocket updates"""
         try:
             while True:
                 message = await self.ws.recv()
-                data = json.loads(message)
-                
-                if data.get("type") == "connection_error":
-                    print(f"Connection error: {data.get('payload', {}).get('message')}")
-                    break
-                elif data.get("type") == "next":
-                    # Handle match data
-                    match_data = data.get("payload", {}).get("data", {}).get("matches")
-                    if match_data:
-                        print(f"Received match update: {match_data}")
-                elif data.get("type") == "error":
-                    print(f"Subscription error: {data.get('payload')}")
-                    break
-                elif data.get("type") == "complete":
-                    print("Subscription completed")
+                if not self._handle_message(metrics.loads('ggbet', 'ws', message)):
                     break
                 
         except Exception as e:
-            print(f"Error while listening for updates: {e}")
+            print(f"Error while listening for updates: {e}", file=sys.stderr)
             raise
 
+    def checkpoint_state(self) -> dict:
+        return {
+            'auth_token': self.auth_token,
+            'token_obtained_at': self.token_obtained_at,
+            'matches': dict(self.matches),
+        }
+
+    def restore_state(self, state: dict):
+        """Reuse the saved token and match board; the subscription then only has to send updates"""
+        self.auth_token = state['auth_token']
+        self.token_obtained_at = state['token_obtained_at']
+        self.matches = dict(state['matches'])
+
+    async def poll(self, window: float = 5.0) -> Dict[str, Match]:
+        """Drain subscription updates for ``window`` seconds and return the match board.
+
+        Connects on first use and reconnects after the stream ends, so the
+        subscription can be driven as a periodic cycle.
+        """
+        if self.ws is None:
+            await self.connect()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + window
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                message = await asyncio.wait_for(self.ws.recv(), remaining)
+            except asyncio.TimeoutError:
+                break
+            except websockets.ConnectionClosed:
+                self.ws = None
+                break
+            if not self._handle_message(metrics.loads('ggbet', 'ws', message)):
+                await self.ws.close()
+                self.ws = None
+                break
+
+        return self.matches
+
     async def cleanup(self):
         """Clean up resources"""
         if self.ws:
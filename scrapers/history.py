@@ -0,0 +1,240 @@
+import argparse
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    event TEXT NOT NULL,
+    market TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    UNIQUE (source, event, market, outcome)
+);
+CREATE TABLE IF NOT EXISTS ticks (
+    series_id INTEGER NOT NULL REFERENCES series (id),
+    ts REAL NOT NULL,
+    odds REAL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ticks_series_ts ON ticks (series_id, ts);
+CREATE INDEX IF NOT EXISTS ticks_ts ON ticks (ts);
+"""
+
+SeriesKey = Tuple[str, str, str, str]
+
+OPEN, SUSPENDED, CLOSED = "open", "suspended", "closed"
+
+
+@dataclass
+class Tick:
+    source: str
+    event: str
+    market: str
+    outcome: str
+    ts: float
+    odds: Optional[float]
+    status: str
+
+
+class OddsHistory:
+    """Append-only price history in SQLite (WAL mode).
+
+    A tick is written only when an outcome's price or status differs from the
+    last one stored for its (source, event, market, outcome) series, so the
+    file grows with price movement rather than with poll count. Writes made
+    inside ``cycle()`` are committed together at the end of the cycle.
+
+    ``record_many`` treats its rows as the complete board of the sources they
+    cover. An open outcome missing from a later cycle is recorded as
+    suspended while its event is still listed, and as closed once the event
+    is gone.
+    """
+
+    def __init__(self, path: str = "odds_history.db"):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.series: Dict[SeriesKey, int] = {}
+        self.keys: Dict[int, SeriesKey] = {}
+        # series id -> (odds, status) of the newest tick
+        self.last: Dict[int, Tuple[Optional[float], str]] = {}
+        # Series whose newest tick is open, i.e. the ones a cycle can close
+        self.open: Set[int] = set()
+        self._load()
+
+    def _load(self):
+        for series_id, source, event, market, outcome in self.conn.execute(
+                "SELECT id, source, event, market, outcome FROM series"):
+            self.series[(source, event, market, outcome)] = series_id
+            self.keys[series_id] = (source, event, market, outcome)
+        for series_id, odds, status in self.conn.execute(
+                "SELECT t.series_id, t.odds, t.status FROM ticks t "
+                "JOIN (SELECT series_id, MAX(rowid) AS newest FROM ticks GROUP BY series_id) n "
+                "ON t.rowid = n.newest"):
+            self.last[series_id] = (odds, status)
+            if status == OPEN:
+                self.open.add(series_id)
+
+    def _series_id(self, key: SeriesKey) -> int:
+        series_id = self.series.get(key)
+        if series_id is None:
+            series_id = self.conn.execute(
+                "INSERT INTO series (source, event, market, outcome) VALUES (?, ?, ?, ?)", key
+            ).lastrowid
+            self.series[key] = series_id
+            self.keys[series_id] = key
+        return series_id
+
+    def record(self, source: str, event, market: str, outcome: str,
+               odds: Optional[float], status: str = OPEN, ts: Optional[float] = None) -> bool:
+        """Append a tick if the price or status moved; returns True when written"""
+        series_id = self._series_id((source, str(event), market, outcome))
+        state = (None if odds is None else float(odds), status)
+        if self.last.get(series_id) == state:
+            return False
+        self.conn.execute("INSERT INTO ticks (series_id, ts, odds, status) VALUES (?, ?, ?, ?)",
+                          (series_id, time.time() if ts is None else ts) + state)
+        self.last[series_id] = state
+        if status == OPEN:
+            self.open.add(series_id)
+        else:
+            self.open.discard(series_id)
+        return True
+
+    def record_many(self, rows: Iterable[Tuple], ts: Optional[float] = None,
+                    sources: Optional[Iterable[str]] = None) -> int:
+        """Record (source, event, market, outcome, odds[, status]) rows in one commit.
+
+        Open outcomes of ``sources`` (by default every source with a row in
+        this cycle, so a source that failed outright closes nothing) that the
+        rows leave out get a suspended or closed tick.
+        """
+        ts = time.time() if ts is None else ts
+        covered = set(sources or ())
+        seen: Set[int] = set()
+        events: Set[Tuple[str, str]] = set()
+        written = 0
+        with self.cycle():
+            for row in rows:
+                status = row[5] if len(row) > 5 else OPEN
+                written += self.record(*row[:5], status=status, ts=ts)
+                seen.add(self.series[(row[0], str(row[1]), row[2], row[3])])
+                events.add((row[0], str(row[1])))
+                if sources is None:
+                    covered.add(row[0])
+            for series_id in sorted(self.open - seen):
+                source, event, market, outcome = self.keys[series_id]
+                if source in covered:
+                    status = SUSPENDED if (source, event) in events else CLOSED
+                    written += self.record(source, event, market, outcome, None, status, ts)
+        return written
+
+    @contextmanager
+    def cycle(self):
+        """Group every write of one scrape cycle into a single transaction"""
+        try:
+            yield self
+        except BaseException:
+            self.conn.rollback()
+            self._reload_last()
+            raise
+        else:
+            self.conn.commit()
+
+    def _reload_last(self):
+        self.series.clear()
+        self.keys.clear()
+        self.last.clear()
+        self.open.clear()
+        self._load()
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None, source: Optional[str] = None,
+              event: Optional[str] = None, market: Optional[str] = None,
+              outcome: Optional[str] = None) -> Iterator[Tick]:
+        """Ticks with ``start <= ts < end`` in time order, optionally filtered by series fields"""
+        clauses, params = [], []
+        for column, value in (("s.source", source), ("s.event", event), ("s.market", market),
+                              ("s.outcome", outcome)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(str(value))
+        if start is not None:
+            clauses.append("t.ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("t.ts < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        for row in self.conn.execute(
+                "SELECT s.source, s.event, s.market, s.outcome, t.ts, t.odds, t.status "
+                f"FROM ticks t JOIN series s ON s.id = t.series_id {where} ORDER BY t.ts, t.rowid", params):
+            yield Tick(*row)
+
+    def stats(self) -> Dict[str, int]:
+        ticks, = self.conn.execute("SELECT COUNT(*) FROM ticks").fetchone()
+        return {"series": len(self.series), "ticks": ticks}
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def match_odds_rows(records: Iterable[Dict]) -> Iterator[Tuple]:
+    """History rows from MatchOdds-shaped records such as the NDJSON stream"""
+    for record in records:
+        for outcome in record["outcomes"]:
+            yield record["bookmaker"], record["id"], record["market"], outcome["team"], outcome["decimalOdds"]
+
+
+def market_table_rows(table) -> Iterator[Tuple]:
+    """History rows from a markets.MarketTable; the market column is "type:period[:line]" """
+    for source, key, outcome, odds in table.rows():
+        market = f"{key.market_type}:{key.period}" + ("" if key.line is None else f":{key.line:g}")
+        yield source, key.event, market, outcome, odds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or query the local odds history")
+    parser.add_argument("--db", default="odds_history.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="poll sources and store changed prices")
+    record.add_argument("sources", nargs="*")
+    record.add_argument("--interval", type=float, default=30.0)
+    record.add_argument("--cycles", type=int, default=0, help="0 runs until interrupted")
+    query = commands.add_parser("query", help="print ticks in a time range")
+    query.add_argument("--since", type=float, default=3600.0, help="seconds back from now")
+    query.add_argument("--source")
+    query.add_argument("--event")
+    args = parser.parse_args()
+
+    history = OddsHistory(args.db)
+    try:
+        if args.command == "query":
+            for tick in history.query(start=time.time() - args.since, source=args.source, event=args.event):
+                print(f"{tick.ts:.0f} {tick.source} {tick.event} {tick.market} {tick.outcome} "
+                      f"{tick.odds} {tick.status}")
+            return
+
+        from ndjson import SOURCES, iter_records
+        sources = args.sources or list(SOURCES)
+        cycle = 0
+        while True:
+            cycle += 1
+            written = history.record_many(match_odds_rows(iter_records(sources)))
+            print(f"cycle {cycle}: {written} changed prices, {history.stats()}")
+            if args.cycles and cycle >= args.cycles:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Set, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import metrics
+from concurrency import ERROR, TIMEOUT, controller_for, outcome_for_status
+from rate_limit import limiter_for, parse_retry_after
+
+LIVE, RECORD, REPLAY = "live", "record", "replay"
+# Stored bodies are already decoded, and cookies have no business in fixtures
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+
+Latency = Union[None, float, str]
+
+
+def request_key(request: requests.PreparedRequest) -> str:
+    """Stable id for a request: method, URL with sorted query and a hash of the body"""
+    parts = urlsplit(request.url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    url = urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode()
+    digest = hashlib.blake2b(f"{request.method} {url}".encode() + b"\x1f" + body, digest_size=12)
+    return digest.hexdigest()
+
+
+class CassetteStore:
+    """Recorded responses as one gzipped JSON file per request key.
+
+    A key can hold several responses recorded over successive polls; replay
+    walks through them in order and then keeps returning the last one, so a
+    recorded board replays its own churn. While recording, responses go to
+    an append-only ``<key>.ndjson`` log next to the cassette, and ``close``
+    folds the logs into the gzipped files. A log left behind by a crash is
+    still read on replay.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.entries: Dict[str, List[Dict]] = {}
+        self.positions: Dict[str, int] = {}
+        # keys with a log that close() has not compacted yet
+        self.pending: Set[str] = set()
+        self.lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def _log_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.ndjson")
+
+    def _load(self, key: str) -> List[Dict]:
+        entries = self.entries.get(key)
+        if entries is None:
+            entries = []
+            try:
+                with gzip.open(self._path(key), "rt", encoding="utf-8") as cassette:
+                    entries = json.load(cassette)
+            except FileNotFoundError:
+                pass
+            try:
+                with open(self._log_path(key), encoding="utf-8") as log:
+                    for line in log:
+                        try:
+                            entries.append(json.loads(line))
+                        except ValueError:
+                            # A line cut short by a crash mid-write
+                            continue
+            except FileNotFoundError:
+                pass
+            self.entries[key] = entries
+        return entries
+
+    def append(self, key: str, entry: Dict):
+        with self.lock:
+            if key in self.entries:
+                self.entries[key].append(entry)
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._log_path(key), "a", encoding="utf-8") as log:
+                log.write(json.dumps(entry) + "\n")
+            self.pending.add(key)
+
+    def close(self):
+        """Compact every key's appended log into its gzipped cassette"""
+        with self.lock:
+            for key in sorted(self.pending):
+                entries = self._load(key)
+                tmp_path = self._path(key) + ".tmp"
+                with gzip.open(tmp_path, "wt", encoding="utf-8") as cassette:
+                    json.dump(entries, cassette)
+                os.replace(tmp_path, self._path(key))
+                os.remove(self._log_path(key))
+            self.pending.clear()
+
+    def next(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            entries = self._load(key)
+            if not entries:
+                return None
+            position = self.positions.get(key, 0)
+            self.positions[key] = min(position + 1, len(entries) - 1)
+            return entries[position]
+
+    def rewind(self):
+        with self.lock:
+            self.positions.clear()
+
+
+def rewrite_upstream(url: str, upstream: str) -> str:
+    """Point ``url`` at another scheme and host, keeping its path and query"""
+    target = urlsplit(upstream)
+    parts = urlsplit(url)
+    return urlunsplit((target.scheme, target.netloc, parts.path, parts.query, parts.fragment))
+
+
+class RecordReplayAdapter(HTTPAdapter):
+    """Transport adapter that records live responses or replays them from a CassetteStore.
+
+    ``latency`` applies to replay: None answers immediately, a number sleeps
+    that many seconds (plus up to ``jitter``), and ``"recorded"`` sleeps for
+    the time the original response took. ``upstream`` sends every live
+    request to one base URL instead, e.g. the local mock bookmaker server;
+    cassettes stay keyed by the original URL.
+    """
+
+    def __init__(self, mode: str, store: Optional[CassetteStore] = None, latency: Latency = None,
+                 jitter: float = 0.0, upstream: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.mode = mode
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.upstream = upstream
+
+    def send(self, request, **kwargs):
+        key = request_key(request)
+        if self.mode == REPLAY:
+            return self._replay(request, key)
+
+        if self.upstream:
+            request.url = rewrite_upstream(request.url, self.upstream)
+
+        started = time.perf_counter()
+        response = super().send(request, **kwargs)
+        if self.mode == RECORD:
+            # Reading .content here decodes the body before it is stored
+            self.store.append(key, {
+                "method": request.method,
+                "url": request.url,
+                "status": response.status_code,
+                "reason": response.reason,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS},
+                "body": base64.b64encode(response.content).decode("ascii"),
+                "elapsed": time.perf_counter() - started,
+            })
+        return response
+
+    def _replay(self, request: requests.PreparedRequest, key: str) -> requests.Response:
+        entry = self.store.next(key)
+        if entry is None:
+            raise requests.exceptions.ConnectionError(f"No cassette for {request.method} {request.url}",
+                                                      request=request)
+
+        delay = entry["elapsed"] if self.latency == "recorded" else self.latency
+        if delay:
+            time.sleep(delay + random.uniform(0, self.jitter))
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry.get("reason")
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = base64.b64decode(entry["body"])
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+
+class ScraperSession(requests.Session):
+    """requests.Session that reports every call to ``metrics`` under its ``source``,
+    spends the per-host budget from ``rate_limit`` and holds one of the host's
+    adaptive in-flight slots from ``concurrency`` while the request runs.
+
+    A 429 or 503 pauses the host for everyone and the request is retried up
+    to HTTP_THROTTLE_RETRIES times once the pause is over; the last throttled
+    response is returned as-is. Replayed traffic is neither rate nor
+    concurrency limited.
+    """
+
+    def __init__(self, source: str = "other"):
+        super().__init__()
+        self.source = source
+
+    def request(self, method, url, *args, **kwargs):
+        if _settings["mode"] == REPLAY:
+            return self._request(method, url, *args, **kwargs)
+
+        host = urlsplit(url).hostname
+        limiter = limiter_for(host)
+        controller = controller_for(host)
+        attempt = 0
+        while True:
+            # Wait for the rate budget before taking a slot, so queued requests don't hold slots idle
+            waited = limiter.acquire()
+            epoch = controller.acquire()
+            started = time.perf_counter()
+            outcome = ERROR
+            try:
+                response = self._request(method, url, *args, **kwargs)
+                outcome = outcome_for_status(response.status_code)
+            except requests.exceptions.Timeout:
+                outcome = TIMEOUT
+                raise
+            finally:
+                controller.release(epoch, time.perf_counter() - started, outcome)
+                if metrics.ENABLED:
+                    metrics.CONCURRENCY_LIMIT.set(controller.allowed, host)
+                    metrics.CONCURRENCY_IN_FLIGHT.set(controller.in_flight, host)
+
+            pause = limiter.feedback(response.status_code, parse_retry_after(response.headers.get("Retry-After")))
+            if metrics.ENABLED:
+                metrics.RATE_LIMIT_WAIT_SECONDS.inc(host, amount=waited)
+                metrics.RATE_LIMIT_RATE.set(limiter.rate, host)
+            if not pause or attempt >= _settings["throttle_retries"]:
+                return response
+            attempt += 1
+            print(f"{host} throttled {method} {url} ({response.status_code}), retrying in {pause:.1f}s",
+                  file=sys.stderr)
+            response.close()
+
+    def _request(self, method, url, *args, **kwargs):
+        if not metrics.ENABLED:
+            return super().request(method, url, *args, **kwargs)
+
+        endpoint = metrics.endpoint(url)
+        started = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.exceptions.Timeout:
+            metrics.observe_error(self.source, endpoint, "timeout")
+            raise
+        except requests.exceptions.RequestException:
+            metrics.observe_error(self.source, endpoint, "connection")
+            raise
+        # The body is already read unless stream=True, so this is the full round trip
+        metrics.observe_request(self.source, endpoint, time.perf_counter() - started,
+                                response.status_code, len(response.content))
+        response.json = metrics.timed_decode(response.json, self.source, endpoint)
+        return response
+
+
+def _env_latency() -> Latency:
+    value = os.getenv("HTTP_REPLAY_LATENCY", "")
+    if not value:
+        return None
+    return value if value == "recorded" else float(value)
+
+
+_settings = {
+    "mode": os.getenv("HTTP_MODE", LIVE),
+    "cassettes": os.getenv("HTTP_CASSETTES", "cassettes"),
+    "latency": _env_latency(),
+    "jitter": float(os.getenv("HTTP_REPLAY_JITTER", "0")),
+    "upstream": os.getenv("HTTP_UPSTREAM") or None,
+    "throttle_retries": int(os.getenv("HTTP_THROTTLE_RETRIES", "2")),
+}
+_stores: Dict[str, CassetteStore] = {}
+_sessions: "weakref.WeakKeyDictionary[requests.Session, int]" = weakref.WeakKeyDictionary()
+
+
+def _store(directory: str) -> CassetteStore:
+    store = _stores.get(directory)
+    if store is None:
+        store = _stores[directory] = CassetteStore(directory)
+        atexit.register(store.close)
+    return store
+
+
+def _mount(session: requests.Session, pool_maxsize: int):
+    if _settings["mode"] == LIVE and not _settings["upstream"]:
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+    else:
+        adapter = RecordReplayAdapter(_settings["mode"], _store(_settings["cassettes"]), _settings["latency"],
+                                      _settings["jitter"], _settings["upstream"], pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def create_session(pool_maxsize: int = 10, source: str = "other") -> requests.Session:
+    """Session every scraper should use, so record/replay and metrics apply to all of them.
+
+    The transport comes from HTTP_MODE (live, record or replay),
+    HTTP_CASSETTES (cassette directory), HTTP_REPLAY_LATENCY (seconds or
+    "recorded"), HTTP_REPLAY_JITTER and HTTP_UPSTREAM (base URL every live
+    request is sent to), or from ``configure``. ``source`` labels the
+    session's metrics.
+    """
+    session = ScraperSession(source)
+    _mount(session, pool_maxsize)
+    _sessions[session] = pool_maxsize
+    return session
+
+
+def configure(mode: Optional[str] = None, cassettes: Optional[str] = None, latency: Latency = None,
+              jitter: Optional[float] = None, upstream: Optional[str] = None):
+    """Switch the transport of every session, including ones created at import time"""
+    if mode is not None:
+        if mode not in (LIVE, RECORD, REPLAY):
+            raise ValueError(f"Unknown HTTP mode: {mode}")
+        _settings["mode"] = mode
+    if cassettes is not None:
+        _settings["cassettes"] = cassettes
+    if latency is not None:
+        _settings["latency"] = latency or None
+    if jitter is not None:
+        _settings["jitter"] = jitter
+    if upstream is not None:
+        _settings["upstream"] = upstream or None
+    for session, pool_maxsize in list(_sessions.items()):
+        _mount(session, pool_maxsize)
+    if _settings["mode"] == REPLAY:
+        _store(_settings["cassettes"]).rewind()
@@ -0,0 +1,166 @@
+import math
+import re
+from array import array
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from canonical import normalize_name
+from edge import Interner, OddsFrame
+
+MATCH_WINNER = "match_winner"
+HANDICAP = "handicap"
+TOTAL = "total"
+
+_MAP_NUMBER = re.compile(r"\b(?:map|karta|game|period)\s*(\d+)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class MarketKey:
+    event: str
+    market_type: str
+    # 0 is the full match, n is map/game n
+    period: int
+    line: Optional[float]
+
+
+def classify_market(name: str) -> str:
+    """Market type from a free-text market name in English or Swedish"""
+    lowered = (name or "").lower()
+    if "handicap" in lowered or "handikapp" in lowered or "spread" in lowered:
+        return HANDICAP
+    if "total" in lowered or "over/under" in lowered or "över/under" in lowered:
+        return TOTAL
+    if any(word in lowered for word in ("winner", "moneyline", "matchodds", "match odds", "vinnare", "1x2")):
+        return MATCH_WINNER
+    return lowered.strip() or "other"
+
+
+def period_from_name(name: str) -> int:
+    match = _MAP_NUMBER.search(name or "")
+    return int(match.group(1)) if match else 0
+
+
+def normalize_outcome(name: str, teams: Tuple[str, str] = ("", "")) -> str:
+    """Map an outcome label onto home/away/over/under/draw where possible.
+
+    A label only names a team when it is that team's whole (normalized) name,
+    so "Vitality Academy" is not taken for "Vitality".
+    """
+    lowered = (name or "").strip().lower()
+    key = normalize_name(lowered) if lowered else ""
+    if lowered in ("home", "1", "ot_one") or (teams[0] and key == normalize_name(teams[0])):
+        return "home"
+    if lowered in ("away", "2", "ot_two") or (teams[1] and key == normalize_name(teams[1])):
+        return "away"
+    if lowered.startswith(("over", "över", "ot_over")):
+        return "over"
+    if lowered.startswith(("under", "ot_under")):
+        return "under"
+    if lowered in ("draw", "x", "oavgjort", "ot_cross"):
+        return "draw"
+    return lowered
+
+
+def home_side_line(market_type: str, outcome: str, outcome_line: Optional[float]) -> Optional[float]:
+    """Market line from a per-outcome line: handicaps flip to the home side"""
+    if outcome_line is None:
+        return None
+    if market_type == HANDICAP and outcome == "away":
+        return -outcome_line
+    return outcome_line
+
+
+def swap_sides(market_type: str, outcome: str, line: Optional[float]) -> Tuple[str, Optional[float]]:
+    """(outcome, line) as seen from the other team; handicap lines stay home-side"""
+    if outcome not in ("home", "away"):
+        return outcome, line
+    if market_type == HANDICAP and line is not None:
+        line = -line
+    return ("away" if outcome == "home" else "home"), line
+
+
+class MarketTable:
+    """Columnar store of every priced outcome keyed by (event, market type, period, line).
+
+    Strings are interned to int ids and columns are typed ``array`` buffers,
+    so a row costs a few dozen bytes and ``columns`` exposes them to NumPy
+    without copying. A missing line is stored as NaN; handicap lines are
+    stored from the home side so both outcomes share one market key.
+    """
+
+    def __init__(self):
+        self.sources = Interner()
+        self.events = Interner()
+        self.market_types = Interner()
+        self.outcomes = Interner()
+        self.source = array("i")
+        self.event = array("i")
+        self.market_type = array("i")
+        self.period = array("h")
+        self.line = array("d")
+        self.outcome = array("i")
+        self.odds = array("d")
+
+    def __len__(self) -> int:
+        return len(self.odds)
+
+    def append(self, source: str, event: Hashable, market_type: str, period: int,
+               line: Optional[float], outcome: str, odds: Optional[float]):
+        if odds is None or odds <= 1.0:
+            return
+        self.source.append(self.sources(source))
+        self.event.append(self.events((source, str(event))))
+        self.market_type.append(self.market_types(market_type))
+        self.period.append(int(period or 0))
+        self.line.append(math.nan if line is None else float(line))
+        self.outcome.append(self.outcomes(outcome))
+        self.odds.append(float(odds))
+
+    def key(self, row: int) -> MarketKey:
+        line = self.line[row]
+        return MarketKey(
+            event=self.events.keys[self.event[row]][1],
+            market_type=self.market_types.keys[self.market_type[row]],
+            period=self.period[row],
+            line=None if math.isnan(line) else line,
+        )
+
+    def rows(self) -> Iterator[Tuple[str, MarketKey, str, float]]:
+        for row in range(len(self)):
+            yield (self.sources.keys[self.source[row]], self.key(row),
+                   self.outcomes.keys[self.outcome[row]], self.odds[row])
+
+    def keys(self) -> List[MarketKey]:
+        return sorted({self.key(row) for row in range(len(self))}, key=repr)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Zero-copy NumPy views over the column buffers"""
+        return {
+            name: np.frombuffer(getattr(self, name), dtype=dtype) if len(self) else np.zeros(0, dtype)
+            for name, dtype in (("source", np.intc), ("event", np.intc), ("market_type", np.intc),
+                                ("period", np.short), ("line", np.double), ("outcome", np.intc),
+                                ("odds", np.double))
+        }
+
+    def to_frame(self, event_key: Optional[Callable[[str, str], Hashable]] = None) -> OddsFrame:
+        """OddsFrame for the edge engine; one market per (event, type, period, line).
+
+        ``event_key(source, event id)`` maps each book's event id to a shared id,
+        e.g. an ``EventMatcher`` cross-book id. Without it only rows of the same
+        source event are compared.
+        """
+        event_key = event_key or (lambda source, event: (source, event))
+
+        def rows():
+            for row in range(len(self)):
+                source_name, event = self.events.keys[self.event[row]]
+                shared_event = event_key(source_name, event)
+                line = self.line[row]
+                market = (self.market_types.keys[self.market_type[row]], self.period[row],
+                          None if math.isnan(line) else line)
+                yield shared_event, market, self.outcomes.keys[self.outcome[row]], \
+                    self.sources.keys[self.source[row]], self.odds[row]
+
+        return OddsFrame.from_records(rows())
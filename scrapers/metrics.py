@@ -0,0 +1,290 @@
+import bisect
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+# Nothing is recorded until start_server() or enable() runs, so the hooks in
+# the scrapers cost one module attribute check when metrics are off
+ENABLED = False
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PARSE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self.lock:
+            values = sorted(self.values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        with self.lock:
+            self.values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self.values: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self) -> Iterator[str]:
+        with self.lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self.values.items())
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                yield f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, labels)} {repr(total)}"
+            yield f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}"
+
+
+REGISTRY: List[Metric] = []
+
+REQUEST_SECONDS = Histogram("scraper_request_seconds", "HTTP request latency including the body",
+                            ("source", "endpoint"))
+RESPONSE_BYTES = Counter("scraper_response_bytes_total", "Decoded response body bytes", ("source", "endpoint"))
+DECODE_SECONDS = Histogram("scraper_decode_seconds", "Time spent turning response bodies into JSON",
+                           ("source", "endpoint"), PARSE_BUCKETS)
+PARSE_SECONDS = Histogram("scraper_parse_seconds", "Time spent turning decoded payloads into models or records",
+                          ("source", "stage"), PARSE_BUCKETS)
+RECORDS = Counter("scraper_records_total", "Models or records produced", ("source", "stage"))
+REQUEST_ERRORS = Counter("scraper_request_errors_total", "Failed requests by HTTP status or failure kind",
+                         ("source", "endpoint", "reason"))
+RATE_LIMITED = Counter("scraper_rate_limited_total", "Responses with status 429", ("source", "endpoint"))
+RATE_LIMIT_WAIT_SECONDS = Counter("scraper_rate_limit_wait_seconds_total",
+                                  "Time requests spent waiting for their host's rate limit", ("host",))
+RATE_LIMIT_RATE = Gauge("scraper_rate_limit_rate", "Current requests per second allowed per host", ("host",))
+CONCURRENCY_LIMIT = Gauge("scraper_concurrency_limit", "Current adaptive in-flight request limit per host", ("host",))
+CONCURRENCY_IN_FLIGHT = Gauge("scraper_concurrency_in_flight", "Requests in flight per host", ("host",))
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# Numeric path segments are ids (/markets/123, /event/456.json): fold them so
+# each endpoint is one series rather than one per event
+_ID_SEGMENT = re.compile(r"(?<=/)\d+(?=/|\.[A-Za-z]+(?:/|$)|$)")
+
+
+def endpoint(url: str) -> str:
+    return _ID_SEGMENT.sub(":id", urlsplit(url).path) or "/"
+
+
+def observe_request(source: str, endpoint: str, seconds: float, status: int, size: int):
+    REQUEST_SECONDS.observe(seconds, source, endpoint)
+    RESPONSE_BYTES.inc(source, endpoint, amount=size)
+    if status == 429:
+        RATE_LIMITED.inc(source, endpoint)
+    if status >= 400:
+        REQUEST_ERRORS.inc(source, endpoint, str(status))
+
+
+def observe_error(source: str, endpoint: str, reason: str):
+    """A request that never produced a response: ``reason`` is e.g. timeout or connection"""
+    REQUEST_ERRORS.inc(source, endpoint, reason)
+
+
+def timed_decode(decode: Callable[..., Any], source: str, endpoint: str) -> Callable[..., Any]:
+    """Wrap a decoder such as ``response.json`` so its run time lands in DECODE_SECONDS"""
+    @functools.wraps(decode)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return decode(*args, **kwargs)
+        finally:
+            DECODE_SECONDS.observe(time.perf_counter() - started, source, endpoint)
+    return wrapper
+
+
+def loads(source: str, endpoint: str, message):
+    """``json.loads`` for payloads that don't come through http_client, e.g. websocket frames"""
+    if not ENABLED:
+        return json.loads(message)
+    RESPONSE_BYTES.inc(source, endpoint, amount=len(message))
+    return timed_decode(json.loads, source, endpoint)(message)
+
+
+class _ParseTimer:
+    __slots__ = ("source", "stage", "started")
+
+    def __init__(self, source: str, stage: str):
+        self.source = source
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        PARSE_SECONDS.observe(time.perf_counter() - self.started, self.source, self.stage)
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def parse_timer(source: str, stage: str):
+    """Context manager that records the time of a parse stage"""
+    return _ParseTimer(source, stage) if ENABLED else _NOOP_TIMER
+
+
+def count_records(source: str, stage: str, count: int):
+    if ENABLED:
+        RECORDS.inc(source, stage, amount=count)
+
+
+def _observe_records(iterator: Iterator, source: str, stage: str, timed: bool) -> Iterator:
+    elapsed = 0.0
+    count = 0
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - started
+            count += 1
+            yield item
+    finally:
+        RECORDS.inc(source, stage, amount=count)
+        if timed:
+            PARSE_SECONDS.observe(elapsed, source, stage)
+
+
+def produces(source: str, stage: str, timed: bool = True):
+    """Decorator for record generators: counts what they yield and, with ``timed``,
+    the time spent inside the generator (not in its consumer).
+
+    Pass ``timed=False`` for generators that fetch as they go, where that time
+    would mostly be network.
+    """
+    def decorate(func: Callable[..., Iterator]) -> Callable[..., Iterator]:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            iterator = func(*args, **kwargs)
+            return _observe_records(iterator, source, stage, timed) if ENABLED else iterator
+        return wrapper
+    return decorate
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def start_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve ``/metrics`` from a daemon thread and start recording"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    enable()
+    print(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics", file=sys.stderr)
+    return server
+
+
+def start_from_env() -> Optional[ThreadingHTTPServer]:
+    """Start the endpoint when METRICS_PORT is set (METRICS_HOST defaults to 127.0.0.1)"""
+    port = os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    return start_server(int(port), os.getenv("METRICS_HOST", "127.0.0.1"))
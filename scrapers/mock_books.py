@@ -0,0 +1,453 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import WSMsgType, web
+
+GAMES = [("cs2", 1), ("dota2", 2), ("lol", 3), ("valorant", 4)]
+TEAM_NAMES = [
+    "Natus Vincere", "FaZe Clan", "Team Vitality", "G2 Esports", "MOUZ", "Team Spirit", "Heroic",
+    "Astralis", "Team Liquid", "ENCE", "Cloud9", "Fnatic", "Ninjas in Pyjamas", "BIG", "Eternal Fire",
+    "Virtus.pro", "Complexity", "paiN Gaming", "FURIA", "The MongolZ", "3DMAX", "SAW", "Falcons", "GamerLegion",
+]
+# Per-book margin on top of the fair price
+MARGINS = {"betmgm": 0.06, "pinnacle": 0.025, "stake": 0.05, "thunderpick": 0.055, "ggbet": 0.06}
+
+
+def _iso(moment: datetime) -> str:
+    return moment.isoformat().replace("+00:00", "Z")
+
+
+@dataclass
+class MockEvent:
+    index: int
+    game: str
+    game_id: int
+    league: str
+    home: str
+    away: str
+    start: datetime
+    # Fair probability of the home side, moved by churn
+    home_probability: float
+    handicap: float
+    total: float
+    version: int = 0
+    live: bool = False
+
+    def odds(self, book: str, home_probability: Optional[float] = None) -> Tuple[float, float]:
+        p = self.home_probability if home_probability is None else home_probability
+        margin = 1.0 + MARGINS.get(book, 0.05)
+        return round(1.0 / (p * margin), 3), round(1.0 / ((1.0 - p) * margin), 3)
+
+    def book_id(self, book: str) -> int:
+        # Distinct id space per book, like the real feeds
+        return {"betmgm": 1_000_000, "pinnacle": 2_000_000, "stake": 3_000_000,
+                "thunderpick": 4_000_000, "ggbet": 5_000_000}[book] + self.index
+
+
+@dataclass
+class MockBoard:
+    """Synthetic cross-book board: one set of events priced by every book with its own margin"""
+    size: int = 100
+    seed: int = 7
+    events: List[MockEvent] = field(default_factory=list)
+    changed: List[MockEvent] = field(default_factory=list)
+
+    def __post_init__(self):
+        rng = random.Random(self.seed)
+        now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        for index in range(self.size):
+            game, game_id = GAMES[index % len(GAMES)]
+            home, away = rng.sample(TEAM_NAMES, 2)
+            self.events.append(MockEvent(
+                index=index, game=game, game_id=game_id, league=f"{game.upper()} Mock League {index % 7}",
+                home=f"{home} {index // len(TEAM_NAMES)}" if index >= len(TEAM_NAMES) else home,
+                away=f"{away} {index // len(TEAM_NAMES)}" if index >= len(TEAM_NAMES) else away,
+                start=now + timedelta(minutes=rng.randint(-90, 60 * 48)),
+                home_probability=rng.uniform(0.2, 0.8),
+                handicap=rng.choice([-1.5, -0.5, 0.5, 1.5]),
+                total=rng.choice([24.5, 26.5, 2.5]),
+            ))
+        for event in self.events:
+            event.live = event.start <= now
+        self.rng = rng
+
+    def churn(self, fraction: float) -> List[MockEvent]:
+        """Move the price of ``fraction`` of the events by a small log-odds step"""
+        count = min(self.size, max(0, int(round(self.size * fraction))))
+        moved = self.rng.sample(self.events, count) if count else []
+        for event in moved:
+            log_odds = math.log(event.home_probability / (1.0 - event.home_probability))
+            log_odds += self.rng.gauss(0.0, 0.08)
+            event.home_probability = min(0.95, max(0.05, 1.0 / (1.0 + math.exp(-log_odds))))
+            event.version += 1
+        self.changed = moved
+        return moved
+
+    def by_book_id(self, book: str, book_id: int) -> Optional[MockEvent]:
+        index = book_id - self.events[0].book_id(book) if self.events else -1
+        return self.events[index] if 0 <= index < self.size else None
+
+    # -- BetMGM / Kambi ------------------------------------------------------------
+
+    def kambi_offers(self, event: MockEvent) -> List[Dict]:
+        home, away = event.odds("betmgm")
+        hcp_home, hcp_away = event.odds("betmgm", min(0.9, max(0.1, event.home_probability - 0.1)))
+        over, under = event.odds("betmgm", 0.5)
+        return [
+            {"criterion": {"label": "Matchodds", "englishLabel": "Match Odds"}, "outcomes": [
+                {"label": event.home, "participant": event.home, "type": "OT_ONE", "status": "OPEN",
+                 "odds": int(home * 1000)},
+                {"label": event.away, "participant": event.away, "type": "OT_TWO", "status": "OPEN",
+                 "odds": int(away * 1000)},
+            ]},
+            {"criterion": {"label": "Handikapp", "englishLabel": "Handicap"}, "outcomes": [
+                {"label": event.home, "type": "OT_ONE", "status": "OPEN", "odds": int(hcp_home * 1000),
+                 "line": int(event.handicap * 1000)},
+                {"label": event.away, "type": "OT_TWO", "status": "OPEN", "odds": int(hcp_away * 1000),
+                 "line": int(-event.handicap * 1000)},
+            ]},
+            {"criterion": {"label": "Totalt antal rundor", "englishLabel": "Total Rounds"}, "outcomes": [
+                {"label": "Över", "type": "OT_OVER", "status": "OPEN", "odds": int(over * 1000),
+                 "line": int(event.total * 1000)},
+                {"label": "Under", "type": "OT_UNDER", "status": "OPEN", "odds": int(under * 1000),
+                 "line": int(event.total * 1000)},
+            ]},
+        ]
+
+    def betmgm_events(self) -> Dict:
+        leagues: Dict[str, List[Dict]] = {}
+        for event in self.events:
+            leagues.setdefault(event.league, []).append({
+                "id": event.book_id("betmgm"), "name": f"{event.home} - {event.away}",
+                "homeName": event.home, "awayName": event.away,
+                # lmbas sends epoch milliseconds
+                "start": int(event.start.timestamp() * 1000), "state": "STARTED" if event.live else "NOT_STARTED",
+                "liveData": None, "betOffers": self.kambi_offers(event)[:1],
+            })
+        groups = [{"name": league, "events": events} for league, events in leagues.items()]
+        return {"data": {"viewer": {"sports": {"sportsEvents": {"groups": [{"name": "Esports", "groups": groups}]}}}}}
+
+    # -- Pinnacle ------------------------------------------------------------------
+
+    def pinnacle_matchups(self) -> List[Dict]:
+        return [{
+            "id": event.book_id("pinnacle"), "startTime": _iso(event.start), "isLive": event.live,
+            "league": {"id": 12, "name": event.league},
+            "participants": [{"alignment": "home", "name": event.home}, {"alignment": "away", "name": event.away}],
+        } for event in self.events]
+
+    def pinnacle_markets(self, event: MockEvent) -> List[Dict]:
+        def american(decimal: float) -> int:
+            return int(round((decimal - 1) * 100)) if decimal >= 2 else int(round(-100 / (decimal - 1)))
+
+        home, away = event.odds("pinnacle")
+        matchup_id = event.book_id("pinnacle")
+        markets = [{"matchupId": matchup_id, "type": "moneyline", "period": 0, "prices": [
+            {"designation": "home", "price": american(home)}, {"designation": "away", "price": american(away)}]}]
+        for period in (1, 2):
+            map_home, map_away = event.odds("pinnacle", min(0.9, max(0.1, event.home_probability + 0.03 * period)))
+            markets.append({"matchupId": matchup_id, "type": "spread", "period": period, "prices": [
+                {"designation": "home", "points": event.handicap, "price": american(map_home)},
+                {"designation": "away", "points": -event.handicap, "price": american(map_away)}]})
+        return markets
+
+    # -- Stake ---------------------------------------------------------------------
+
+    def stake_fixture(self, event: MockEvent) -> Dict:
+        home, away = event.odds("stake")
+        return {
+            "id": f"stake-{event.book_id('stake')}", "status": "live" if event.live else "active",
+            "name": f"{event.home} - {event.away}",
+            "data": {"startTime": event.start.strftime("%a, %d %b %Y %H:%M:%S GMT"),
+                     "competitors": [{"name": event.home}, {"name": event.away}]},
+            "groups": [{"name": "winner", "markets": [{"name": "Winner", "outcomes": [
+                {"name": event.home, "odds": home, "active": True},
+                {"name": event.away, "odds": away, "active": True}]}]}],
+        }
+
+    def stake_response(self, live: bool) -> Dict:
+        events = [event for event in self.events if event.live == live]
+        if live:
+            tournaments: Dict[str, List[Dict]] = {}
+            for event in events:
+                tournaments.setdefault(event.league, []).append(self.stake_fixture(event))
+            sport = {"tournamentList": [{"name": name, "fixtureList": fixtures}
+                                        for name, fixtures in tournaments.items()]}
+        else:
+            sport = {"fixtureList": [self.stake_fixture(event) for event in events]}
+        return {"data": {"sport": sport}}
+
+    # -- Thunderpick ---------------------------------------------------------------
+
+    def thunderpick_match(self, event: MockEvent) -> Dict:
+        home, away = event.odds("thunderpick")
+        match_id = event.book_id("thunderpick")
+        return {
+            "id": match_id, "gameId": event.game_id, "startTime": _iso(event.start),
+            "name": f"{event.home} vs {event.away}", "isLive": event.live,
+            "teams": {"home": {"id": match_id * 2, "name": event.home, "hasImage": False},
+                      "away": {"id": match_id * 2 + 1, "name": event.away, "hasImage": False}},
+            "competition": {"id": event.index % 7, "name": event.league, "shortName": event.league[:12],
+                            "countryCode": None, "defaultStream": None},
+            "market": {"id": match_id * 10, "name": "Match Winner", "type": 1, "status": 1,
+                       "home": {"odds": home}, "away": {"odds": away}, "draw": None, "hasCombo": True,
+                       "hasInPlay": True, "order": 0, "overrideMainOrder": False, "isSgc": False},
+            "totalOpenMarkets": 3, "totalAvailableMarkets": 3, "bestOf": 3,
+        }
+
+    def thunderpick_markets(self, event: MockEvent) -> List[Dict]:
+        match_id = event.book_id("thunderpick")
+        home, away = event.odds("thunderpick")
+        hcp_home, hcp_away = event.odds("thunderpick", min(0.9, max(0.1, event.home_probability - 0.1)))
+
+        def market(offset: int, name: str, market_type: int, selections: List[Dict],
+                   handicap: Optional[float] = None, period: Optional[Dict] = None) -> Dict:
+            return {
+                "eventId": match_id, "id": match_id * 10 + offset, "name": name, "status": 1,
+                "type": market_type, "category": 1, "selections": selections, "order": offset,
+                "hasCombo": True, "hasInPlay": True, "isVisible": True, "overrideMainOrder": False,
+                "handicap": handicap, "baseLine": None if handicap is None else str(handicap),
+                "isMainLine": True, "lineMarketColumnNames": None, "customColumnNames": None,
+                "subCategory": 0, "isFeatured": offset == 0, "period": period, "isSgc": False,
+            }
+
+        def selection(offset: int, name: str, odds: float, kind: str, handicap: Optional[float] = None) -> Dict:
+            return {"id": match_id * 100 + offset, "name": name, "status": 1, "odds": odds,
+                    "handicap": handicap, "total": None, "type": kind}
+
+        return [
+            market(0, "Match Winner", 1, [selection(0, event.home, home, "home"),
+                                          selection(1, event.away, away, "away")]),
+            market(1, "Map Handicap", 2, [selection(2, event.home, hcp_home, "home", event.handicap),
+                                          selection(3, event.away, hcp_away, "away", -event.handicap)],
+                   handicap=event.handicap),
+            market(2, "Map 1 Winner", 1, [selection(4, event.home, home, "home"),
+                                          selection(5, event.away, away, "away")],
+                   period={"type": "map", "number": 1}),
+        ]
+
+    # -- GGBet ---------------------------------------------------------------------
+
+    def ggbet_match(self, event: MockEvent) -> Dict:
+        home, away = event.odds("ggbet")
+        match_id = str(event.book_id("ggbet"))
+        tournament_start = event.start - timedelta(days=3)
+        return {
+            "id": match_id,
+            "fixture": {
+                "title": f"{event.home} vs {event.away}", "startTime": _iso(event.start),
+                "status": "LIVE" if event.live else "NOT_STARTED", "score": "0:0",
+                "competitors": [{"id": f"{match_id}-h", "name": event.home, "homeAway": "HOME"},
+                                {"id": f"{match_id}-a", "name": event.away, "homeAway": "AWAY"}],
+                "tournament": {"id": str(event.index % 7), "name": event.league, "countryCode": "WW",
+                               "dateStart": _iso(tournament_start),
+                               "dateEnd": _iso(tournament_start + timedelta(days=10))},
+            },
+            "markets": [{"id": f"{match_id}-w", "name": "Winner", "typeId": 1, "status": "ACTIVE", "specifiers": [],
+                         "odds": [
+                             {"id": f"{match_id}-w1", "name": event.home, "value": str(home), "isActive": True,
+                              "status": "NOT_RESULTED", "competitorIds": [f"{match_id}-h"]},
+                             {"id": f"{match_id}-w2", "name": event.away, "value": str(away), "isActive": True,
+                              "status": "NOT_RESULTED", "competitorIds": [f"{match_id}-a"]},
+                         ]}],
+            "meta": [{"name": "bo", "value": "3"}],
+        }
+
+
+@dataclass
+class MockConfig:
+    size: int = 100
+    churn: float = 0.05
+    tick: float = 1.0
+    latency_ms: float = 0.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    retry_after: float = 1.0
+    seed: int = 7
+
+
+class MockBookServer:
+    """aiohttp app serving every upstream endpoint the scrapers call from one synthetic board.
+
+    Each HTTP request waits for a log-normal latency with median
+    ``latency_ms`` and is answered with 429 (plus Retry-After) at
+    ``error_rate``. Every ``tick`` seconds ``churn`` of the events move their
+    price; GGBet websocket clients get those matches pushed as updates.
+    Request counts are served at ``/__stats``.
+    """
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.board = MockBoard(config.size, config.seed)
+        self.rng = random.Random(config.seed + 1)
+        self.requests: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self.started = time.monotonic()
+        self.sockets: List[web.WebSocketResponse] = []
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.upstream_conditions])
+        app.add_routes([
+            web.get("/sport", self.betmgm_home),
+            web.post("/api/lmbas", self.betmgm_events),
+            web.get("/offering/v2018/{offering}/betoffer/event/{event_id}.json", self.kambi_event),
+            web.get("/0.1/leagues/{league_id}/matchups", self.pinnacle_matchups),
+            web.get("/0.1/matchups/{matchup_id}/markets/related/straight", self.pinnacle_straight),
+            web.post("/graphql", self.stake_graphql),
+            web.get("/graphql", self.ggbet_socket),
+            web.post("/api/matches", self.thunderpick_matches),
+            web.get("/api/markets/{match_id}", self.thunderpick_markets),
+            web.post("/auth/anonymous", self.ggbet_auth),
+            web.get("/__stats", self.stats),
+        ])
+        app.on_startup.append(self._start_churn)
+        app.on_cleanup.append(self._stop_churn)
+        return app
+
+    @web.middleware
+    async def upstream_conditions(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else "?"
+        if route == "/__stats":
+            return await handler(request)
+        self.requests[route] += 1
+        if self.config.latency_ms > 0:
+            await asyncio.sleep(self.rng.lognormvariate(math.log(self.config.latency_ms / 1000.0),
+                                                        self.config.latency_sigma))
+        if self.config.error_rate and self.rng.random() < self.config.error_rate:
+            self.throttled[route] += 1
+            return web.json_response({"error": "Too Many Requests"}, status=429,
+                                     headers={"Retry-After": f"{self.config.retry_after:g}"})
+        return await handler(request)
+
+    async def _start_churn(self, app: web.Application):
+        app["churn"] = asyncio.create_task(self._churn_loop())
+
+    async def _stop_churn(self, app: web.Application):
+        app["churn"].cancel()
+        for socket in list(self.sockets):
+            await socket.close()
+
+    async def _churn_loop(self):
+        while True:
+            await asyncio.sleep(self.config.tick)
+            moved = self.board.churn(self.config.churn * self.config.tick)
+            if moved and self.sockets:
+                message = json.dumps({"id": "1", "type": "next", "payload": {
+                    "data": {"matches": [self.board.ggbet_match(event) for event in moved]}}})
+                await asyncio.gather(*(socket.send_str(message) for socket in self.sockets),
+                                     return_exceptions=True)
+
+    def _event(self, book: str, raw_id: str) -> MockEvent:
+        try:
+            event = self.board.by_book_id(book, int(raw_id))
+        except ValueError:
+            event = None
+        if event is None:
+            raise web.HTTPNotFound()
+        return event
+
+    async def betmgm_home(self, request: web.Request) -> web.Response:
+        response = web.Response(text="<html></html>", content_type="text/html")
+        response.set_cookie("mock_session", "1")
+        return response
+
+    async def betmgm_events(self, request: web.Request) -> web.Response:
+        return web.json_response(self.board.betmgm_events())
+
+    async def kambi_event(self, request: web.Request) -> web.Response:
+        event = self._event("betmgm", request.match_info["event_id"])
+        return web.json_response({"betOffers": self.board.kambi_offers(event)})
+
+    async def pinnacle_matchups(self, request: web.Request) -> web.Response:
+        return web.json_response(self.board.pinnacle_matchups())
+
+    async def pinnacle_straight(self, request: web.Request) -> web.Response:
+        event = self._event("pinnacle", request.match_info["matchup_id"])
+        return web.json_response(self.board.pinnacle_markets(event))
+
+    async def stake_graphql(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        live = "tournamentList" in (payload.get("query") or "")
+        return web.json_response(self.board.stake_response(live))
+
+    async def thunderpick_matches(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        game_ids = set(payload.get("gameIds") or [])
+        matches = [self.board.thunderpick_match(event) for event in self.board.events
+                   if not game_ids or event.game_id in game_ids]
+        return web.json_response({"ok": True, "data": {"matches": matches}})
+
+    async def thunderpick_markets(self, request: web.Request) -> web.Response:
+        event = self._event("thunderpick", request.match_info["match_id"])
+        return web.json_response({"ok": True, "data": self.board.thunderpick_markets(event)})
+
+    async def ggbet_auth(self, request: web.Request) -> web.Response:
+        return web.json_response({"token": "mock-token"})
+
+    async def ggbet_socket(self, request: web.Request) -> web.WebSocketResponse:
+        socket = web.WebSocketResponse(protocols=["graphql-ws"])
+        await socket.prepare(request)
+        try:
+            async for message in socket:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                data = json.loads(message.data)
+                if data.get("type") == "connection_init":
+                    await socket.send_str(json.dumps({"type": "connection_ack"}))
+                elif data.get("type") in ("subscribe", "start"):
+                    # Full board first, then churn updates from the tick loop
+                    await socket.send_str(json.dumps({"id": data.get("id", "1"), "type": "next", "payload": {
+                        "data": {"matches": [self.board.ggbet_match(event) for event in self.board.events]}}}))
+                    self.sockets.append(socket)
+        finally:
+            if socket in self.sockets:
+                self.sockets.remove(socket)
+        return socket
+
+    async def stats(self, request: web.Request) -> web.Response:
+        elapsed = time.monotonic() - self.started
+        return web.json_response({
+            "elapsed": elapsed,
+            "events": self.board.size,
+            "requests": dict(self.requests),
+            "throttled": dict(self.throttled),
+            "requests_per_sec": sum(self.requests.values()) / elapsed if elapsed else 0.0,
+            "sockets": len(self.sockets),
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic board on every bookmaker endpoint the scrapers call")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--events", type=int, default=100, help="board size, 10 to 10000")
+    parser.add_argument("--churn", type=float, default=0.05, help="fraction of events repriced per second")
+    parser.add_argument("--tick", type=float, default=1.0, help="seconds between churn steps")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal spread of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if not 10 <= args.events <= 10_000:
+        parser.error("--events must be between 10 and 10000")
+    config = MockConfig(size=args.events, churn=args.churn, tick=args.tick, latency_ms=args.latency_ms,
+                        latency_sigma=args.latency_sigma, error_rate=args.error_rate,
+                        retry_after=args.retry_after, seed=args.seed)
+    base = f"http://{args.host}:{args.port}"
+    print(f"Mock books on {base}: HTTP_UPSTREAM={base} GGBET_API_URL={base} "
+          f"GGBET_WS_URL=ws://{args.host}:{args.port}/graphql")
+    web.run_app(MockBookServer(config).app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import argparse
+import asyncio
+import json
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import betmgm
+import metrics
+import pinnacle
+import profiling
+from ggbet import GGBetScraper
+from stake import StakeScraper
+from thunderpick import ThunderpickScraper
+
+
+def betmgm_records() -> Iterator[Dict]:
+    yield from betmgm.iter_match_odds(betmgm.get_esports_events())
+
+
+def pinnacle_records() -> Iterator[Dict]:
+    yield from pinnacle.iter_match_odds()
+
+
+def stake_records() -> Iterator[Dict]:
+    scraper = StakeScraper()
+    for live in (True, False):
+        yield from scraper.iter_match_odds(scraper.scrape_events(live=live))
+
+
+def thunderpick_records() -> Iterator[Dict]:
+    scraper = ThunderpickScraper()
+    # Shards are yielded as they land, so fast games stream out before slow ones finish
+    for shard in scraper.get_matches_sharded():
+        if shard.error is not None:
+            print(f"Error fetching games {shard.game_ids}: {shard.error}", file=sys.stderr)
+            continue
+        yield from scraper.iter_match_odds(shard.matches)
+
+
+def ggbet_records(window: float = 5.0) -> Iterator[Dict]:
+    scraper = GGBetScraper()
+
+    async def collect():
+        try:
+            await scraper.poll(window)
+        finally:
+            await scraper.cleanup()
+
+    asyncio.run(collect())
+    yield from scraper.iter_match_odds()
+
+
+SOURCES: Dict[str, Callable[[], Iterable[Dict]]] = {
+    "betmgm": betmgm_records,
+    "pinnacle": pinnacle_records,
+    "stake": stake_records,
+    "thunderpick": thunderpick_records,
+    "ggbet": ggbet_records,
+}
+
+
+def iter_records(sources: List[str]) -> Iterator[Dict]:
+    """Run one cycle of each source in turn, isolating failures per source"""
+    for name in sources:
+        try:
+            with profiling.cycle(name):
+                yield from SOURCES[name]()
+        except Exception as e:
+            print(f"Error scraping {name}: {e}", file=sys.stderr)
+
+
+def encode(record: Dict) -> bytes:
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode()
+
+
+def write_ndjson(records: Iterable[Dict], write: Callable[[bytes], None], flush: Callable[[], None] = None) -> int:
+    """Write each record as one line as soon as it is produced; returns the count"""
+    count = 0
+    for record in records:
+        write(encode(record))
+        if flush:
+            flush()
+        count += 1
+    return count
+
+
+class SharedCycle:
+    """Runs at most one scrape cycle at a time and fans its records out to every reader.
+
+    A reader that arrives while a cycle is running replays what it has
+    produced so far and then follows it live; one that arrives within
+    ``max_age`` seconds of the last cycle finishing gets that cycle's records
+    without a new scrape. Slow readers never hold the cycle up.
+    """
+
+    def __init__(self, produce: Callable[[], Iterable[Dict]], max_age: float = 0.0):
+        self.produce = produce
+        self.max_age = max_age
+        self.condition = threading.Condition()
+        self.records: List[Dict] = []
+        self.running = False
+        self.finished_at: Optional[float] = None
+
+    def _run(self, records: List[Dict]):
+        try:
+            for record in self.produce():
+                with self.condition:
+                    records.append(record)
+                    self.condition.notify_all()
+        finally:
+            with self.condition:
+                self.running = False
+                self.finished_at = time.monotonic()
+                self.condition.notify_all()
+
+    def _finished(self, records: List[Dict]) -> bool:
+        return self.records is not records or not self.running
+
+    def read(self) -> Iterator[Dict]:
+        with self.condition:
+            stale = self.finished_at is None or time.monotonic() - self.finished_at > self.max_age
+            if not self.running and stale:
+                # A fresh list, so readers still draining the previous cycle keep theirs
+                self.records = []
+                self.running = True
+                threading.Thread(target=self._run, args=(self.records,), name="ndjson-cycle", daemon=True).start()
+            records = self.records
+
+        sent = 0
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: len(records) > sent or self._finished(records))
+                batch = records[sent:]
+                done = self._finished(records)
+            sent += len(batch)
+            yield from batch
+            if done:
+                return
+
+
+def serve_http(sources: List[str], host: str, port: int, max_age: float = 1.0):
+    """Serve the shared scrape cycle to every GET as a chunked NDJSON response"""
+    cycle = SharedCycle(lambda: iter_records(sources), max_age)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def write_chunk(data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+            write_ndjson(cycle.read(), write_chunk, self.wfile.flush)
+            self.wfile.write(b"0\r\n\r\n")
+
+    with ThreadingHTTPServer((host, port), Handler) as server:
+        print(f"Serving NDJSON for {', '.join(sources)} on http://{host}:{port}", file=sys.stderr)
+        server.serve_forever()
+
+
+def serve_unix(sources: List[str], path: str, max_age: float = 1.0):
+    """Stream the shared scrape cycle to every client that connects to the socket"""
+    cycle = SharedCycle(lambda: iter_records(sources), max_age)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            write_ndjson(cycle.read(), self.wfile.write, self.wfile.flush)
+
+    with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+        print(f"Serving NDJSON for {', '.join(sources)} on unix:{path}", file=sys.stderr)
+        server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream normalized MatchOdds records as NDJSON")
+    # Checked by hand: with nargs="*" argparse validates an empty list against ``choices``
+    parser.add_argument("sources", nargs="*", help=f"any of {', '.join(SOURCES)} (default: all)")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--unix", metavar="PATH", help="serve on a Unix socket")
+    target.add_argument("--http", metavar="PORT", type=int, help="serve chunked HTTP on a port")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--max-age", type=float, default=1.0,
+                        help="seconds a finished cycle is served again before a request starts a new one")
+    args = parser.parse_args()
+    unknown = [name for name in args.sources if name not in SOURCES]
+    if unknown:
+        parser.error(f"unknown source(s): {', '.join(unknown)}")
+    args.sources = args.sources or list(SOURCES)
+
+    metrics.start_from_env()
+    profiling.arm_from_env()
+    profiling.install_signal_handler()
+    if args.unix:
+        serve_unix(args.sources, args.unix, args.max_age)
+    elif args.http:
+        serve_http(args.sources, args.host, args.http, args.max_age)
+    else:
+        write_ndjson(iter_records(args.sources), sys.stdout.buffer.write, sys.stdout.buffer.flush)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Sequence
+
+# Mirrors `MatchOdds` in packages/shared/src/index.ts
+BOOKMAKERS = {"pinnacle", "betmgm", "stake", "thunderpick", "ggbet"}
+
+
+def american_to_decimal(price: float) -> float:
+    """Convert American odds to decimal odds"""
+    if price > 0:
+        return round((price / 100) + 1, 3)
+    return round((100 / abs(price)) + 1, 3)
+
+
+def to_iso(value: Any) -> str:
+    """ISO-8601 UTC string from a datetime, epoch (s or ms) or ISO string; now if unparseable"""
+    if isinstance(value, datetime):
+        parsed = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    elif isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+        number = int(value)
+        parsed = datetime.fromtimestamp(number / 1000 if number > 1_000_000_000_000 else number, tz=timezone.utc)
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            try:
+                # Fall back to RFC 2822 dates such as "Mon, 20 Oct 2026 18:00:00 GMT"
+                parsed = parsedate_to_datetime(str(value))
+            except (TypeError, ValueError):
+                parsed = datetime.now(timezone.utc)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def match_odds_record(bookmaker: str, event_id: Any, league: Optional[str], start: Any,
+                      teams: Sequence[str], odds: Sequence[Optional[float]],
+                      scraped_at: Optional[datetime] = None) -> Optional[Dict]:
+    """Build a `MatchOdds`-shaped dict, or None when the two-way market is incomplete"""
+    if bookmaker not in BOOKMAKERS:
+        raise ValueError(f"Unknown bookmaker: {bookmaker}")
+    if len(teams) < 2 or len(odds) < 2 or not all(teams[:2]):
+        return None
+    if any(price is None or price <= 1 for price in odds[:2]):
+        return None
+
+    return {
+        "id": f"{bookmaker}-{event_id}",
+        "bookmaker": bookmaker,
+        "league": league or f"{bookmaker.capitalize()} Esports",
+        "startTimeIso": to_iso(start),
+        "teams": [teams[0], teams[1]],
+        "market": "match_winner",
+        "outcomes": [
+            {"team": teams[0], "decimalOdds": round(float(odds[0]), 3)},
+            {"team": teams[1], "decimalOdds": round(float(odds[1]), 3)},
+        ],
+        "scrapedAtIso": to_iso(scraped_at or datetime.now(timezone.utc)),
+    }
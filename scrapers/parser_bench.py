@@ -0,0 +1,219 @@
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from betmgm import display_events
+from ggbet import GGBetScraper
+from mock_books import MockBoard
+from pinnacle import format_period_markets, group_markets
+from stake import StakeScraper
+from thunderpick import DetailedMarket, ThunderpickScraper
+
+# 1x is roughly one esports board per book
+BASE_EVENTS = 100
+SCALES = (1, 10, 100)
+
+# A benchmark is built once per scale: it returns the function to time and
+# the number of records that function parses per call
+Prepared = Tuple[Callable[[], object], int]
+
+
+@dataclass
+class BenchResult:
+    parser: str
+    scale: int
+    records: int
+    runs: int
+    ops_per_sec: float
+    records_per_sec: float
+    best_seconds: float
+    peak_bytes: int
+    retained_blocks: int
+    retained_bytes: int
+
+
+def _quiet(func: Callable[[], object]) -> Callable[[], object]:
+    """Run a printing parser with stdout sent to /dev/null, so the terminal isn't what gets measured"""
+    def run():
+        with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+            return func()
+    return run
+
+
+def bench_betmgm(board: MockBoard) -> Prepared:
+    data = board.betmgm_events()
+    offers = {event.book_id("betmgm"): {"betOffers": board.kambi_offers(event)} for event in board.events}
+    return _quiet(lambda: display_events(data, fetch_markets=offers.get)), len(board.events)
+
+
+def bench_ggbet(board: MockBoard) -> Prepared:
+    scraper = GGBetScraper()
+    payloads = [board.ggbet_match(event) for event in board.events]
+    return lambda: [scraper._parse_match(payload) for payload in payloads], len(payloads)
+
+
+def bench_thunderpick(board: MockBoard) -> Prepared:
+    scraper = ThunderpickScraper()
+    payloads = [board.thunderpick_match(event) for event in board.events]
+    return lambda: [scraper._parse_match(payload) for payload in payloads], len(payloads)
+
+
+def bench_thunderpick_markets(board: MockBoard) -> Prepared:
+    payloads = [market for event in board.events for market in board.thunderpick_markets(event)]
+    return lambda: [DetailedMarket.from_dict(payload) for payload in payloads], len(payloads)
+
+
+def bench_pinnacle(board: MockBoard) -> Prepared:
+    data = [market for event in board.events for market in board.pinnacle_markets(event)]
+    teams = {event.book_id("pinnacle"): (event.home, event.away) for event in board.events}
+
+    def run():
+        lines = []
+        for matchup_id, markets_by_period in group_markets(data).items():
+            home_team, away_team = teams[matchup_id]
+            for period, period_markets in sorted(markets_by_period.items()):
+                lines += format_period_markets(period, period_markets, home_team, away_team)
+        return lines
+    return run, len(data)
+
+
+def bench_stake(board: MockBoard) -> Prepared:
+    scraper = StakeScraper()
+    live, upcoming = board.stake_response(True), board.stake_response(False)
+
+    def run():
+        scraper.format_events(live)
+        scraper.format_events(upcoming)
+    return _quiet(run), len(board.events)
+
+
+BENCHMARKS: Dict[str, Callable[[MockBoard], Prepared]] = {
+    "betmgm.display_events": bench_betmgm,
+    "ggbet._parse_match": bench_ggbet,
+    "thunderpick._parse_match": bench_thunderpick,
+    "thunderpick.DetailedMarket.from_dict": bench_thunderpick_markets,
+    "pinnacle.group_markets": bench_pinnacle,
+    "stake.format_events": bench_stake,
+}
+
+
+def measure(name: str, scale: int, min_time: float = 1.0, min_runs: int = 3) -> BenchResult:
+    board = MockBoard(size=BASE_EVENTS * scale)
+    func, records = BENCHMARKS[name](board)
+    func()  # warm caches and lazy imports
+
+    timings: List[float] = []
+    started = time.perf_counter()
+    while len(timings) < min_runs or time.perf_counter() - started < min_time:
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+    total = sum(timings)
+
+    # Memory in a separate run: tracemalloc slows allocation-heavy code several times over
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    baseline, _ = tracemalloc.get_traced_memory()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = [stat for stat in after.compare_to(before, "filename") if stat.size_diff > 0]
+    del result
+
+    return BenchResult(
+        parser=name, scale=scale, records=records, runs=len(timings),
+        ops_per_sec=len(timings) / total,
+        records_per_sec=records * len(timings) / total,
+        best_seconds=min(timings),
+        peak_bytes=peak - baseline,
+        retained_blocks=sum(stat.count_diff for stat in retained),
+        retained_bytes=sum(stat.size_diff for stat in retained),
+    )
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[BenchResult], baseline_path: str, threshold: float) -> int:
+    """Print the change against a previous run; returns how many benchmarks slowed down past ``threshold``"""
+    with open(baseline_path) as source:
+        baseline = {(row["parser"], row["scale"]): row for row in json.load(source)["results"]}
+
+    regressions = 0
+    print(f"\nAgainst {baseline_path}:")
+    for result in results:
+        previous = baseline.get((result.parser, result.scale))
+        if not previous:
+            continue
+        change = result.ops_per_sec / previous["ops_per_sec"] - 1
+        flag = ""
+        if change < -threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"  {result.parser:<38} {result.scale:>4}x  {change:+7.1%} ops/s  "
+              f"peak {previous['peak_bytes'] / 1024:,.0f} -> {result.peak_bytes / 1024:,.0f} KiB{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the scraper parsers on synthetic payloads")
+    parser.add_argument("parsers", nargs="*", help=f"subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--scales", default=",".join(map(str, SCALES)),
+                        help=f"comma-separated multiples of {BASE_EVENTS} events")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds to spend timing each case")
+    parser.add_argument("--output", default="parser_bench.json")
+    parser.add_argument("--baseline", help="previous --output file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="slowdown that counts as a regression with --baseline")
+    args = parser.parse_args()
+
+    names = args.parsers or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown parser(s): {', '.join(unknown)}")
+    scales = [int(scale) for scale in args.scales.split(",") if scale]
+
+    results = []
+    print(f"{'parser':<38} {'scale':>5} {'records':>8} {'ops/s':>10} {'records/s':>12} {'peak KiB':>10} "
+          f"{'kept blocks':>12}")
+    for name in names:
+        for scale in scales:
+            result = measure(name, scale, args.min_time)
+            results.append(result)
+            print(f"{name:<38} {scale:>4}x {result.records:>8} {result.ops_per_sec:>10,.1f} "
+                  f"{result.records_per_sec:>12,.0f} {result.peak_bytes / 1024:>10,.0f} {result.retained_blocks:>12,}")
+
+    with open(args.output, "w") as out:
+        json.dump({
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "run_at": datetime.now(timezone.utc).isoformat(),
+            "base_events": BASE_EVENTS,
+            "results": [asdict(result) for result in results],
+        }, out, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.baseline and compare(results, args.baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
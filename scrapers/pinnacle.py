@@ -1,10 +1,18 @@
 # scrapers/pinnacle_esports.py
 
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pydantic import BaseModel
 from datetime import datetime, timezone
 import json
 import os
+import sys
+from odds_records import american_to_decimal, match_odds_record
+from markets import HANDICAP, MATCH_WINNER, TOTAL, home_side_line
+import metrics
+from concurrency import pool_size
+import profiling
+from http_client import create_session
 
 # Provide these via environment variables instead of hardcoding secrets.
 X_API_KEY = os.getenv("PINNACLE_API_KEY", "")
@@ -18,69 +26,169 @@ HEADERS = {
     "content-type": "application/json"
 }
 
+PINNACLE_HOST = "guest.api.arcadia.pinnacle.se"
+SESSION = create_session(pool_maxsize=pool_size(PINNACLE_HOST), source="pinnacle")
+
 class MatchOdds(BaseModel):
     teams: str
     odds: list[int]
     scraped_at: datetime
 
-def scrape_pinnacle_esports() -> list[MatchOdds]:
-    # Fetch all esports matchups for the Esports league (ID 12)
-    list_url = "https://guest.api.arcadia.pinnacle.se/0.1/leagues/12/matchups?brandId=0"
-    resp = requests.get(list_url, headers=HEADERS, timeout=10)
+def fetch_matchups(league_id=12, brand_id=0) -> list[dict]:
+    """Fetch all matchups for a league, treating No Content as an empty board"""
+    list_url = f"https://{PINNACLE_HOST}/0.1/leagues/{league_id}/matchups?brandId={brand_id}"
+    resp = SESSION.get(list_url, headers=HEADERS, timeout=10)
     # Handle No Content
     if resp.status_code == 204:
-        related = []
-    else:
-        resp.raise_for_status()
+        return []
+    resp.raise_for_status()
+    try:
+        return resp.json()
+    except ValueError:
+        # Dump response for debugging
+        error_msg = (
+            f"Failed to decode JSON from {list_url}\n"
+            f"Status code: {resp.status_code}\n"
+            f"Response body:\n{resp.text[:500]!r}"
+        )
+        raise RuntimeError(error_msg)
+
+# league id -> last matchup list, used when the list endpoint fails and kept in checkpoints
+matchup_cache: dict[int, list[dict]] = {}
+# matchup id -> straight markets from its last successful fetch
+straight_markets: dict[int, list[dict]] = {}
+
+def checkpoint_state():
+    return {"matchups": dict(matchup_cache)}
+
+def restore_state(state):
+    matchup_cache.update(state["matchups"])
+
+def cached_matchups(league_id=12) -> list[dict]:
+    """Matchups for a league, falling back to the last good list when the endpoint fails"""
+    try:
+        matchups = fetch_matchups(league_id)
+    except (requests.exceptions.RequestException, RuntimeError) as e:
+        if league_id not in matchup_cache:
+            raise
+        print(f"Error fetching matchups, using {len(matchup_cache[league_id])} cached: {e}", file=sys.stderr)
+        return matchup_cache[league_id]
+    matchup_cache[league_id] = matchups
+    return matchups
+
+def matchup_teams(item):
+    """Return (home_name, away_name) for a matchup, or None when either is missing"""
+    participants = item.get("participants", [])
+    home = next((p.get("name") for p in participants if p.get("alignment") == "home"), None)
+    away = next((p.get("name") for p in participants if p.get("alignment") == "away"), None)
+    if home is None and len(participants) > 0:
+        home = participants[0].get("name")
+    if away is None and len(participants) > 1:
+        away = participants[1].get("name")
+    if home and away:
+        return home, away
+    return None
+
+def fetch_moneyline(matchup_id):
+    """Return (home_price, away_price) in American odds for the full-match moneyline"""
+    straight_tpl = "https://guest.api.arcadia.pinnacle.se/0.1/matchups/{}/markets/related/straight"
+    r2 = SESSION.get(straight_tpl.format(matchup_id), headers=HEADERS, timeout=10)
+    r2.raise_for_status()
+    markets = r2.json()
+    straight_markets[matchup_id] = markets
+    # find period 0 moneyline
+    with metrics.parse_timer("pinnacle", "moneyline"), profiling.stage("pinnacle", "moneyline"):
+        for entry in markets:
+            if entry.get("type") == "moneyline" and entry.get("period") == 0:
+                prices = entry.get("prices", [])
+                home_price = next((p["price"] for p in prices if p.get("designation") == "home"), None)
+                away_price = next((p["price"] for p in prices if p.get("designation") == "away"), None)
+                return home_price, away_price
+    return None
+
+def fetch_moneylines(matchup_ids):
+    """Yield (matchup_id, moneyline, error) as each matchup's moneyline lands.
+
+    Requests run concurrently; Pinnacle's adaptive concurrency controller
+    decides how many are in flight at once.
+    """
+    matchup_ids = list(matchup_ids)
+    if not matchup_ids:
+        return
+    with ThreadPoolExecutor(max_workers=min(len(matchup_ids), pool_size(PINNACLE_HOST))) as pool:
+        futures = {pool.submit(fetch_moneyline, mid): mid for mid in matchup_ids}
         try:
-            related = resp.json()
-        except ValueError:
-            # Dump response for debugging
-            error_msg = (
-                f"Failed to decode JSON from {list_url}\n"
-                f"Status code: {resp.status_code}\n"
-                f"Response body:\n{resp.text[:500]!r}"
-            )
-            raise RuntimeError(error_msg)
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except requests.exceptions.RequestException as e:
+                    yield futures[future], None, e
+        finally:
+            for future in futures:
+                future.cancel()
+
+def scrape_pinnacle_esports() -> list[MatchOdds]:
+    # Fetch all esports matchups for the Esports league (ID 12)
+    related = cached_matchups(12)
 
     # Build matchupId -> (home_name, away_name)
     mapping = {}
-    for item in related:
-        mid = item.get("id") or item.get("matchupId")
-        participants = item.get("participants", [])
-        home = next((p.get("name") for p in participants if p.get("alignment") == "home"), None)
-        away = next((p.get("name") for p in participants if p.get("alignment") == "away"), None)
-        if home is None and len(participants) > 0:
-            home = participants[0].get("name")
-        if away is None and len(participants) > 1:
-            away = participants[1].get("name")
-        if home and away:
-            mapping[mid] = (home, away)
+    with metrics.parse_timer("pinnacle", "matchups"), profiling.stage("pinnacle", "matchups"):
+        for item in related:
+            mid = item.get("id") or item.get("matchupId")
+            teams = matchup_teams(item)
+            if teams:
+                mapping[mid] = teams
 
     # 2. Fetch straight odds for each matchup and merge
-    straight_tpl = "https://guest.api.arcadia.pinnacle.se/0.1/matchups/{}/markets/related/straight"
-    results = []
+    moneylines = {}
+    for mid, moneyline, error in fetch_moneylines(mapping):
+        if error is not None:
+            print(f"Error fetching markets for matchup {mid}: {error}", file=sys.stderr)
+        moneylines[mid] = moneyline
 
+    results = []
     for mid, (home, away) in mapping.items():
-        url2 = straight_tpl.format(mid)
-        r2 = requests.get(url2, headers=HEADERS, timeout=10)
-        r2.raise_for_status()
-        odds_data = r2.json()
-        # find period 0 moneyline
-        for entry in odds_data:
-            if entry.get("type") == "moneyline" and entry.get("period") == 0:
-                prices = entry.get("prices", [])
-                home_price = next((p["price"] for p in prices if p.get("designation") == "home"), None)
-                away_price = next((p["price"] for p in prices if p.get("designation") == "away"), None)
-                results.append(MatchOdds(
-                    teams=f"{home} vs {away}",
-                    odds=[home_price, away_price],
-                    scraped_at=datetime.now(timezone.utc)
-                ))
-                break
+        moneyline = moneylines.get(mid)
+        if moneyline:
+            results.append(MatchOdds(
+                teams=f"{home} vs {away}",
+                odds=list(moneyline),
+                scraped_at=datetime.now(timezone.utc)
+            ))
 
+    metrics.count_records("pinnacle", "match_odds", len(results))
     return results
 
+# Each record waits on its own moneyline request, so only count them
+@metrics.produces("pinnacle", "match_odds", timed=False)
+def iter_match_odds(league_id=12):
+    """Yield MatchOdds-shaped records, one per matchup as soon as its moneyline is fetched"""
+    items = {}
+    for item in cached_matchups(league_id):
+        mid = item.get("id") or item.get("matchupId")
+        teams = matchup_teams(item)
+        if mid and teams:
+            items[mid] = (item, teams)
+
+    for mid in set(straight_markets) - set(items):
+        del straight_markets[mid]
+
+    for mid, moneyline, error in fetch_moneylines(items):
+        if error is not None:
+            print(f"Error fetching markets for matchup {mid}: {error}", file=sys.stderr)
+            straight_markets.pop(mid, None)
+            continue
+        if not moneyline or None in moneyline:
+            continue
+        item, teams = items[mid]
+        record = match_odds_record(
+            "pinnacle", mid, (item.get("league") or {}).get("name"), item.get("startTime"),
+            teams, [american_to_decimal(price) for price in moneyline]
+        )
+        if record:
+            yield record
+
 def format_price(price):
     """Convert American odds to decimal odds"""
     if price > 0:
@@ -127,7 +235,7 @@ def get_all_leagues(headers):
     """Fetch all available leagues from Pinnacle API"""
     url = 'https://guest.api.arcadia.pinnacle.se/0.1/leagues'
     try:
-        response = requests.get(url, headers=headers)
+        response = SESSION.get(url, headers=headers)
         response.raise_for_status()
         return response.json()
     except:
@@ -152,7 +260,7 @@ def get_cs_leagues(headers):
     for league_id in known_league_ids:
         url = f'https://guest.api.arcadia.pinnacle.se/0.1/leagues/{league_id}'
         try:
-            response = requests.get(url, headers=headers)
+            response = SESSION.get(url, headers=headers)
             response.raise_for_status()
             league_data = response.json()
             if league_data:
@@ -162,6 +270,66 @@ def get_cs_leagues(headers):
     
     return leagues
 
+PINNACLE_MARKET_TYPES = {"moneyline": MATCH_WINNER, "spread": HANDICAP, "total": TOTAL}
+
+def emit_markets(table, matchup_id, markets):
+    """Add every price of a matchup's straight markets to a MarketTable"""
+    for market in markets:
+        market_type = PINNACLE_MARKET_TYPES.get(market.get("type"), market.get("type") or "other")
+        period = int(market.get("period") or 0)
+        for price in market.get("prices", []):
+            if price.get("price") is None:
+                continue
+            side = price.get("designation") or "other"
+            table.append("pinnacle", matchup_id, market_type, period,
+                         home_side_line(market_type, side, price.get("points")),
+                         side, american_to_decimal(price["price"]))
+
+def emit_board_markets(table):
+    """Add the straight markets of every matchup listed by the last ``iter_match_odds`` to a MarketTable"""
+    for matchup_id, markets in list(straight_markets.items()):
+        emit_markets(table, matchup_id, markets)
+
+def group_markets(markets):
+    """Group straight markets into {matchupId: {period: [markets]}} in one pass"""
+    grouped = {}
+    for market in markets:
+        grouped.setdefault(market.get('matchupId'), {}).setdefault(market.get('period'), []).append(market)
+    return grouped
+
+def format_period_markets(period, period_markets, home_team, away_team):
+    """Display lines for one period: moneylines first, then spreads, then totals"""
+    period_name = get_period_name(period)
+    lines = [f"\n{period_name} Markets:", "-" * 30]
+    
+    for ml in (m for m in period_markets if m['type'] == 'moneyline'):
+        home_odds = format_price(ml['prices'][0]['price'])
+        away_odds = format_price(ml['prices'][1]['price'])
+        lines += [f"{period_name} Winner", f"  {home_team}: {home_odds}", f"  {away_team}: {away_odds}"]
+    
+    for spread in (m for m in period_markets if m['type'] == 'spread'):
+        for price in spread['prices']:
+            team = home_team if price['designation'] == 'home' else away_team
+            points = price['points']
+            odds = format_price(price['price'])
+            sign = '+' if points > 0 else ''
+            if period == '0':
+                lines.append(f"{team} {sign}{points} ({odds})")
+            else:
+                lines.append(f"{period_name} - {team} {sign}{points} ({odds})")
+    
+    for total in (m for m in period_markets if m['type'] == 'total'):
+        points = total['prices'][0]['points']
+        over_odds = format_price(total['prices'][0]['price'])
+        under_odds = format_price(total['prices'][1]['price'])
+        if period == '0':
+            lines.append(f"Total Maps {points} (Over {over_odds}/Under {under_odds})")
+        else:
+            lines.append(f"{period_name} - Total Rounds {points} (Over {over_odds}/Under {under_odds})")
+    
+    lines.append("-" * 30)
+    return lines
+
 def main():
     headers = {
         'sec-ch-ua-platform': 'macOS',
@@ -179,25 +347,19 @@ def main():
         # Get all CS:GO matches from the sports endpoint
         url = 'https://guest.api.arcadia.pinnacle.se/0.1/sports/12/markets/straight?primaryOnly=false&withSpecials=false'
         print(f"\nFetching all CS:GO matches...")
-        response = requests.get(url, headers=headers)
+        response = SESSION.get(url, headers=headers)
         response.raise_for_status()
         data = response.json()
         
-        # Group markets by matchupId
-        markets_by_matchup = {}
-        for market in data:
-            matchup_id = market.get('matchupId')
-            if matchup_id not in markets_by_matchup:
-                markets_by_matchup[matchup_id] = []
-            markets_by_matchup[matchup_id].append(market)
+        markets_by_matchup = group_markets(data)
         
         print(f"Found {len(markets_by_matchup)} matches")
         
         # Process each matchup
-        for matchup_id, markets in markets_by_matchup.items():
+        for matchup_id, markets_by_period in markets_by_matchup.items():
             # Get matchup details
             matchup_url = f'https://guest.api.arcadia.pinnacle.se/0.1/matchups/{matchup_id}'
-            matchup_response = requests.get(matchup_url, headers=headers)
+            matchup_response = SESSION.get(matchup_url, headers=headers)
             matchup_data = matchup_response.json()
             
             # Get team names
@@ -218,54 +380,9 @@ def main():
             print(f"\nEvent: {home_team} vs {away_team}")
             print("-" * 50)
             
-            # Group markets by period
-            markets_by_period = {}
-            for market in markets:
-                period = market.get('period')
-                if period not in markets_by_period:
-                    markets_by_period[period] = []
-                markets_by_period[period].append(market)
-            
             # Print markets for each period
             for period, period_markets in sorted(markets_by_period.items()):
-                period_name = get_period_name(period)
-                print(f"\n{period_name} Markets:")
-                print("-" * 30)
-                
-                # Print moneyline first
-                moneylines = [m for m in period_markets if m['type'] == 'moneyline']
-                for ml in moneylines:
-                    home_odds = format_price(ml['prices'][0]['price'])
-                    away_odds = format_price(ml['prices'][1]['price'])
-                    print(f"{period_name} Winner")
-                    print(f"  {home_team}: {home_odds}")
-                    print(f"  {away_team}: {away_odds}")
-                
-                # Print spreads
-                spreads = [m for m in period_markets if m['type'] == 'spread']
-                for spread in spreads:
-                    for price in spread['prices']:
-                        team = home_team if price['designation'] == 'home' else away_team
-                        points = price['points']
-                        odds = format_price(price['price'])
-                        sign = '+' if points > 0 else ''
-                        if period == '0':
-                            print(f"{team} {sign}{points} ({odds})")
-                        else:
-                            print(f"{period_name} - {team} {sign}{points} ({odds})")
-                
-                # Print totals
-                totals = [m for m in period_markets if m['type'] == 'total']
-                for total in totals:
-                    points = total['prices'][0]['points']
-                    over_odds = format_price(total['prices'][0]['price'])
-                    under_odds = format_price(total['prices'][1]['price'])
-                    if period == '0':
-                        print(f"Total Maps {points} (Over {over_odds}/Under {under_odds})")
-                    else:
-                        print(f"{period_name} - Total Rounds {points} (Over {over_odds}/Under {under_odds})")
-                
-                print("-" * 30)
+                print("\n".join(format_period_markets(period, period_markets, home_team, away_team)))
         
     except requests.exceptions.RequestException as e:
         print(f"Error making request: {e}")
@@ -0,0 +1,338 @@
+import cProfile
+import io
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+CPROFILE, SAMPLE = "cprofile", "sample"
+
+_settings = {
+    "mode": os.getenv("PROFILE_MODE", CPROFILE),
+    "directory": os.getenv("PROFILE_DIR", "profiles"),
+    "tracemalloc": os.getenv("PROFILE_TRACEMALLOC", "1") != "0",
+    "top": int(os.getenv("PROFILE_TOP", "30")),
+    "interval": float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005")),
+}
+# (generation, cycles): every source profiles its next ``cycles`` cycles once
+# per generation. Replaced wholesale, so the signal handler needs no lock.
+_plan = (0, 0)
+_claims: Dict[str, tuple] = {}
+_cycle_ids: Counter = Counter()
+_lock = threading.Lock()
+_local = threading.local()
+# source -> profile of the cycle currently running for it, so parse stages in
+# worker threads can attach to it
+_active: Dict[str, "CycleProfile"] = {}
+_tracing = 0
+# The sampler sees every thread, so there is one per process, shared by the
+# cycles profiled while it runs rather than one per source
+_sampler: Optional["Sampler"] = None
+_sampler_users = 0
+_sampler_runs = 0
+
+
+def arm(cycles: int):
+    """Profile the next ``cycles`` cycles of every source"""
+    global _plan
+    _plan = (_plan[0] + 1, cycles)
+
+
+def _claim(source: str) -> bool:
+    generation, cycles = _plan
+    with _lock:
+        claimed_generation, used = _claims.get(source, (generation, 0))
+        if claimed_generation != generation:
+            used = 0
+        if used >= cycles:
+            return False
+        _claims[source] = (generation, used + 1)
+        return True
+
+
+def _book(source: str) -> str:
+    # Scheduler tasks such as "stake-live" share the scraper's stage name
+    return source.split("-", 1)[0]
+
+
+class Sampler:
+    """Wall-clock sampling profiler: a daemon thread snapshots every thread's
+    stack each ``interval`` seconds and counts them as folded stacks, which
+    flamegraph.pl and speedscope read directly. Unlike cProfile it sees worker
+    threads and costs the same whether the code is hot or not.
+
+    Since it sees the whole process, cycles share one sampler through
+    ``_acquire_sampler`` and its file is named after the process, not a source."""
+
+    def __init__(self, interval: float, path: str):
+        self.interval = interval
+        self.path = path
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self):
+        with open(self.path, "w") as out:
+            for stack, count in self.stacks.most_common():
+                out.write(f"{stack} {count}\n")
+
+
+def _acquire_sampler() -> Sampler:
+    """The process-wide sampler, started by the first cycle that needs it"""
+    global _sampler, _sampler_users, _sampler_runs
+    with _lock:
+        if _sampler is None:
+            _sampler_runs += 1
+            stamp = time.strftime("%Y%m%dT%H%M%S")
+            os.makedirs(_settings["directory"], exist_ok=True)
+            path = os.path.join(_settings["directory"],
+                                f"process{os.getpid()}-sample{_sampler_runs:04d}-{stamp}.folded")
+            _sampler = Sampler(_settings["interval"], path)
+            _sampler.start()
+        _sampler_users += 1
+        return _sampler
+
+
+def _release_sampler(sampler: Sampler):
+    """Stop and write the sampler once the last cycle using it is done"""
+    global _sampler, _sampler_users
+    with _lock:
+        _sampler_users -= 1
+        if _sampler_users:
+            return
+        _sampler = None
+    sampler.stop()
+    try:
+        sampler.dump()
+        print(f"Samples written to {sampler.path}", file=sys.stderr)
+    except OSError as e:
+        print(f"Could not write samples to {sampler.path}: {e}", file=sys.stderr)
+
+
+class CycleProfile:
+    """Everything captured for one profiled cycle; written out by ``finish``"""
+
+    def __init__(self, source: str, cycle_id: int):
+        self.source = source
+        self.cycle_id = cycle_id
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.profile: Optional[cProfile.Profile] = None
+        self.sampler: Optional[Sampler] = None
+        self.samples = 0
+        self.stage_profiles: List[cProfile.Profile] = []
+        self.memory_before: Optional[tracemalloc.Snapshot] = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        global _tracing
+        if _settings["tracemalloc"]:
+            with _lock:
+                if _tracing == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start(10)
+                _tracing += 1
+            self.memory_before = tracemalloc.take_snapshot()
+
+        if _settings["mode"] == SAMPLE:
+            self.sampler = _acquire_sampler()
+            self.samples = self.sampler.samples
+        elif not getattr(_local, "profiling", False):
+            self.profile = cProfile.Profile()
+            _local.profiling = True
+            self.profile.enable()
+
+    def stop(self):
+        if self.profile is not None:
+            self.profile.disable()
+            _local.profiling = False
+        if self.sampler is not None:
+            self.samples = self.sampler.samples - self.samples
+            _release_sampler(self.sampler)
+
+    def add_stage(self, profile: cProfile.Profile):
+        with self.lock:
+            self.stage_profiles.append(profile)
+
+    def finish(self, error: Optional[BaseException] = None) -> str:
+        """Write the profile and allocation report; returns the path prefix used"""
+        global _tracing
+        elapsed = time.perf_counter() - self.started
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.localtime(self.started_at))
+        os.makedirs(_settings["directory"], exist_ok=True)
+        prefix = os.path.join(_settings["directory"], f"{self.source}-cycle{self.cycle_id:06d}-{stamp}")
+
+        report = io.StringIO()
+        report.write(f"{self.source} cycle {self.cycle_id} at {stamp}: {elapsed:.3f}s"
+                     f"{f' (failed: {error!r})' if error else ''}\n\n")
+
+        profiles = ([self.profile] if self.profile is not None else []) + self.stage_profiles
+        if profiles:
+            stats = pstats.Stats(*profiles, stream=report)
+            stats.dump_stats(prefix + ".prof")
+            stats.sort_stats("cumulative").print_stats(_settings["top"])
+        if self.sampler is not None:
+            # Stacks are rooted at their thread's name, which tells sources apart
+            report.write(f"{self.samples} samples every {self.sampler.interval * 1000:.1f}ms of every thread "
+                         f"in {self.sampler.path}, written once no profiled cycle is left running\n")
+
+        if self.memory_before is not None:
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            report.write(f"\nTop allocations still live at the end of the cycle "
+                         f"(process-wide, traced peak {peak / 1024:,.0f} KiB):\n")
+            for stat in after.compare_to(self.memory_before, "lineno")[:_settings["top"]]:
+                report.write(f"{stat}\n")
+            with _lock:
+                _tracing -= 1
+                if _tracing == 0:
+                    tracemalloc.stop()
+
+        with open(prefix + ".txt", "w") as out:
+            out.write(report.getvalue())
+        return prefix
+
+
+class _NoopContext:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP = _NoopContext()
+
+
+class _Cycle:
+    def __init__(self, source: str):
+        self.source = source
+        self.profile: Optional[CycleProfile] = None
+
+    def __enter__(self):
+        with _lock:
+            _cycle_ids[self.source] += 1
+            cycle_id = _cycle_ids[self.source]
+        if _claim(self.source):
+            self.profile = CycleProfile(self.source, cycle_id)
+            _active[self.source] = self.profile
+            self.profile.start()
+            print(f"[{self.source}] profiling cycle {cycle_id} into {_settings['directory']}/", file=sys.stderr)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.profile is not None:
+            self.profile.stop()
+            if _active.get(self.source) is self.profile:
+                del _active[self.source]
+            try:
+                prefix = self.profile.finish(exc)
+                print(f"[{self.source}] profile written to {prefix}.txt", file=sys.stderr)
+            except Exception as e:
+                print(f"[{self.source}] could not write profile: {e}", file=sys.stderr)
+        return False
+
+
+def cycle(source: str):
+    """Context manager around one scrape cycle; profiles it when armed"""
+    return _Cycle(source)
+
+
+class _Stage:
+    def __init__(self, target: CycleProfile):
+        self.target = target
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        _local.profiling = True
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        _local.profiling = False
+        self.target.add_stage(self.profile)
+        return False
+
+
+def stage(source: str, name: str):
+    """Context manager around a parse stage.
+
+    Stages that run on the cycle's own thread are already in its profile;
+    this covers the ones on worker threads (Thunderpick's fetch pool), which
+    get their own cProfile merged into the cycle's report.
+
+    ``source`` is a scheduler task name or the scraper's book name. A book
+    with several tasks profiled at once (stake-live and stake-upcoming) can't
+    tell which cycle a worker thread belongs to, so its stages are skipped
+    rather than credited to the wrong report.
+    """
+    target = _active.get(source)
+    if target is None:
+        candidates = [profile for name, profile in list(_active.items()) if _book(name) == source]
+        target = candidates[0] if len(candidates) == 1 else None
+    if target is None or target.profile is None or getattr(_local, "profiling", False):
+        return _NOOP
+    return _Stage(target)
+
+
+def profile_call(source: str, func: Callable[[], Any]) -> Any:
+    with cycle(source):
+        return func()
+
+
+async def profile_async(source: str, func: Callable[[], Awaitable[Any]]) -> Any:
+    # cProfile follows the thread, so awaits also catch whatever else the loop runs meanwhile
+    with cycle(source):
+        return await func()
+
+
+def install_signal_handler(signum: int = getattr(signal, "SIGUSR1", 0)):
+    """``kill -USR1 <pid>`` profiles the next PROFILE_CYCLES (default 3) cycles of every source"""
+    if not signum:
+        return
+    cycles = int(os.getenv("PROFILE_CYCLES") or 3)
+
+    # Nothing but arm() here: the handler can interrupt a print or a held lock.
+    # Each profiled cycle announces itself when it starts.
+    def handle(_signum, _frame):
+        arm(cycles)
+
+    signal.signal(signum, handle)
+
+
+def arm_from_env():
+    """PROFILE_CYCLES=N profiles the first N cycles of every source from startup"""
+    cycles = int(os.getenv("PROFILE_CYCLES") or 0)
+    if cycles:
+        arm(cycles)
@@ -0,0 +1,225 @@
+import asyncio
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+# Throttling statuses: the host wants us to slow down, not to give up
+THROTTLE_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, bursting up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if capacity is not None and capacity <= 0:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        # Total seconds of pause ever added: waiters compare it before and
+        # after sleeping to learn they were pushed back
+        self.paused = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        # ``updated`` sits in the future while the bucket is paused
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take ``tokens`` now, going into debt if the bucket is short; returns the
+        seconds the caller must wait before using them.
+
+        Waiters are spaced out in the order they reserved, and the bucket never
+        has to be polled, so async callers can sleep on the result too.
+        """
+        return self._reserve(tokens)[0]
+
+    def _reserve(self, tokens: float) -> Tuple[float, float]:
+        if tokens > self.capacity:
+            raise ValueError(f"cannot take {tokens} tokens from a bucket of {self.capacity}")
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= tokens
+            return max(self.updated, now) - now + max(0.0, -self.tokens / self.rate), self.paused
+
+    def pushed_back(self, mark: float) -> Tuple[float, float]:
+        """Extra seconds to wait for pauses added since ``mark``, and the new mark.
+
+        A reservation's wait is fixed when it is made, so a waiter already
+        asleep when the host throttles us keeps its place in line but moves
+        back by however long the pause is.
+        """
+        with self.lock:
+            return self.paused - mark, self.paused
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available, then take them; returns the time waited"""
+        wait, mark = self._reserve(tokens)
+        waited = 0.0
+        while wait > 0:
+            time.sleep(wait)
+            waited += wait
+            wait, mark = self.pushed_back(mark)
+        return waited
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        wait, mark = self._reserve(tokens)
+        waited = 0.0
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            wait, mark = self.pushed_back(mark)
+        return waited
+
+    def pause(self, seconds: float):
+        """Hand out nothing for ``seconds``, then refill from empty.
+
+        Reservations already handed out are pushed back by the pause too.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now + seconds > self.updated:
+                self.tokens = min(self.tokens, 0.0)
+                self.paused += now + seconds - max(self.updated, now)
+                self.updated = now + seconds
+
+    def set_rate(self, rate: float):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given as seconds or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostLimiter:
+    """Request budget for one upstream host, shared by every thread that talks to it.
+
+    A throttling response (429 or 503) pauses the whole host for its
+    Retry-After, or for an exponential backoff when there is none, and halves
+    the rate down to ``min_rate``. Every later success wins back a tenth of the
+    configured rate, so a host that recovers is back at full speed after ten
+    good responses.
+    """
+
+    def __init__(self, host: str, rate: float, capacity: Optional[float] = None,
+                 max_backoff: float = 60.0):
+        self.host = host
+        self.base_rate = rate
+        self.min_rate = rate / 10
+        self.max_backoff = max_backoff
+        self.bucket = TokenBucket(rate, capacity)
+        self.throttled = 0
+        self.consecutive_throttles = 0
+        self.lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def configure(self, rate: float, capacity: Optional[float] = None):
+        with self.lock:
+            self.base_rate = rate
+            self.min_rate = rate / 10
+            self.bucket.capacity = capacity if capacity is not None else rate
+            self.bucket.set_rate(rate)
+
+    def acquire(self) -> float:
+        """Block until this host's budget allows one more request; returns the time waited"""
+        return self.bucket.acquire()
+
+    async def acquire_async(self) -> float:
+        return await self.bucket.acquire_async()
+
+    def feedback(self, status: int, retry_after: Optional[float] = None) -> float:
+        """Adjust to a response status; returns the pause applied, 0 if none"""
+        with self.lock:
+            if status in THROTTLE_STATUSES:
+                self.throttled += 1
+                self.consecutive_throttles += 1
+                if retry_after is None:
+                    retry_after = 2.0 ** (self.consecutive_throttles - 1)
+                # A Retry-After of a day would stall every scraper on this host
+                retry_after = min(self.max_backoff, retry_after)
+                self.bucket.pause(retry_after)
+                self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+                return retry_after
+
+            self.consecutive_throttles = 0
+            if self.bucket.rate < self.base_rate:
+                self.bucket.set_rate(min(self.base_rate, self.bucket.rate + self.base_rate / 10))
+            return 0.0
+
+
+DEFAULT_RATE = float(os.getenv("RATE_LIMIT_DEFAULT", "10"))
+# Requests per second we allow ourselves per host; RATE_LIMITS overrides them
+# as "host=rate[/burst],..."
+HOST_RATES: Dict[str, float] = {
+    "thunderpick.io": 5.0,
+    "guest.api.arcadia.pinnacle.se": 5.0,
+    "eu1.offering-api.kambicdn.com": 20.0,
+    "www.betmgm.se": 5.0,
+    "api.stake.com": 2.0,
+    "api.gg.bet": 2.0,
+}
+
+_limiters: Dict[str, HostLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _env_rates() -> Dict[str, tuple]:
+    rates = {}
+    for entry in filter(None, (part.strip() for part in os.getenv("RATE_LIMITS", "").split(","))):
+        host, _, spec = entry.partition("=")
+        rate, _, burst = spec.partition("/")
+        rate, burst = float(rate), float(burst) if burst else None
+        if rate <= 0 or (burst is not None and burst <= 0):
+            raise ValueError(f"RATE_LIMITS entry {entry!r}: rate and burst must be positive")
+        rates[host.strip().lower()] = (rate, burst)
+    return rates
+
+
+_overrides = _env_rates()
+
+
+def limiter_for(host: Optional[str]) -> HostLimiter:
+    """The process-wide limiter for ``host``, created on first use"""
+    host = (host or "").lower()
+    limiter = _limiters.get(host)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(host)
+            if limiter is None:
+                rate, burst = _overrides.get(host, (HOST_RATES.get(host, DEFAULT_RATE), None))
+                limiter = _limiters[host] = HostLimiter(host, rate, burst)
+    return limiter
+
+
+def configure_host(host: str, rate: float, capacity: Optional[float] = None) -> HostLimiter:
+    """Set the budget for ``host``, including for limiters already handed out"""
+    limiter = limiter_for(host)
+    limiter.configure(rate, capacity)
+    return limiter
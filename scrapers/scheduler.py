@@ -0,0 +1,323 @@
+import asyncio
+import functools
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import betmgm
+import pinnacle
+import metrics
+import profiling
+from arbitrage import ArbDetector
+from board import OddsBoard, SignalDiff
+from change_detection import ChangeSet
+from checkpoint import Checkpointer
+from event_matching import EventMatcher
+from ggbet import GGBetScraper
+from markets import HANDICAP, MATCH_WINNER, TOTAL, MarketTable, swap_sides
+from stake import StakeScraper
+from thunderpick import RefreshResult, ThunderpickScraper
+
+
+@dataclass
+class SourceTask:
+    """One bookmaker cycle run on a fixed cadence.
+
+    ``cycle`` is either a blocking callable, which runs in the scheduler's
+    thread pool, or a coroutine function. ``jitter`` is the maximum number of
+    seconds added to or removed from each interval and ``timeout`` is the
+    budget for a single cycle. The scrapers return None when a fetch failed,
+    so a None result counts as a failure, not a run. ``records`` turns a
+    result into the MatchOdds records of the source's complete board and
+    ``markets`` adds every market of that board to a MarketTable.
+    """
+    name: str
+    cycle: Callable[[], Any]
+    interval: float
+    jitter: float = 0.0
+    timeout: float = 30.0
+    records: Optional[Callable[[Any], Iterable[Dict]]] = field(default=None, repr=False)
+    markets: Optional[Callable[[Any, MarketTable], None]] = field(default=None, repr=False)
+    runs: int = 0
+    skipped: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    last_duration: Optional[float] = None
+    running: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    @property
+    def is_async(self) -> bool:
+        return asyncio.iscoroutinefunction(self.cycle)
+
+
+ResultCallback = Callable[[SourceTask, Any], Optional[Awaitable[None]]]
+
+
+class ScrapeScheduler:
+    """Runs every source on its own cadence inside one asyncio loop.
+
+    A tick that arrives while the previous cycle of the same source is still
+    running is skipped rather than stacked. That includes blocking cycles
+    that blew their timeout: the thread cannot be interrupted, so the source
+    stays busy until it actually returns.
+    """
+
+    def __init__(self, sources: List[SourceTask], max_workers: int = 8,
+                 on_result: Optional[ResultCallback] = None):
+        self.sources = sources
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scrape")
+        self.on_result = on_result or print_result
+        self._stopping = asyncio.Event()
+        self._cycles = set()
+
+    def _next_delay(self, source: SourceTask) -> float:
+        return max(0.0, source.interval + random.uniform(-source.jitter, source.jitter))
+
+    def _start_cycle(self, source: SourceTask) -> asyncio.Future:
+        if source.is_async:
+            return asyncio.ensure_future(profiling.profile_async(source.name, source.cycle))
+        return asyncio.get_running_loop().run_in_executor(self.executor, profiling.profile_call,
+                                                          source.name, source.cycle)
+
+    async def _run_cycle(self, source: SourceTask, running: asyncio.Future):
+        started = time.perf_counter()
+        try:
+            # Shield blocking cycles so a timeout doesn't mark them done while the thread still runs
+            awaitable = running if source.is_async else asyncio.shield(running)
+            result = await asyncio.wait_for(awaitable, source.timeout)
+        except asyncio.TimeoutError:
+            source.timeouts += 1
+            print(f"[{source.name}] cycle exceeded {source.timeout:.1f}s budget")
+            return
+        except Exception as e:
+            source.failures += 1
+            print(f"[{source.name}] cycle failed: {e}")
+            return
+        finally:
+            source.last_duration = time.perf_counter() - started
+
+        if result is None:
+            source.failures += 1
+            print(f"[{source.name}] cycle returned no data")
+            return
+
+        source.runs += 1
+        outcome = self.on_result(source, result)
+        if asyncio.iscoroutine(outcome):
+            await outcome
+
+    async def _run_source(self, source: SourceTask):
+        # Spread the first cycles out so sources don't all fire on the same tick
+        await asyncio.sleep(random.uniform(0, source.jitter))
+        while not self._stopping.is_set():
+            if source.running is not None and not source.running.done():
+                source.skipped += 1
+                print(f"[{source.name}] previous cycle still running, skipping")
+            else:
+                source.running = self._start_cycle(source)
+                cycle = asyncio.ensure_future(self._run_cycle(source, source.running))
+                self._cycles.add(cycle)
+                cycle.add_done_callback(self._cycles.discard)
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self._next_delay(source))
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self):
+        """Run until ``stop`` is called"""
+        try:
+            await asyncio.gather(*(self._run_source(source) for source in self.sources))
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stop(self):
+        self._stopping.set()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            source.name: {
+                "runs": source.runs,
+                "skipped": source.skipped,
+                "failures": source.failures,
+                "timeouts": source.timeouts,
+                "last_duration": source.last_duration,
+            }
+            for source in self.sources
+        }
+
+
+# Cross-book ids for everything running in this process; its canonicalizer
+# learns team names as books report them
+MATCHER = EventMatcher()
+
+
+# Market types whose outcome sets are known, so they can be summed for surebets
+ARB_MARKET_TYPES = {MATCH_WINNER, HANDICAP, TOTAL}
+
+
+class CrossBookFeed:
+    """Feeds every source's records into one OddsBoard and publishes its signal diff.
+
+    The board groups records by their cross-book event id from its matcher.
+    Each cycle lists its source's complete board, so records a source stops
+    listing are removed, and a cross-book event goes once no book has it.
+    Only fixtures whose prices moved get their edges recomputed.
+
+    With ``arbs``, a source's full MarketTable is also fed to the detector,
+    keyed by (cross-book id, market type, period, line). Sides are turned to
+    the matcher's team order, since books disagree on who is home. Only
+    events that also have a match winner record get a cross-book id.
+    """
+
+    def __init__(self, board: OddsBoard, arbs: Optional[ArbDetector] = None):
+        self.board = board
+        self.arbs = arbs
+        # source name -> (market, outcome, book) it priced in its last cycle
+        self.priced: Dict[str, Set[Tuple[Hashable, str, str]]] = {}
+        self.lock = threading.Lock()
+
+    def consume(self, source: SourceTask, result: Any) -> SignalDiff:
+        if source.records is None:
+            return SignalDiff()
+        records = list(source.records(result))
+        with self.lock:
+            self.board.sync(source.name, records)
+            if self.arbs is not None and source.markets is not None:
+                table = MarketTable()
+                source.markets(result, table)
+                self._update_arbs(source.name, self.market_prices(table, records))
+            return self.board.publish()
+
+    def market_prices(self, table: MarketTable, records: Iterable[Dict]):
+        """Yield (market, outcome, book, odds) for the table rows of matched events"""
+        matcher = self.board.matcher
+        records = {record["id"]: record for record in records}
+        for book, key, outcome, odds in table.rows():
+            if key.market_type not in ARB_MARKET_TYPES:
+                continue
+            record = records.get(f"{book}-{key.event}")
+            cross_id = matcher.members.get((book, record["id"])) if record else None
+            event = matcher.events.get(cross_id)
+            if event is None:
+                continue
+            line = key.line
+            if self.board.canonicalizer.resolve(record["teams"][0]) != event.teams[0]:
+                outcome, line = swap_sides(key.market_type, outcome, line)
+            yield (cross_id, key.market_type, key.period, line), outcome, book, odds
+
+    def _update_arbs(self, scope: str, prices):
+        prices = list(prices)
+        outcomes: Dict[Hashable, Set[str]] = {}
+        for market, outcome, _, _ in prices:
+            outcomes.setdefault(market, set()).add(outcome)
+        for market, seen in outcomes.items():
+            declared = self.arbs.declared.get(market, frozenset()) | seen
+            if len(declared) >= 2:
+                self.arbs.declare(market, declared)
+
+        priced = set()
+        for market, outcome, book, odds in prices:
+            priced.add((market, outcome, book))
+            self.arbs.update(market, outcome, book, odds)
+        for market, outcome, book in self.priced.get(scope, set()) - priced:
+            self.arbs.update(market, outcome, book, None)
+        self.priced[scope] = priced
+
+
+def describe_result(result: Any) -> str:
+    if isinstance(result, ChangeSet):
+        return (f"{len(result.added)} added, {len(result.changed)} changed, "
+                f"{len(result.removed)} removed, {result.unchanged} unchanged")
+    if isinstance(result, RefreshResult):
+        return (f"{len(result.matches)} matches, {len(result.changed)} changed, "
+                f"{len(result.removed)} removed, {len(result.errors)} errors")
+    if hasattr(result, "__len__"):
+        return f"{len(result)} records"
+    return type(result).__name__
+
+
+def print_result(source: SourceTask, result: Any):
+    print(f"[{source.name}] cycle {source.runs} done in {source.last_duration:.2f}s ({describe_result(result)})")
+
+
+def default_sources(checkpointer: Optional[Checkpointer] = None,
+                    matcher: Optional[EventMatcher] = None) -> List[SourceTask]:
+    """One task per bookmaker with the cadences we run in practice.
+
+    ``matcher`` (and the canonicalizer inside it) is checkpointed with the
+    scrapers, so cross-book ids survive a restart.
+    """
+    stake = StakeScraper()
+    thunderpick = ThunderpickScraper()
+    ggbet = GGBetScraper()
+    if checkpointer is not None:
+        for name, component in (("betmgm", betmgm), ("pinnacle", pinnacle), ("stake", stake),
+                                ("thunderpick", thunderpick), ("ggbet", ggbet)):
+            checkpointer.register(name, component)
+        if matcher is not None:
+            checkpointer.register("event_matching", matcher)
+
+    return [
+        SourceTask("betmgm", betmgm.get_esports_events, interval=30, jitter=3, timeout=25,
+                   records=betmgm.iter_match_odds,
+                   markets=lambda data, table: betmgm.emit_board_markets(table, data)),
+        SourceTask("pinnacle", lambda: list(pinnacle.iter_match_odds()), interval=15, jitter=2, timeout=60,
+                   records=iter, markets=lambda _, table: pinnacle.emit_board_markets(table)),
+        SourceTask("stake-live", functools.partial(stake.poll_changes, live=True),
+                   interval=10, jitter=1, timeout=10, records=lambda _: stake.board_odds(live=True),
+                   markets=lambda _, table: stake.emit_board_markets(table, live=True)),
+        SourceTask("stake-upcoming", functools.partial(stake.poll_changes, live=False),
+                   interval=60, jitter=5, timeout=20, records=lambda _: stake.board_odds(live=False),
+                   markets=lambda _, table: stake.emit_board_markets(table, live=False)),
+        SourceTask("thunderpick", thunderpick.refresh, interval=20, jitter=2, timeout=60,
+                   records=lambda result: thunderpick.iter_match_odds(result.matches),
+                   markets=lambda result, table: thunderpick.emit_board_markets(table, result)),
+        SourceTask("ggbet", functools.partial(ggbet.poll, window=4.0), interval=5, jitter=0.5, timeout=30,
+                   records=lambda _: ggbet.iter_match_odds(), markets=lambda _, table: ggbet.emit_markets(table)),
+    ]
+
+
+async def main():
+    metrics.start_from_env()
+    profiling.arm_from_env()
+    profiling.install_signal_handler()
+    checkpointer = Checkpointer(os.getenv("SCRAPER_CHECKPOINT", "scraper_state.ckpt"))
+    sources = default_sources(checkpointer, MATCHER)
+    restored = checkpointer.restore()
+    if restored:
+        print(f"Warm start from {checkpointer.path}: {', '.join(restored)}")
+
+    loop = asyncio.get_running_loop()
+    arbs = ArbDetector(on_open=lambda opportunity: print(
+        f"[arb] {opportunity.market} {opportunity.margin_percent:.2f}%: {opportunity.legs}"),
+        on_close=lambda market: print(f"[arb] closed {market}"))
+    feed = CrossBookFeed(OddsBoard(threshold_percent=float(os.getenv("ALERT_EDGE_THRESHOLD", "3")),
+                                   matcher=MATCHER), arbs)
+
+    async def on_result(source: SourceTask, result: Any):
+        print_result(source, result)
+        # Parsing, matching, edge compute, pickling and fsync all stay off the event loop
+        diff = await loop.run_in_executor(None, feed.consume, source, result)
+        print(f"[{source.name}] {len(MATCHER.events)} cross-book events, {diff.recomputed_groups} recomputed: "
+              f"{len(diff.added)} signals added, {len(diff.changed)} changed, {len(diff.removed)} removed, "
+              f"{len(arbs.active)} open arbs")
+        await loop.run_in_executor(None, checkpointer.maybe_save)
+
+    scheduler = ScrapeScheduler(sources, on_result=on_result)
+    try:
+        await scheduler.run()
+    finally:
+        checkpointer.save()
+        print(scheduler.stats())
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,347 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+MAGIC = b"ODDSNAP1"
+LAYOUT_VERSION = 2
+# magic, layout version, record size, capacity, used slots, generation,
+# created at (identifies one incarnation of the file), heartbeat (end of the
+# writer's last cycle; both epoch seconds)
+HEADER = struct.Struct("<8sIIIIQdd")
+HEADER_SIZE = 64
+# seq, status, odds, previous odds, updated at (epoch seconds)
+RECORD = struct.Struct("<IIddd")
+SEQ = struct.Struct("<I")
+STATUS_CODES = {"open": 0, "suspended": 1, "closed": 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+SnapshotKey = Tuple[str, str, str, str]
+
+
+def _ids_path(path: str) -> str:
+    return path + ".ids"
+
+
+def _events_path(path: str) -> str:
+    return path + ".events"
+
+
+class OddsSnapshot:
+    """Fixed-layout, memory-mapped table of the latest price per outcome.
+
+    Every (source, event, market, outcome) key gets a slot number, appended
+    to the ``<path>.ids`` NDJSON dictionary before the slot is published in
+    the header, so readers never see a slot they can't name. Each 32-byte
+    record carries a seqlock counter: the writer makes it odd, writes the
+    payload, then makes it even again, and readers retry any record whose
+    counter was odd or moved while they copied it.
+
+    Event metadata (league, start time) goes to the ``<path>.events`` NDJSON
+    log whenever it changes, and the header carries a heartbeat stamped at
+    the end of every ``write_many``, so readers can tell a live price from
+    one left behind by a writer that stopped. ``write_many`` closes the open
+    outcomes of the sources it covers that the cycle no longer lists.
+
+    A single writer process is assumed. Put the file on tmpfs (``/dev/shm``)
+    to keep it off disk entirely.
+    """
+
+    def __init__(self, path: str, capacity: int = 65536):
+        self.path = path
+        self.slots: Dict[SnapshotKey, int] = {}
+        self.keys: Dict[int, SnapshotKey] = {}
+        # Slots whose record is open: the ones a cycle can close
+        self.open: Set[int] = set()
+        self.events: Dict[Tuple[str, str], Tuple[Optional[str], Optional[str]]] = {}
+        size = HEADER_SIZE + capacity * RECORD.size
+
+        fresh = not os.path.exists(path) or os.path.getsize(path) != size
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fresh:
+            os.ftruncate(self.fd, 0)
+            os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, size)
+        self.capacity = capacity
+
+        magic, version, record_size, stored_capacity, used, *_ = HEADER.unpack_from(self.map, 0)
+        if fresh or (magic, version, record_size, stored_capacity) != (MAGIC, LAYOUT_VERSION, RECORD.size, capacity):
+            self.map[:] = bytes(size)
+            # A new created_at tells readers to drop every slot name they cached
+            HEADER.pack_into(self.map, 0, MAGIC, LAYOUT_VERSION, RECORD.size, capacity, 0, 0, time.time(), 0.0)
+            for sidecar in (_ids_path(path), _events_path(path)):
+                with open(sidecar, "w"):
+                    pass
+        else:
+            self._load_ids(used)
+            self._load_events()
+        self.ids = open(_ids_path(path), "a", encoding="utf-8")
+        self.event_log = open(_events_path(path), "a", encoding="utf-8")
+
+    def _load_ids(self, used: int):
+        with open(_ids_path(self.path), encoding="utf-8") as ids:
+            for line in ids:
+                if not line.endswith("\n"):
+                    break
+                slot, *key = json.loads(line)
+                if slot < used:
+                    self.slots[tuple(key)] = slot
+                    self.keys[slot] = tuple(key)
+                    if RECORD.unpack_from(self.map, HEADER_SIZE + slot * RECORD.size)[1] == STATUS_CODES["open"]:
+                        self.open.add(slot)
+
+    def _load_events(self):
+        if not os.path.exists(_events_path(self.path)):
+            return
+        with open(_events_path(self.path), encoding="utf-8") as log:
+            for line in log:
+                if line.endswith("\n"):
+                    source, event, league, start = json.loads(line)
+                    self.events[(source, event)] = (league, start)
+
+    @property
+    def used(self) -> int:
+        return HEADER.unpack_from(self.map, 0)[4]
+
+    def _bump_header(self, used: Optional[int] = None, heartbeat: Optional[float] = None, advance: bool = True):
+        _, _, _, _, stored_used, generation, created_at, stored_heartbeat = HEADER.unpack_from(self.map, 0)
+        HEADER.pack_into(self.map, 0, MAGIC, LAYOUT_VERSION, RECORD.size, self.capacity,
+                         stored_used if used is None else used, generation + advance, created_at,
+                         stored_heartbeat if heartbeat is None else heartbeat)
+
+    def slot(self, key: SnapshotKey) -> int:
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = len(self.slots)
+            if slot >= self.capacity:
+                raise OverflowError(f"snapshot {self.path} is full ({self.capacity} slots)")
+            self.ids.write(json.dumps([slot, *key]) + "\n")
+            self.ids.flush()
+            self.slots[key] = slot
+            self.keys[slot] = key
+            self._bump_header(used=slot + 1)
+        return slot
+
+    def write(self, source: str, event, market: str, outcome: str, odds: Optional[float],
+              status: str = "open", ts: Optional[float] = None) -> bool:
+        """Publish one price; returns False when it already matches the stored record"""
+        slot = self.slot((source, str(event), market, outcome))
+        offset = HEADER_SIZE + slot * RECORD.size
+        seq, old_status, old_odds, previous, _ = RECORD.unpack_from(self.map, offset)
+        odds = float("nan") if odds is None else float(odds)
+        code = STATUS_CODES.get(status, STATUS_CODES["open"])
+        unchanged = old_status == code and (old_odds == odds or (odds != odds and old_odds != old_odds))
+        if seq and unchanged:
+            return False
+        if code == STATUS_CODES["open"]:
+            self.open.add(slot)
+        else:
+            self.open.discard(slot)
+
+        SEQ.pack_into(self.map, offset, seq + 1)
+        RECORD.pack_into(self.map, offset, seq + 1, code, odds, old_odds if seq else odds,
+                         time.time() if ts is None else ts)
+        SEQ.pack_into(self.map, offset, seq + 2)
+        return True
+
+    def describe(self, source: str, event, league: Optional[str], start: Optional[str]) -> bool:
+        """Record an event's league and ISO start time; returns False when unchanged"""
+        key = (source, str(event))
+        if self.events.get(key) == (league, start):
+            return False
+        self.event_log.write(json.dumps([source, str(event), league, start]) + "\n")
+        self.event_log.flush()
+        self.events[key] = (league, start)
+        return True
+
+    def write_many(self, rows: Iterable[Tuple], ts: Optional[float] = None,
+                   sources: Optional[Iterable[str]] = None) -> int:
+        """Publish one cycle of (source, event, market, outcome, odds[, status]) rows.
+
+        Open outcomes of ``sources`` (by default every source with a row, so
+        a source that failed outright keeps its prices) that the rows leave
+        out are closed. Bumps the generation once and stamps the heartbeat.
+        """
+        ts = time.time() if ts is None else ts
+        covered = set(sources or ())
+        seen: Set[int] = set()
+        written = 0
+        for row in rows:
+            status = row[5] if len(row) > 5 else "open"
+            written += self.write(*row[:5], status=status, ts=ts)
+            seen.add(self.slots[(row[0], str(row[1]), row[2], row[3])])
+            if sources is None:
+                covered.add(row[0])
+
+        for slot in sorted(self.open - seen):
+            source, event, market, outcome = self.keys[slot]
+            if source in covered:
+                written += self.write(source, event, market, outcome, None, "closed", ts)
+        self._bump_header(heartbeat=ts, advance=written > 0)
+        return written
+
+    def close(self):
+        self.ids.close()
+        self.event_log.close()
+        self.map.flush()
+        self.map.close()
+        os.close(self.fd)
+
+
+class SnapshotReader:
+    """Read-only view of an OddsSnapshot file from another process.
+
+    The file is re-opened whenever its inode or creation stamp changes, so a
+    writer that recreated it is followed instead of read through a stale map.
+    """
+
+    def __init__(self, path: str, retry_seconds: float = 0.05):
+        self.path = path
+        # A writer preempted mid-record keeps it odd for a whole scheduler slice
+        self.retry_seconds = retry_seconds
+        self.file = None
+        self._open()
+
+    def _open(self):
+        if self.file is not None:
+            self.close()
+        self.file = open(self.path, "rb")
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, self.capacity, _, _, self.created_at, _ = HEADER.unpack_from(self.map, 0)
+        if (magic, version, record_size) != (MAGIC, LAYOUT_VERSION, RECORD.size):
+            raise ValueError(f"{self.path} is not an odds snapshot (layout {version})")
+        self.keys: List[SnapshotKey] = []
+        self.slots: Dict[SnapshotKey, int] = {}
+        self.events: Dict[Tuple[str, str], Tuple[Optional[str], Optional[str]]] = {}
+        self._ids_offset = 0
+        self._events_offset = 0
+
+    def _follow_writer(self):
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return
+        if inode != self.inode or HEADER.unpack_from(self.map, 0)[6] != self.created_at:
+            self._open()
+
+    @property
+    def generation(self) -> int:
+        return HEADER.unpack_from(self.map, 0)[5]
+
+    @property
+    def heartbeat(self) -> float:
+        """Epoch seconds at which the writer last finished a cycle"""
+        return HEADER.unpack_from(self.map, 0)[7]
+
+    @staticmethod
+    def _tail(path: str, offset: int) -> Tuple[List[bytes], int]:
+        """Complete lines appended to ``path`` after ``offset``, and the new offset"""
+        try:
+            with open(path, "rb") as log:
+                log.seek(offset)
+                chunk = log.read()
+        except FileNotFoundError:
+            return [], offset
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        return complete.splitlines(), offset + len(complete)
+
+    def refresh_ids(self):
+        """Pick up slots added since the last call"""
+        lines, self._ids_offset = self._tail(_ids_path(self.path), self._ids_offset)
+        for line in lines:
+            slot, *key = json.loads(line)
+            key = tuple(key)
+            self.slots[key] = slot
+            self.keys.extend([None] * (slot + 1 - len(self.keys)))
+            self.keys[slot] = key
+
+    def event(self, source: str, event) -> Tuple[Optional[str], Optional[str]]:
+        """(league, ISO start time) last described for an event"""
+        lines, self._events_offset = self._tail(_events_path(self.path), self._events_offset)
+        for line in lines:
+            source_, event_, league, start = json.loads(line)
+            self.events[(source_, event_)] = (league, start)
+        return self.events.get((source, str(event)), (None, None))
+
+    def read_slot(self, slot: int) -> Optional[Dict]:
+        offset = HEADER_SIZE + slot * RECORD.size
+        deadline = time.monotonic() + self.retry_seconds
+        while True:
+            seq, status, odds, previous, updated_at = RECORD.unpack_from(self.map, offset)
+            if seq & 1 or SEQ.unpack_from(self.map, offset)[0] != seq:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"slot {slot} kept changing while being read")
+                time.sleep(0)
+                continue
+            if seq == 0:
+                return None
+            return {
+                "odds": None if odds != odds else odds,
+                "previous": None if previous != previous else previous,
+                "status": STATUS_NAMES.get(status, "open"),
+                "updated_at": updated_at,
+            }
+
+    def get(self, source: str, event, market: str, outcome: str) -> Optional[Dict]:
+        self._follow_writer()
+        key = (source, str(event), market, outcome)
+        if key not in self.slots:
+            self.refresh_ids()
+        slot = self.slots.get(key)
+        return None if slot is None else self.read_slot(slot)
+
+    def items(self) -> Iterator[Tuple[SnapshotKey, Dict]]:
+        self._follow_writer()
+        self.refresh_ids()
+        for slot, key in enumerate(self.keys):
+            record = self.read_slot(slot) if key is not None else None
+            if record is not None:
+                yield key, record
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain or dump the memory-mapped latest-odds snapshot")
+    parser.add_argument("--path", default="/dev/shm/odds.snapshot")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="poll sources and publish their prices")
+    record.add_argument("sources", nargs="*")
+    record.add_argument("--capacity", type=int, default=65536)
+    record.add_argument("--interval", type=float, default=15.0)
+    commands.add_parser("dump", help="print every published price")
+    args = parser.parse_args()
+
+    if args.command == "dump":
+        reader = SnapshotReader(args.path)
+        for key, record in reader.items():
+            print(*key, record["odds"], record["status"])
+        reader.close()
+        return
+
+    from history import match_odds_rows
+    from ndjson import SOURCES, iter_records
+
+    snapshot = OddsSnapshot(args.path, args.capacity)
+    try:
+        while True:
+            records = list(iter_records(args.sources or list(SOURCES)))
+            for record in records:
+                snapshot.describe(record["bookmaker"], record["id"], record.get("league"), record.get("startTimeIso"))
+            written = snapshot.write_many(match_odds_rows(records))
+            print(f"published {written} changed prices ({snapshot.used} slots)")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        snapshot.close()
+
+
+if __name__ == "__main__":
+    main()
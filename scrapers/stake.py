@@ -1,12 +1,23 @@
 import requests
 import json
+import sys
 from datetime import datetime
 from stake_auth import AuthClass
+from change_detection import ChangeDetector, fingerprint
+from odds_records import match_odds_record
+from markets import classify_market, normalize_outcome
+import metrics
+import profiling
+from http_client import create_session
 
 class StakeScraper:
     def __init__(self):
-        self.session = requests.Session()
+        self.session = create_session(source="stake")
         self.ESPORTS_ID = "esports"
+        # Live and upcoming boards are separate polls, so each keeps its own fingerprints
+        self.detectors = {True: ChangeDetector(), False: ChangeDetector()}
+        # Latest (tournament, fixture) per fixture id, so unchanged fixtures survive a restart too
+        self.boards = {True: {}, False: {}}
 
     def get_event_payload(self, live=False):
         """Generate the GraphQL query payload"""
@@ -102,10 +113,133 @@ class StakeScraper:
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
-            print(f"Error making request: {e}")
-            print("Response content:", response.text if 'response' in locals() else "No response content")
+            print(f"Error making request: {e}", file=sys.stderr)
+            print("Response content:", response.text if 'response' in locals() else "No response content", file=sys.stderr)
             return None
 
+    def iter_fixtures(self, data):
+        """Yield (tournament name, fixture) pairs from a fixture list response"""
+        if not data or not data.get('data') or not data['data'].get('sport'):
+            return
+
+        sport = data['data']['sport']
+        if 'tournamentList' in sport:  # Live events
+            for tournament in sport['tournamentList'] or []:
+                for fixture in tournament.get('fixtureList') or []:
+                    yield tournament.get('name', 'Unknown'), fixture
+        elif 'fixtureList' in sport:  # Upcoming events
+            for fixture in sport['fixtureList'] or []:
+                yield None, fixture
+
+    def iter_match_odds(self, data):
+        """Yield MatchOdds-shaped records for the winner market of every fixture"""
+        return self.iter_fixture_odds(self.iter_fixtures(data))
+
+    def board_odds(self, live=False):
+        """MatchOdds-shaped records for every fixture of the last poll of a board"""
+        return self.iter_fixture_odds(self.boards[live].values())
+
+    @metrics.produces('stake', 'match_odds')
+    def iter_fixture_odds(self, fixtures):
+        """Yield MatchOdds-shaped records from (tournament, fixture) pairs"""
+        for tournament, fixture in fixtures:
+            if not isinstance(fixture, dict):
+                continue
+            fixture_data = fixture.get('data') or {}
+            teams = [c.get('name') for c in fixture_data.get('competitors') or []]
+            outcomes = [
+                outcome
+                for group in fixture.get('groups') or []
+                for market in (group.get('markets') or [])[:1]
+                for outcome in market.get('outcomes') or []
+            ]
+            record = match_odds_record(
+                'stake', fixture.get('id'), tournament, fixture_data.get('startTime'),
+                teams, [outcome.get('odds') for outcome in outcomes[:2]]
+            )
+            if record:
+                yield record
+
+    def emit_markets(self, table, data):
+        """Add every outcome of every fixture's markets in a fixture list response to a MarketTable"""
+        self.emit_fixture_markets(table, self.iter_fixtures(data))
+
+    def emit_board_markets(self, table, live=False):
+        """Add every fixture of the last poll of a board to a MarketTable"""
+        self.emit_fixture_markets(table, self.boards[live].values())
+
+    def emit_fixture_markets(self, table, fixtures):
+        """Add every outcome of (tournament, fixture) pairs' markets to a MarketTable"""
+        for _, fixture in fixtures:
+            if not isinstance(fixture, dict):
+                continue
+            competitors = (fixture.get('data') or {}).get('competitors') or []
+            teams = tuple((c.get('name') or '') for c in competitors[:2]) if len(competitors) >= 2 else ('', '')
+            for group in fixture.get('groups') or []:
+                for market in group.get('markets') or []:
+                    market_type = classify_market(market.get('name') or group.get('name'))
+                    for outcome in market.get('outcomes') or []:
+                        table.append('stake', fixture['id'], market_type, 0, None,
+                                     normalize_outcome(outcome.get('name'), teams), outcome.get('odds'))
+
+    def board(self, live=False):
+        """Every fixture from the last poll of a board, changed or not"""
+        return [fixture for _, fixture in self.boards[live].values()]
+
+    def checkpoint_state(self):
+        return {
+            'fingerprints': {live: dict(detector.fingerprints) for live, detector in self.detectors.items()},
+            'boards': {live: dict(board) for live, board in self.boards.items()},
+        }
+
+    def restore_state(self, state):
+        """Reload fixtures and their fingerprints so the first poll after a restart only reports deltas.
+
+        A fingerprint is only kept when its fixture came back with it; anything
+        else is reported as added again rather than silently dropped.
+        """
+        boards = state.get('boards') or {}
+        for live, fingerprints in state['fingerprints'].items():
+            board = dict(boards.get(live) or {})
+            self.boards[live] = board
+            self.detectors[live].fingerprints = {key: digest for key, digest in fingerprints.items() if key in board}
+
+    def poll_changes(self, live=False):
+        """Fetch a board and return only the fixtures whose markets moved since the last poll"""
+        data = self.scrape_events(live)
+        if data is None:
+            return None
+
+        with metrics.parse_timer('stake', 'fingerprints'), profiling.stage('stake', 'fingerprints'):
+            board = {
+                fixture['id']: (tournament, fixture)
+                for tournament, fixture in self.iter_fixtures(data)
+                if isinstance(fixture, dict) and 'id' in fixture
+            }
+            changes = self.detectors[live].update(
+                (fixture_id, fixture_fingerprint(fixture), fixture) for fixture_id, (_, fixture) in board.items()
+            )
+            self.boards[live] = board
+            return changes
+
+    def format_changes(self, changes):
+        """Print a change set produced by poll_changes"""
+        if changes is None:
+            print("No data found in response")
+            return
+
+        print(f"\nScraped at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Added: {len(changes.added)}, changed: {len(changes.changed)}, "
+              f"removed: {len(changes.removed)}, unchanged: {changes.unchanged}")
+        print("-" * 50)
+
+        for label, fixtures in (("Added", changes.added), ("Changed", changes.changed)):
+            for fixture in fixtures:
+                print(f"\n[{label}]")
+                self._print_fixture(fixture)
+        for fixture_id in changes.removed:
+            print(f"\n[Removed] {fixture_id}")
+
     def format_events(self, data):
         """Format the API response into a readable format"""
         if not data or 'data' not in data or 'sport' not in data['data']:
@@ -150,6 +284,20 @@ class StakeScraper:
         except Exception as e:
             print(f"Error printing fixture: {e}")
 
+def fixture_fingerprint(fixture):
+    """Fingerprint a fixture's status and market subtree (group, market and outcome names and odds)"""
+    def parts():
+        yield fixture.get('status')
+        for group in fixture.get('groups') or []:
+            yield group.get('name')
+            for market in group.get('markets') or []:
+                yield market.get('name')
+                for outcome in market.get('outcomes') or []:
+                    yield outcome.get('name')
+                    yield outcome.get('odds')
+
+    return fingerprint(parts())
+
 def main():
     scraper = StakeScraper()
     
@@ -0,0 +1,70 @@
+import pytest
+
+from arbitrage import ArbDetector, ArbOpportunity
+
+MATCH = ("navi-faze", "match_winner")
+
+
+def test_opportunity_margin_and_stakes():
+    opportunity = ArbOpportunity(MATCH, {"home": ("betmgm", 2.5), "away": ("stake", 2.0)}, 1 / 2.5 + 1 / 2.0)
+    assert opportunity.implied_sum == pytest.approx(0.9)
+    assert opportunity.margin_percent == pytest.approx(100 / 9)
+
+    stakes = opportunity.stakes(100.0)
+    assert sum(stakes.values()) == pytest.approx(100.0)
+    # Same payout whichever side wins
+    assert stakes["home"] * 2.5 == pytest.approx(stakes["away"] * 2.0)
+    assert stakes["home"] * 2.5 == pytest.approx(100 / 0.9)
+
+
+def test_undeclared_market_is_never_evaluated():
+    opened = []
+    detector = ArbDetector(on_open=opened.append)
+    # 1/2.5 + 1/2.9 = 0.745, but nobody said the market has only two outcomes
+    assert detector.update(MATCH, "home", "pinnacle", 2.5) is None
+    assert detector.update(MATCH, "away", "pinnacle", 2.9) is None
+    assert opened == []
+
+    # Declaring a three-way market still leaves the draw uncovered
+    assert detector.declare(MATCH, ("home", "draw", "away")) is None
+    opportunity = detector.update(MATCH, "draw", "stake", 4.0)
+    assert opportunity is not None
+    assert opportunity.implied_sum == pytest.approx(1 / 2.5 + 1 / 2.9 + 1 / 4.0)
+    assert opened == [opportunity]
+
+
+def test_best_price_per_outcome_across_books():
+    detector = ArbDetector()
+    detector.update(MATCH, "home", "pinnacle", 1.95, outcomes=("home", "away"))
+    assert detector.update(MATCH, "away", "pinnacle", 1.90) is None
+
+    opportunity = detector.update(MATCH, "home", "betmgm", 2.15)
+    assert opportunity.legs == {"home": ("betmgm", 2.15), "away": ("pinnacle", 1.90)}
+    assert opportunity.margin_percent == pytest.approx((1 / (1 / 2.15 + 1 / 1.90) - 1) * 100)
+
+
+def test_withdrawn_prices_close_the_opportunity():
+    closed = []
+    detector = ArbDetector(on_close=closed.append)
+    detector.declare(MATCH, ("home", "away"))
+    detector.update(MATCH, "home", "betmgm", 2.2)
+    detector.update(MATCH, "home", "pinnacle", 1.9)
+    assert detector.update(MATCH, "away", "stake", 2.1) is not None
+
+    # Falls back to Pinnacle's home price: 1/1.9 + 1/2.1 > 1
+    assert detector.remove_book(MATCH, "betmgm") is None
+    assert closed == [MATCH]
+    assert MATCH not in detector.active
+
+
+def test_min_margin_filters_thin_opportunities():
+    detector = ArbDetector(min_margin_percent=2.0)
+    detector.declare(MATCH, ("home", "away"))
+    detector.update(MATCH, "home", "a", 2.02)
+    assert detector.update(MATCH, "away", "b", 2.02) is None
+    assert detector.update(MATCH, "away", "b", 2.2) is not None
+
+
+def test_declare_rejects_single_outcome_markets():
+    with pytest.raises(ValueError):
+        ArbDetector().declare(MATCH, ("home",))
@@ -0,0 +1,47 @@
+from board import OddsBoard
+from odds_records import match_odds_record
+
+
+def record(bookmaker, event_id, odds, teams=("NaVi", "FaZe"), start="2026-10-20T18:00:00Z"):
+    return match_odds_record(bookmaker, event_id, "League", start, teams, odds)
+
+
+def test_publish_diffs_signals_of_dirty_fixtures_only():
+    board = OddsBoard(threshold_percent=3.0)
+    board.upsert_many([record("pinnacle", 1, [1.80, 2.10]), record("betmgm", 2, [2.10, 1.80])])
+    diff = board.publish()
+    assert diff.recomputed_groups == 1
+    assert sorted((signal["bookmaker"], signal["team"]) for signal in diff.added) == [
+        ("betmgm", "Natus Vincere"), ("pinnacle", "FaZe Clan")]
+
+    # Same prices again: nothing dirty, nothing recomputed
+    assert board.upsert(record("betmgm", 2, [2.10, 1.80])) is False
+    assert board.publish().recomputed_groups == 0
+
+    board.upsert(record("betmgm", 2, [2.15, 1.80]))
+    diff = board.publish()
+    # The consensus moved too, so both signals change
+    assert sorted((signal["bookmaker"], signal["offeredOdds"]) for signal in diff.changed) == [
+        ("betmgm", 2.15), ("pinnacle", 2.1)]
+    assert not diff.added and not diff.removed
+
+    board.remove("betmgm-2")
+    diff = board.publish()
+    assert len(diff.removed) == 2 and board.all_signals() == []
+
+
+def test_same_teams_on_another_day_are_another_fixture():
+    board = OddsBoard()
+    board.upsert(record("pinnacle", 1, [1.8, 2.1]))
+    board.upsert(record("betmgm", 2, [2.1, 1.8], start="2026-10-21T18:00:00Z"))
+    board.upsert(record("stake", 3, [1.9, 1.9], teams=("Natus Vincere", "FaZe Clan"), start="2026-10-20T18:10:00Z"))
+    assert sorted(len(books) for books in board.groups.values()) == [1, 2]
+
+
+def test_sync_removes_records_a_scope_stopped_listing():
+    board = OddsBoard()
+    board.sync("stake-live", [record("stake", 1, [1.8, 2.1]), record("stake", 2, [1.8, 2.1], teams=("G2", "Spirit"))])
+    board.sync("stake-upcoming", [record("stake", 3, [1.8, 2.1], teams=("MOUZ", "Vitality"))])
+    assert board.sync("stake-live", [record("stake", 1, [1.8, 2.1])]) == 1
+    assert sorted(board.record_groups) == ["stake-1", "stake-3"]
+    assert ("stake", "stake-2") not in board.matcher.members
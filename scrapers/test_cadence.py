@@ -0,0 +1,43 @@
+from cadence import CadencePolicy, CadenceScheduler, prices_from_markets
+from mock_books import MockBoard
+
+POLICY = CadencePolicy(live_interval=5.0, min_interval=1.0)
+
+
+def test_events_are_rescheduled_when_their_fetch_completes():
+    cadence = CadenceScheduler(POLICY)
+    cadence.observe("m1", {"isLive": True})
+    start = cadence.events["m1"].due
+
+    assert cadence.pop_due(start) == ["m1"]
+    # Still in flight: neither due again nor pulled forward by a fresh observe
+    cadence.observe("m1", {"isLive": True})
+    assert cadence.pop_due(start + 60) == []
+
+    cadence.complete("m1", now=start + 30)
+    assert cadence.pop_due(start + 34) == []
+    assert cadence.pop_due(start + 35) == ["m1"]
+
+
+def test_failed_fetch_is_rescheduled_without_touching_prices():
+    cadence = CadenceScheduler(POLICY)
+    cadence.observe("m1", {"isLive": True})
+    cadence.pop_due(cadence.events["m1"].due)
+    cadence.complete("m1", None, now=100.0)
+    assert cadence.events["m1"].prices is None
+    assert cadence.pop_due(105.0) == ["m1"]
+
+
+def test_prices_from_every_book_payload():
+    board = MockBoard(size=1)
+    event = board.events[0]
+    payloads = {
+        "betmgm": {"betOffers": board.kambi_offers(event)},
+        "pinnacle": board.pinnacle_markets(event),
+        "stake": board.stake_fixture(event),
+        "ggbet": board.ggbet_match(event),
+    }
+    for book, payload in payloads.items():
+        prices = prices_from_markets(payload)
+        assert len(prices) >= 2, book
+        assert all(price > 1 for price in prices.values()), book
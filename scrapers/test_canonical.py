@@ -0,0 +1,21 @@
+from canonical import TeamCanonicalizer, normalize_name
+
+
+def test_gg_is_only_dropped_as_a_standalone_affix():
+    assert normalize_name("Spirit GG") == "spirit"
+    assert normalize_name("GG Spirit") == "spirit"
+    assert normalize_name("Bad GG News") == "bad gg news"
+    assert normalize_name("G.G. Spirit") == "gg spirit"
+    assert normalize_name("GGWP") == "ggwp"
+
+
+def test_academy_rosters_stay_separate_teams():
+    assert normalize_name("Fnatic Academy") == "fnatic academy"
+    teams = TeamCanonicalizer(aliases={})
+    assert teams.resolve("Team Vitality") == teams.resolve("Vitality")
+    assert teams.resolve("Vitality Academy") != teams.resolve("Vitality")
+
+
+def test_noise_tokens_survive_when_they_are_the_whole_name():
+    assert normalize_name("Team") == "team"
+    assert normalize_name("Natus Vincere Esports") == "natus vincere"
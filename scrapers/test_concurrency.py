@@ -0,0 +1,88 @@
+import pytest
+
+import concurrency
+from concurrency import ERROR, OK, THROTTLED, TIMEOUT, AdaptiveLimit, controller_for, outcome_for_status
+
+
+def saturate(limit, latency=0.01, outcome=OK):
+    """Fill every allowed slot, then complete them all with one latency and outcome"""
+    epochs = [limit.acquire(timeout=0) for _ in range(limit.allowed)]
+    for epoch in epochs:
+        limit.release(epoch, latency, outcome)
+
+
+def test_a_saturated_healthy_window_adds_one_slot():
+    limit = AdaptiveLimit("host", initial=2, max_limit=8, window=4)
+    saturate(limit)
+    assert limit.allowed == 2
+    saturate(limit)
+    assert limit.allowed == 3
+    # A window that never reached the limit proves nothing about headroom
+    for _ in range(4):
+        limit.release(limit.acquire(timeout=0), 0.01)
+    assert limit.allowed == 3
+
+
+def test_throttling_and_timeouts_halve_the_limit_once_per_epoch():
+    limit = AdaptiveLimit("host", initial=8, window=4)
+    epochs = [limit.acquire(timeout=0) for _ in range(8)]
+    for epoch in epochs:
+        limit.release(epoch, 0.01, THROTTLED)
+    # The other seven 429s were in flight before the cut, so they belong to the old epoch
+    assert (limit.allowed, limit.epoch) == (4, 1)
+
+    limit.release(limit.acquire(timeout=0), 30.0, TIMEOUT)
+    assert (limit.allowed, limit.epoch) == (2, 2)
+
+
+def test_errors_and_latency_spikes_back_off_at_the_end_of_a_window():
+    limit = AdaptiveLimit("host", initial=4, window=4)
+    saturate(limit, latency=0.1)
+    assert limit.allowed == 5
+    saturate(limit, latency=1.0)
+    assert limit.allowed == 2
+
+    limit = AdaptiveLimit("host", initial=4, window=4)
+    epochs = [limit.acquire(timeout=0) for _ in range(4)]
+    for epoch, outcome in zip(epochs, (OK, OK, ERROR, OK)):
+        limit.release(epoch, 0.01, outcome)
+    assert limit.allowed == 2
+
+
+def test_stale_releases_free_their_slot_without_feeding_the_window():
+    limit = AdaptiveLimit("host", initial=4, window=2)
+    stale = [limit.acquire(timeout=0) for _ in range(3)]
+    limit.release(limit.acquire(timeout=0), 0.01, THROTTLED)
+    assert (limit.allowed, limit.in_flight) == (2, 3)
+
+    for epoch in stale:
+        limit.release(epoch, 5.0, ERROR)
+    assert (limit.allowed, limit.in_flight, limit.errors, len(limit.latencies)) == (2, 0, 0, 0)
+    assert limit.baseline is None
+
+
+def test_the_limit_stays_within_its_bounds():
+    limit = AdaptiveLimit("host", initial=2, min_limit=1, max_limit=3, window=1)
+    for _ in range(5):
+        saturate(limit)
+    assert limit.allowed == 3
+
+    for _ in range(5):
+        limit.release(limit.acquire(timeout=0), 0.01, THROTTLED)
+    assert limit.allowed == 1
+    limit.acquire(timeout=0)
+    with pytest.raises(TimeoutError):
+        limit.acquire(timeout=0)
+
+
+def test_statuses_map_to_outcomes():
+    assert [outcome_for_status(status) for status in (200, 404, 429, 500, 503)] == \
+        [OK, OK, THROTTLED, ERROR, THROTTLED]
+
+
+def test_controllers_are_shared_per_host_with_its_configured_limits(monkeypatch):
+    monkeypatch.setattr(concurrency, "_controllers", {})
+    controller = controller_for("Guest.API.Arcadia.Pinnacle.se")
+    assert controller is controller_for("guest.api.arcadia.pinnacle.se")
+    assert (controller.allowed, controller.max_limit) == (2, 8)
+    assert controller_for("unknown.example").max_limit == concurrency.DEFAULT_CONCURRENCY[1]
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from devig import METHODS, _solve_market, betmgm_arrays, pinnacle_arrays, remove_vig
+
+# Two-way, three-way and longshot-heavy books
+BOOKS = [
+    [1.91, 1.91],
+    [1.45, 2.75],
+    [2.10, 3.40, 3.60],
+    [1.08, 9.0, 21.0],
+]
+
+
+@pytest.mark.parametrize("method", list(METHODS))
+def test_batch_methods_match_a_per_market_loop(method):
+    implied = np.concatenate([[1 / price for price in book] for book in BOOKS])
+    group = np.repeat(np.arange(len(BOOKS)), [len(book) for book in BOOKS])
+
+    batch = remove_vig(implied, group, method)
+    looped = np.concatenate([_solve_market([1 / price for price in book], method) for book in BOOKS])
+
+    assert batch == pytest.approx(looped, abs=1e-6)
+    assert np.bincount(group, weights=batch) == pytest.approx(np.ones(len(BOOKS)))
+
+
+def test_pinnacle_arrays_skip_suspended_prices():
+    markets = [
+        {"type": "moneyline", "prices": [{"designation": "home", "price": -150},
+                                         {"designation": "away", "price": 130}]},
+        # One side suspended: nothing left to de-vig against
+        {"type": "spread", "prices": [{"designation": "home", "price": None, "points": -1.5},
+                                      {"designation": "away", "points": 1.5}]},
+        {"type": "total", "prices": [{"designation": "over", "price": 105},
+                                     {"designation": "under", "price": None},
+                                     {"designation": "draw", "price": 400}]},
+    ]
+    odds, group = pinnacle_arrays(markets)
+    assert odds == pytest.approx([1 + 100 / 150, 2.3, 2.05, 5.0])
+    assert group.tolist() == [0, 0, 1, 1]
+
+
+def test_betmgm_arrays_keep_open_outcomes():
+    offers = [
+        {"outcomes": [{"status": "OPEN", "odds": 1850}, {"status": "OPEN", "odds": 1950}]},
+        {"outcomes": [{"status": "SUSPENDED", "odds": 1500}, {"status": "OPEN", "odds": 2500}]},
+    ]
+    odds, group = betmgm_arrays(offers)
+    assert odds == pytest.approx([1.85, 1.95])
+    assert group.tolist() == [0, 0]
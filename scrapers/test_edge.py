@@ -0,0 +1,59 @@
+import math
+
+import numpy as np
+import pytest
+
+from edge import OddsFrame, compute_edges, synthetic_frame, value_signals
+
+
+def frame(rows):
+    return OddsFrame.from_records(("e1", "match_winner", outcome, book, odds) for book, outcome, odds in rows)
+
+
+def fair_by_row(rows, result):
+    return {(book, outcome): fair for (book, outcome, _), fair in zip(rows, result.fair_odds)}
+
+
+def test_three_way_consensus_and_edge():
+    rows = [
+        ("a", "home", 2.0), ("a", "draw", 4.0), ("a", "away", 4.0),
+        ("b", "home", 2.2), ("b", "draw", 3.6), ("b", "away", 3.6),
+    ]
+    result = compute_edges(frame(rows))
+
+    def devig(prices):
+        implied = [1 / price for price in prices]
+        return [p / sum(implied) for p in implied]
+
+    expected = np.mean([devig([2.0, 4.0, 4.0]), devig([2.2, 3.6, 3.6])], axis=0)
+    expected /= expected.sum()
+    fair = fair_by_row(rows, result)
+    assert fair[("a", "home")] == pytest.approx(1 / expected[0])
+    assert fair[("b", "draw")] == pytest.approx(1 / expected[1])
+    assert result.edge_percent[3] == pytest.approx((2.2 * expected[0] - 1) * 100)
+
+
+def test_partial_books_are_kept_out_of_the_consensus():
+    complete = [("a", "home", 2.0), ("a", "draw", 4.0), ("a", "away", 4.0)]
+    # Two of three outcomes: de-vigged on its own it would claim home at ~60%
+    partial = [("c", "home", 1.9), ("c", "away", 3.8)]
+    alone = compute_edges(frame(complete))
+    result = compute_edges(frame(complete + partial))
+
+    assert result.fair_odds[:3] == pytest.approx(alone.fair_odds)
+    assert result.fair_odds[3] == pytest.approx(alone.fair_odds[0])
+    assert result.edge_percent[3] == pytest.approx((1.9 / alone.fair_odds[0] - 1) * 100)
+
+
+def test_markets_nobody_prices_in_full_have_no_fair_odds():
+    rows = [("a", "home", 2.0), ("b", "away", 2.0)]
+    result = compute_edges(frame(rows))
+    assert all(math.isnan(value) for value in result.edge_percent)
+    assert value_signals(frame(rows), result, 0.0) == []
+
+
+def test_synthetic_board_fair_probabilities_sum_to_one():
+    board = synthetic_frame(3000, books=5, outcomes_per_market=3)
+    result = compute_edges(board)
+    totals = np.bincount(board.market, weights=result.fair_probability) / 5
+    assert totals == pytest.approx(np.ones(len(board.markets)))
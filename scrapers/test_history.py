@@ -0,0 +1,42 @@
+from history import CLOSED, OPEN, SUSPENDED, OddsHistory
+
+
+def statuses(history):
+    return [(tick.event, tick.outcome, tick.odds, tick.status) for tick in history.query()]
+
+
+def test_missing_outcomes_are_suspended_and_missing_events_closed(tmp_path):
+    history = OddsHistory(str(tmp_path / "history.db"))
+    history.record_many([
+        ("stake", "e1", "match_winner", "A", 1.8),
+        ("stake", "e1", "match_winner", "B", 2.0),
+        ("stake", "e2", "match_winner", "C", 1.5),
+    ], ts=1.0)
+    # e1 drops one side, e2 disappears
+    written = history.record_many([("stake", "e1", "match_winner", "A", 1.8)], ts=2.0)
+
+    assert written == 2
+    assert statuses(history)[3:] == [("e1", "B", None, SUSPENDED), ("e2", "C", None, CLOSED)]
+
+    # Back on the board: reopened, and closed series are not closed twice
+    history.record_many([("stake", "e1", "match_winner", "A", 1.8),
+                         ("stake", "e1", "match_winner", "B", 2.1)], ts=3.0)
+    assert statuses(history)[5:] == [("e1", "B", 2.1, OPEN)]
+    history.close()
+
+
+def test_sources_without_rows_are_left_alone(tmp_path):
+    path = str(tmp_path / "history.db")
+    history = OddsHistory(path)
+    history.record_many([("stake", "e1", "match_winner", "A", 1.8),
+                         ("pinnacle", "p1", "match_winner", "A", 1.7)], ts=1.0)
+    # Pinnacle failed this cycle: nothing of it is closed
+    history.record_many([("stake", "e1", "match_winner", "A", 1.8)], ts=2.0)
+    assert [tick.status for tick in history.query(source="pinnacle")] == [OPEN]
+
+    # Unless the caller says the cycle covered it; open series survive a reopen of the file
+    history.close()
+    history = OddsHistory(path)
+    history.record_many([], ts=3.0, sources=["pinnacle"])
+    assert [tick.status for tick in history.query(source="pinnacle")] == [OPEN, CLOSED]
+    history.close()
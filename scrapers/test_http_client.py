@@ -0,0 +1,45 @@
+import gzip
+import json
+import os
+
+from http_client import CassetteStore
+
+
+def test_appends_go_to_a_log_until_close_compacts_it(tmp_path):
+    store = CassetteStore(str(tmp_path))
+    for status in (200, 304, 429):
+        store.append("key", {"status": status})
+    assert sorted(os.listdir(tmp_path)) == ["key.ndjson"]
+
+    store.close()
+    assert sorted(os.listdir(tmp_path)) == ["key.json.gz"]
+    with gzip.open(tmp_path / "key.json.gz", "rt") as cassette:
+        assert [entry["status"] for entry in json.load(cassette)] == [200, 304, 429]
+
+
+def test_replay_reads_the_cassette_then_an_uncompacted_log(tmp_path):
+    first = CassetteStore(str(tmp_path))
+    first.append("key", {"status": 200})
+    first.close()
+    second = CassetteStore(str(tmp_path))
+    second.append("key", {"status": 304})
+    # A writer that died before close left part of a line behind
+    with open(tmp_path / "key.ndjson", "a") as log:
+        log.write('{"status": 5')
+
+    replay = CassetteStore(str(tmp_path))
+    assert [replay.next("key")["status"] for _ in range(3)] == [200, 304, 304]
+    assert replay.next("missing") is None
+
+
+def test_appends_after_a_load_reach_the_cache_and_the_cassette(tmp_path):
+    store = CassetteStore(str(tmp_path))
+    store.append("key", {"status": 200})
+    store.close()
+    assert store.next("key")["status"] == 200
+    store.append("key", {"status": 304})
+    assert [entry["status"] for entry in store.entries["key"]] == [200, 304]
+    store.close()
+
+    with gzip.open(tmp_path / "key.json.gz", "rt") as cassette:
+        assert [entry["status"] for entry in json.load(cassette)] == [200, 304]
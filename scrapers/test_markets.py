@@ -0,0 +1,110 @@
+import pytest
+
+import betmgm
+import pinnacle
+from ggbet import GGBetScraper
+from markets import HANDICAP, MATCH_WINNER, TOTAL, MarketKey, MarketTable, normalize_outcome, swap_sides
+from mock_books import MockBoard
+from stake import StakeScraper
+from thunderpick import DetailedMarket, ThunderpickScraper
+
+BOARD = MockBoard(size=4, seed=11)
+EVENT = BOARD.events[0]
+
+
+def sides(table):
+    return {(key, outcome) for _, key, outcome, _ in table.rows()}
+
+
+def test_betmgm_keys_handicaps_and_totals_by_line():
+    table = MarketTable()
+    event = {"id": EVENT.book_id("betmgm"), "homeName": EVENT.home, "awayName": EVENT.away}
+    betmgm.emit_markets(table, event, {"betOffers": BOARD.kambi_offers(EVENT)})
+
+    event_id = str(EVENT.book_id("betmgm"))
+    assert table.keys() == sorted([
+        MarketKey(event_id, MATCH_WINNER, 0, None),
+        MarketKey(event_id, HANDICAP, 0, EVENT.handicap),
+        MarketKey(event_id, TOTAL, 0, EVENT.total),
+    ], key=repr)
+    assert {outcome for _, outcome in sides(table)} == {"home", "away", "over", "under"}
+
+
+def test_betmgm_board_uses_the_embedded_offers():
+    table = MarketTable()
+    betmgm.emit_board_markets(table, BOARD.betmgm_events())
+    assert {key.event for key in table.keys()} == {str(event.book_id("betmgm")) for event in BOARD.events}
+
+
+def test_betmgm_keeps_quarter_lines():
+    assert betmgm.format_handicap(2250) == 2.25
+    assert betmgm.format_handicap(-1500) == -1.5
+
+
+def test_pinnacle_keys_map_spreads_by_period():
+    table = MarketTable()
+    matchup_id = EVENT.book_id("pinnacle")
+    pinnacle.emit_markets(table, matchup_id, BOARD.pinnacle_markets(EVENT))
+
+    assert table.keys() == sorted([
+        MarketKey(str(matchup_id), MATCH_WINNER, 0, None),
+        MarketKey(str(matchup_id), HANDICAP, 1, EVENT.handicap),
+        MarketKey(str(matchup_id), HANDICAP, 2, EVENT.handicap),
+    ], key=repr)
+
+
+def test_stake_keys_the_winner_market_of_every_fixture():
+    scraper = StakeScraper()
+    scraper.scrape_events = lambda live=False: BOARD.stake_response(live)
+    scraper.poll_changes(live=False)
+    table = MarketTable()
+    scraper.emit_board_markets(table, live=False)
+
+    upcoming = [event for event in BOARD.events if not event.live]
+    assert table.keys() == sorted(
+        [MarketKey(f"stake-{event.book_id('stake')}", MATCH_WINNER, 0, None) for event in upcoming], key=repr)
+    assert {outcome for _, outcome in sides(table)} == {"home", "away"}
+
+
+def test_thunderpick_keys_match_and_map_markets():
+    scraper = ThunderpickScraper()
+    match = scraper._parse_match(BOARD.thunderpick_match(EVENT))
+    markets = [DetailedMarket.from_dict(market) for market in BOARD.thunderpick_markets(EVENT)]
+    table = MarketTable()
+    scraper.emit_markets(table, match, markets)
+
+    match_id = str(match.id)
+    assert table.keys() == sorted([
+        MarketKey(match_id, MATCH_WINNER, 0, None),
+        MarketKey(match_id, HANDICAP, 0, EVENT.handicap),
+        MarketKey(match_id, MATCH_WINNER, 1, None),
+    ], key=repr)
+
+
+def test_ggbet_sides_come_from_competitor_ids():
+    scraper = GGBetScraper()
+    match = scraper._parse_match(BOARD.ggbet_match(EVENT))
+    scraper.matches[match.id] = match
+    table = MarketTable()
+    scraper.emit_markets(table)
+
+    assert sides(table) == {(MarketKey(match.id, MATCH_WINNER, 0, None), "home"),
+                            (MarketKey(match.id, MATCH_WINNER, 0, None), "away")}
+
+
+@pytest.mark.parametrize("label, side", [
+    ("Vitality", "home"),
+    ("VITALITY", "home"),
+    ("Team Vitality", "home"),
+    ("Vitality Academy", "away"),
+    ("Over 2.5", "over"),
+    ("OT_TWO", "away"),
+])
+def test_outcomes_name_a_team_only_by_its_whole_name(label, side):
+    assert normalize_outcome(label, ("Vitality", "Vitality Academy")) == side
+
+
+def test_swapping_sides_flips_handicap_lines_only():
+    assert swap_sides(HANDICAP, "home", -1.5) == ("away", 1.5)
+    assert swap_sides(MATCH_WINNER, "away", None) == ("home", None)
+    assert swap_sides(TOTAL, "over", 2.5) == ("over", 2.5)
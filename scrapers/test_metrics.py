@@ -0,0 +1,77 @@
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Metrics created by a test register into a throwaway registry"""
+    monkeypatch.setattr(metrics, "REGISTRY", [])
+    return metrics.REGISTRY
+
+
+def test_histogram_buckets_are_cumulative_and_bounds_are_inclusive(registry):
+    histogram = metrics.Histogram("test_seconds", "Test latency", ("source",), buckets=(0.5, 0.1, 1.0))
+    for value in (0.05, 0.1, 0.3, 1.0, 4.0):
+        histogram.observe(value, "stake")
+
+    assert list(histogram.samples()) == [
+        'test_seconds_bucket{source="stake",le="0.1"} 2',
+        'test_seconds_bucket{source="stake",le="0.5"} 3',
+        'test_seconds_bucket{source="stake",le="1.0"} 4',
+        'test_seconds_bucket{source="stake",le="+Inf"} 5',
+        'test_seconds_sum{source="stake"} 5.45',
+        'test_seconds_count{source="stake"} 5',
+    ]
+
+
+def test_render_writes_the_text_exposition_format(registry):
+    counter = metrics.Counter("test_total", "Test records", ("source", "stage"))
+    gauge = metrics.Gauge("test_limit", "Test limit", ("host",))
+    counter.inc("betmgm", 'say "hi"\n', amount=3)
+    counter.inc("betmgm", 'say "hi"\n', amount=0.5)
+    gauge.set(4, "eu1.offering-api.kambicdn.com")
+
+    assert metrics.render() == (
+        "# HELP test_total Test records\n"
+        "# TYPE test_total counter\n"
+        'test_total{source="betmgm",stage="say \\"hi\\"\\n"} 3.5\n'
+        "# HELP test_limit Test limit\n"
+        "# TYPE test_limit gauge\n"
+        'test_limit{host="eu1.offering-api.kambicdn.com"} 4\n'
+    )
+
+
+def test_hooks_record_nothing_while_disabled(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    monkeypatch.setattr(metrics.RECORDS, "values", {})
+    monkeypatch.setattr(metrics.PARSE_SECONDS, "values", {})
+
+    def records():
+        yield from range(3)
+
+    with metrics.parse_timer("betmgm", "markets") as timer:
+        pass
+    metrics.count_records("betmgm", "markets", 5)
+    produced = metrics.produces("betmgm", "match_odds")(records)()
+
+    assert timer is metrics._NOOP_TIMER
+    # The generator comes back unwrapped
+    assert produced.__name__ == "records" and list(produced) == [0, 1, 2]
+    assert metrics.RECORDS.values == {} and metrics.PARSE_SECONDS.values == {}
+    assert metrics.loads("ggbet", "ws", '{"type": "next"}') == {"type": "next"}
+
+
+def test_produces_counts_and_times_records_once_enabled(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    monkeypatch.setattr(metrics.RECORDS, "values", {})
+    monkeypatch.setattr(metrics.PARSE_SECONDS, "values", {})
+
+    @metrics.produces("betmgm", "match_odds")
+    def records():
+        yield from range(3)
+
+    assert list(records()) == [0, 1, 2]
+    assert metrics.RECORDS.values == {("betmgm", "match_odds"): 3.0}
+    counts, _ = metrics.PARSE_SECONDS.values[("betmgm", "match_odds")]
+    assert sum(counts) == 1
@@ -0,0 +1,103 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from ndjson import SharedCycle
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def flaky_books():
+    """Mock upstream answering 30% of requests with 429; with this seed GG.bet
+    still connects while Pinnacle and Stake requests fail"""
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "mock_books.py", "--events", "10", "--port", str(port),
+         "--error-rate", "0.3", "--retry-after", "0.05", "--seed", "3"],
+        cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/__stats", timeout=1)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+        yield port
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def test_stdout_mode_only_carries_records_when_sources_fail(flaky_books):
+    env = dict(os.environ,
+               HTTP_UPSTREAM=f"http://127.0.0.1:{flaky_books}",
+               GGBET_API_URL=f"http://127.0.0.1:{flaky_books}",
+               GGBET_WS_URL=f"ws://127.0.0.1:{flaky_books}/graphql",
+               HTTP_THROTTLE_RETRIES="0")
+    # Thunderpick is left out: its rate limiter backs off for half a minute at this error rate
+    result = subprocess.run([sys.executable, "ndjson.py", "betmgm", "pinnacle", "stake", "ggbet"], cwd=HERE, env=env,
+                            capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    # Diagnostics, including the upstream failures, all went to stderr
+    assert "Error" in result.stderr
+    lines = result.stdout.splitlines()
+    assert lines
+    for line in lines:
+        record = json.loads(line)
+        assert {"id", "bookmaker", "outcomes"} <= set(record)
+
+
+def test_shared_cycle_runs_one_scrape_for_concurrent_readers():
+    release = threading.Event()
+    runs = []
+
+    def produce():
+        runs.append(1)
+        yield {"id": "a"}
+        release.wait(5)
+        yield {"id": "b"}
+
+    cycle = SharedCycle(produce, max_age=60)
+    first = cycle.read()
+    assert next(first) == {"id": "a"}
+    # Joins the running cycle and replays what it already produced
+    second = cycle.read()
+    assert next(second) == {"id": "a"}
+
+    release.set()
+    assert list(first) == [{"id": "b"}]
+    assert list(second) == [{"id": "b"}]
+    # Within max_age the finished cycle is served again without a new scrape
+    assert [record["id"] for record in cycle.read()] == ["a", "b"]
+    assert len(runs) == 1
+
+
+def test_shared_cycle_starts_a_new_scrape_once_stale():
+    runs = []
+
+    def produce():
+        runs.append(1)
+        yield {"run": len(runs)}
+
+    cycle = SharedCycle(produce, max_age=0)
+    assert list(cycle.read()) == [{"run": 1}]
+    time.sleep(0.01)
+    assert list(cycle.read()) == [{"run": 2}]
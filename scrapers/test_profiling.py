@@ -0,0 +1,106 @@
+import os
+import signal
+import threading
+import time
+
+import profiling
+
+
+def test_overlapping_sample_cycles_share_one_process_sampler(tmp_path, monkeypatch, capsys):
+    monkeypatch.setitem(profiling._settings, "mode", profiling.SAMPLE)
+    monkeypatch.setitem(profiling._settings, "directory", str(tmp_path))
+    monkeypatch.setitem(profiling._settings, "tracemalloc", False)
+    monkeypatch.setitem(profiling._settings, "interval", 0.001)
+    profiling.arm(1)
+
+    started = threading.Event()
+
+    def other_source():
+        with profiling.cycle("ggbet"):
+            started.set()
+            time.sleep(0.05)
+
+    worker = threading.Thread(target=other_source)
+    worker.start()
+    started.wait()
+    with profiling.cycle("stake-live"):
+        time.sleep(0.02)
+    worker.join()
+
+    folded = [name for name in os.listdir(tmp_path) if name.endswith(".folded")]
+    assert len(folded) == 1 and folded[0].startswith(f"process{os.getpid()}-")
+    reports = sorted(name.split("-cycle")[0] for name in os.listdir(tmp_path) if name.endswith(".txt"))
+    assert reports == ["ggbet", "stake-live"]
+    assert profiling._sampler is None
+    profiling.arm(0)
+
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "profile written to" in captured.err
+
+
+def test_signal_handler_only_arms(monkeypatch, capsys):
+    previous = signal.getsignal(signal.SIGUSR1)
+    monkeypatch.setenv("PROFILE_CYCLES", "2")
+    try:
+        profiling.install_signal_handler()
+        generation = profiling._plan[0]
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert profiling._plan == (generation + 1, 2)
+        assert capsys.readouterr().out == ""
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+        profiling.arm(0)
+
+
+def test_cycles_of_one_book_keep_their_own_profiles(tmp_path, monkeypatch):
+    monkeypatch.setitem(profiling._settings, "mode", profiling.CPROFILE)
+    monkeypatch.setitem(profiling._settings, "directory", str(tmp_path))
+    monkeypatch.setitem(profiling._settings, "tracemalloc", False)
+    profiling.arm(1)
+
+    started, done = threading.Event(), threading.Event()
+    stages = {}
+
+    def upcoming():
+        with profiling.cycle("stake-upcoming"):
+            started.set()
+            done.wait()
+
+    def worker():
+        # A worker thread of each cycle, as a fetch pool would run it
+        for name in ("stake-live", "stake-upcoming", "stake"):
+            context = profiling.stage(name, "parse")
+            stages[name] = getattr(context, "target", None)
+
+    thread = threading.Thread(target=upcoming)
+    thread.start()
+    started.wait()
+    with profiling.cycle("stake-live"):
+        live, other = profiling._active["stake-live"], profiling._active["stake-upcoming"]
+        checker = threading.Thread(target=worker)
+        checker.start()
+        checker.join()
+    done.set()
+    thread.join()
+    profiling.arm(0)
+
+    assert live is not other
+    # The book name alone is ambiguous while both run, so that stage is skipped
+    assert stages == {"stake-live": live, "stake-upcoming": other, "stake": None}
+    assert profiling._active == {}
+
+
+def test_worker_stages_find_a_single_cycle_by_book(tmp_path, monkeypatch):
+    monkeypatch.setitem(profiling._settings, "mode", profiling.CPROFILE)
+    monkeypatch.setitem(profiling._settings, "directory", str(tmp_path))
+    monkeypatch.setitem(profiling._settings, "tracemalloc", False)
+    profiling.arm(1)
+
+    targets = []
+    with profiling.cycle("betmgm"):
+        worker = threading.Thread(target=lambda: targets.append(profiling.stage("betmgm", "markets").target))
+        worker.start()
+        worker.join()
+        assert targets == [profiling._active["betmgm"]]
+    profiling.arm(0)
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import rate_limit
+from rate_limit import HostLimiter, TokenBucket
+
+
+def test_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+    with pytest.raises(ValueError):
+        TokenBucket(5).set_rate(0)
+
+
+def test_bucket_rejects_requests_larger_than_capacity():
+    bucket = TokenBucket(10, capacity=2)
+    with pytest.raises(ValueError):
+        bucket.acquire(3)
+    assert bucket.reserve(2) == 0
+
+
+def test_waiters_already_sleeping_are_pushed_back_by_a_pause():
+    limiter = HostLimiter("example.com", 5.0)
+    for _ in range(5):
+        limiter.acquire()
+
+    started = time.monotonic()
+    sent = []
+    lock = threading.Lock()
+
+    def request():
+        limiter.acquire()
+        with lock:
+            sent.append(time.monotonic() - started)
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    assert limiter.feedback(429, 1.5) == 1.5
+    for thread in threads:
+        thread.join()
+
+    assert len(sent) == 6
+    assert min(sent) >= 1.5
+
+
+def test_async_waiters_are_pushed_back_by_a_pause():
+    bucket = TokenBucket(10.0)
+    bucket.reserve(10)
+
+    async def run():
+        waiter = asyncio.ensure_future(bucket.acquire_async())
+        await asyncio.sleep(0.02)
+        bucket.pause(0.3)
+        started = time.monotonic()
+        await waiter
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.3
+
+
+def test_retry_after_is_capped_by_max_backoff():
+    limiter = HostLimiter("example.com", 5.0, max_backoff=2.0)
+    assert limiter.feedback(429, 86400.0) == 2.0
+    assert limiter.bucket.updated - time.monotonic() <= 2.0
+
+
+def test_env_rates_reject_non_positive_rates(monkeypatch):
+    monkeypatch.setenv("RATE_LIMITS", "example.com=0")
+    with pytest.raises(ValueError):
+        rate_limit._env_rates()
+    monkeypatch.setenv("RATE_LIMITS", "example.com=5/-1")
+    with pytest.raises(ValueError):
+        rate_limit._env_rates()
+    monkeypatch.setenv("RATE_LIMITS", "Example.com=5/10")
+    assert rate_limit._env_rates() == {"example.com": (5.0, 10.0)}
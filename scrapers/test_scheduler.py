@@ -0,0 +1,97 @@
+import asyncio
+
+from arbitrage import ArbDetector
+from board import OddsBoard
+from change_detection import ChangeSet
+from event_matching import EventMatcher
+from markets import HANDICAP
+from odds_records import match_odds_record
+from scheduler import CrossBookFeed, ScrapeScheduler, SourceTask, describe_result
+
+
+def run_once(cycle):
+    results = []
+    source = SourceTask("test", cycle, interval=60)
+    scheduler = ScrapeScheduler([source], on_result=lambda task, result: results.append(result))
+
+    async def run():
+        running = scheduler._start_cycle(source)
+        await scheduler._run_cycle(source, running)
+        scheduler.executor.shutdown()
+
+    asyncio.run(run())
+    return source, results
+
+
+def test_none_result_counts_as_a_failure():
+    source, results = run_once(lambda: None)
+    assert (source.runs, source.failures, results) == (0, 1, [])
+
+
+def test_blocking_and_async_results_are_runs():
+    async def cycle():
+        return [1, 2]
+
+    for task in (lambda: [1, 2], cycle):
+        source, results = run_once(task)
+        assert (source.runs, source.failures, results) == (1, 0, [[1, 2]])
+
+
+def test_change_sets_report_their_sizes():
+    changes = ChangeSet(added=[{}], changed=[{}, {}], removed=["x"], unchanged=4)
+    assert describe_result(changes) == "1 added, 2 changed, 1 removed, 4 unchanged"
+    assert describe_result(ChangeSet()) == "0 added, 0 changed, 0 removed, 0 unchanged"
+    assert describe_result([1, 2, 3]) == "3 records"
+
+
+def test_feed_matches_records_across_sources_and_drops_delisted_events():
+    def board(bookmaker, *fixtures):
+        return [match_odds_record(bookmaker, event_id, "League", "2026-10-20T18:00:00Z", teams, [1.9, 1.9])
+                for event_id, teams in fixtures]
+
+    matcher = EventMatcher()
+    feed = CrossBookFeed(OddsBoard(matcher=matcher))
+    betmgm = SourceTask("betmgm", lambda: None, interval=30, records=iter)
+    stake = SourceTask("stake-live", lambda: None, interval=10, records=iter)
+
+    feed.consume(betmgm, board("betmgm", (1, ("NaVi", "FaZe")), (2, ("G2", "Vitality"))))
+    feed.consume(stake, board("stake", (7, ("Natus Vincere", "FaZe Clan"))))
+    assert matcher.members[("stake", "stake-7")] == matcher.members[("betmgm", "betmgm-1")]
+    assert len(matcher.events) == 2
+
+    # BetMGM stops listing G2 - Vitality; NaVi - FaZe stays while Stake has it
+    feed.consume(betmgm, board("betmgm", (1, ("NaVi", "FaZe"))))
+    assert len(matcher.events) == 1
+    feed.consume(betmgm, [])
+    assert list(matcher.members) == [("stake", "stake-7")]
+
+
+def test_feed_turns_market_sides_to_one_team_order_before_arbitrage():
+    matcher = EventMatcher()
+    arbs = ArbDetector()
+    feed = CrossBookFeed(OddsBoard(matcher=matcher), arbs)
+
+    def source(bookmaker, teams, handicap_prices):
+        def markets(_, table):
+            for side, line, odds in handicap_prices:
+                table.append(bookmaker, 1, HANDICAP, 0, line, side, odds)
+
+        records = [match_odds_record(bookmaker, 1, "League", "2026-10-20T18:00:00Z", teams, [1.9, 1.9])]
+        return SourceTask(bookmaker, lambda: None, interval=30, records=lambda _: records, markets=markets)
+
+    # NaVi -1.5 at 2.2 on BetMGM, where NaVi is home; FaZe +1.5 at 2.2 on Pinnacle, where FaZe is home
+    betmgm = source("betmgm", ("NaVi", "FaZe"), [("home", -1.5, 2.2), ("away", -1.5, 1.6)])
+    feed.consume(betmgm, None)
+    pinnacle = source("pinnacle", ("FaZe", "NaVi"), [("home", 1.5, 2.2), ("away", 1.5, 1.6)])
+    feed.consume(pinnacle, None)
+
+    [opportunity] = arbs.active.values()
+    cross_id, market_type, period, line = opportunity.market
+    assert cross_id == matcher.members[("pinnacle", "pinnacle-1")]
+    assert (market_type, period, abs(line)) == (HANDICAP, 0, 1.5)
+    assert sorted(book for book, _ in opportunity.legs.values()) == ["betmgm", "pinnacle"]
+
+    # Pinnacle pulls its handicap; its prices are withdrawn and the surebet closes
+    pinnacle.markets = lambda _, table: None
+    feed.consume(pinnacle, None)
+    assert not arbs.active
@@ -0,0 +1,61 @@
+import os
+
+from snapshot import OddsSnapshot, SnapshotReader
+
+
+def rows(*outcomes):
+    return [("stake", event, "match_winner", team, odds) for event, team, odds in outcomes]
+
+
+def test_events_missing_from_a_cycle_are_closed(tmp_path):
+    path = str(tmp_path / "odds.snapshot")
+    snapshot = OddsSnapshot(path, capacity=16)
+    snapshot.write_many(rows(("e1", "A", 1.8), ("e1", "B", 2.0), ("e2", "C", 1.5), ("e2", "D", 2.5)), ts=10.0)
+    snapshot.write_many(rows(("e1", "A", 1.8), ("e1", "B", 2.1)), ts=20.0)
+
+    reader = SnapshotReader(path)
+    statuses = {key[3]: record["status"] for key, record in reader.items()}
+    assert statuses == {"A": "open", "B": "open", "C": "closed", "D": "closed"}
+    assert reader.heartbeat == 20.0
+
+    # A source with no rows this cycle (it failed) keeps its prices
+    snapshot.write_many([("pinnacle", "p1", "match_winner", "X", 1.9)], ts=30.0)
+    assert reader.get("stake", "e1", "match_winner", "A")["status"] == "open"
+    reader.close()
+    snapshot.close()
+
+
+def test_event_metadata_and_reopened_writer_state(tmp_path):
+    path = str(tmp_path / "odds.snapshot")
+    snapshot = OddsSnapshot(path, capacity=16)
+    assert snapshot.describe("stake", "e1", "ESL Pro League", "2026-10-20T18:00:00+00:00")
+    assert not snapshot.describe("stake", "e1", "ESL Pro League", "2026-10-20T18:00:00+00:00")
+    snapshot.write_many(rows(("e1", "A", 1.8), ("e2", "B", 2.0)), ts=10.0)
+    snapshot.close()
+
+    # A restarted writer still knows which slots are open
+    snapshot = OddsSnapshot(path, capacity=16)
+    snapshot.write_many(rows(("e1", "A", 1.8)), ts=20.0)
+    reader = SnapshotReader(path)
+    assert reader.get("stake", "e2", "match_winner", "B")["status"] == "closed"
+    assert reader.event("stake", "e1") == ("ESL Pro League", "2026-10-20T18:00:00+00:00")
+    reader.close()
+    snapshot.close()
+
+
+def test_reader_follows_a_recreated_file(tmp_path):
+    path = str(tmp_path / "odds.snapshot")
+    snapshot = OddsSnapshot(path, capacity=16)
+    snapshot.write_many(rows(("e1", "A", 1.8), ("e1", "B", 2.0)))
+    reader = SnapshotReader(path)
+    assert len(list(reader.items())) == 2
+    snapshot.close()
+
+    for name in (path, path + ".ids", path + ".events"):
+        os.remove(name)
+    snapshot = OddsSnapshot(path, capacity=16)
+    snapshot.write_many(rows(("e9", "Z", 3.0)))
+
+    assert [(key[1], record["odds"]) for key, record in reader.items()] == [("e9", 3.0)]
+    reader.close()
+    snapshot.close()
@@ -0,0 +1,44 @@
+from checkpoint import Checkpointer
+from mock_books import MockBoard
+from stake import StakeScraper
+
+
+def scraper_for(board):
+    scraper = StakeScraper()
+    scraper.scrape_events = lambda live=False: board.stake_response(live)
+    return scraper
+
+
+def test_restored_board_keeps_unchanged_fixtures(tmp_path):
+    board = MockBoard(size=20, seed=3)
+    first = scraper_for(board)
+    added = first.poll_changes(live=False).added
+    assert added
+
+    checkpointer = Checkpointer(str(tmp_path / "state.ckpt"))
+    checkpointer.register("stake", first)
+    checkpointer.save()
+
+    restarted = scraper_for(board)
+    checkpointer = Checkpointer(checkpointer.path)
+    checkpointer.register("stake", restarted)
+    assert checkpointer.restore() == ["stake"]
+
+    changes = restarted.poll_changes(live=False)
+    assert not changes
+    assert [fixture["id"] for fixture in restarted.board(live=False)] == [fixture["id"] for fixture in added]
+
+
+def test_fingerprints_without_fixtures_are_reported_again():
+    board = MockBoard(size=20, seed=3)
+    first = scraper_for(board)
+    first.poll_changes(live=False)
+
+    # A checkpoint from before fixtures were saved: only fingerprints
+    state = first.checkpoint_state()
+    del state["boards"]
+    restarted = scraper_for(board)
+    restarted.restore_state(state)
+
+    changes = restarted.poll_changes(live=False)
+    assert len(changes.added) == len(first.board(live=False))
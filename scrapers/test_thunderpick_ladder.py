@@ -0,0 +1,73 @@
+from thunderpick import DetailedMarket, LineLadderIndex, Selection, market_line
+
+HANDICAP = 3
+
+
+def market(market_id, handicap, main=False):
+    selections = [
+        Selection(id=market_id * 10, name="Home", status=1, odds=1.9, handicap=handicap, total=None, type="home"),
+        Selection(id=market_id * 10 + 1, name="Away", status=1, odds=1.9, handicap=-handicap, total=None,
+                  type="away"),
+    ]
+    return DetailedMarket(
+        eventId=1, id=market_id, name="Handicap", status=1, type=HANDICAP, category=1, selections=selections,
+        order=0, hasCombo=False, hasInPlay=False, isVisible=True, overrideMainOrder=False, handicap=None,
+        baseLine=None, isMainLine=main, lineMarketColumnNames=None, customColumnNames=None, subCategory=0,
+        isFeatured=False, period=None, isSgc=False,
+    )
+
+
+def test_market_line_keeps_handicap_sign():
+    assert market_line(market(1, -1.5)) == -1.5
+    assert market_line(market(2, 1.5)) == 1.5
+
+
+def test_markets_on_the_same_line_do_not_overwrite_each_other():
+    index = LineLadderIndex()
+    main, alternate = market(1, -1.5, main=True), market(2, -1.5)
+    index.update(7, [main, alternate, market(3, 2.5)])
+
+    assert index.lines(7, HANDICAP) == [-1.5, 2.5]
+    assert index.main_line(7, HANDICAP) is main
+    assert index.nearest_line(7, HANDICAP, -1.4) is main
+    assert sorted(m.id for m in index.alternate_lines(7, HANDICAP)) == [2, 3]
+
+    # Dropping the alternate leaves the main market and its line in place
+    index.update(7, [main, market(3, 2.5)])
+    assert index.lines(7, HANDICAP) == [-1.5, 2.5]
+    assert index.main_line(7, HANDICAP) is main
+
+
+def test_moving_the_main_market_clears_its_old_line():
+    index = LineLadderIndex()
+    index.update(7, [market(1, -1.5, main=True)])
+    moved = market(1, -2.5, main=True)
+    index.update(7, [moved])
+
+    assert index.lines(7, HANDICAP) == [-2.5]
+    assert index.main_line(7, HANDICAP) is moved
+
+
+def test_refresh_retries_a_match_that_failed_to_parse(monkeypatch):
+    from mock_books import MockBoard
+    from thunderpick import MarketsResult, ThunderpickScraper
+
+    board = MockBoard(size=2)
+    payloads = [board.thunderpick_match(event) for event in board.events]
+    broken = dict(payloads[0])
+    del broken["teams"]
+
+    scraper = ThunderpickScraper()
+    listing = [broken, payloads[1]]
+    monkeypatch.setattr(scraper, "_fetch_match_list", lambda game_ids=None: listing)
+    monkeypatch.setattr(scraper, "get_markets_for_matches",
+                        lambda ids: (MarketsResult(match_id, markets=[]) for match_id in ids))
+
+    first = scraper.refresh()
+    assert set(first.errors) == {broken["id"]}
+    assert [match.id for match in first.matches] == [payloads[1]["id"]]
+
+    listing[0] = payloads[0]
+    second = scraper.refresh()
+    assert second.changed == [payloads[0]["id"]]
+    assert [match.id for match in second.matches] == [payloads[0]["id"], payloads[1]["id"]]
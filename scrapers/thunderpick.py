@@ -1,8 +1,21 @@
-import requests
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 from dataclasses import dataclass
 import json
+import time
+import sys
+from urllib.parse import urlsplit
+from rate_limit import configure_host, limiter_for
+from change_detection import ChangeDetector, fingerprint
+from odds_records import match_odds_record
+from markets import classify_market, home_side_line, normalize_outcome
+import metrics
+from concurrency import pool_size
+import profiling
+from http_client import create_session
 
 @dataclass
 class Team:
@@ -125,11 +138,205 @@ class Match:
     hasMainMarket: Optional[bool] = None
     sgcEnabled: Optional[bool] = None
 
+# (market type, period type, period number)
+LadderKey = Tuple[int, Optional[str], Optional[int]]
+
+def market_line(market: DetailedMarket) -> Optional[float]:
+    """Numeric line of a handicap/total market, or None for markets without one."""
+    if market.handicap is not None:
+        return float(market.handicap)
+    if market.baseLine:
+        try:
+            return float(market.baseLine)
+        except ValueError:
+            pass
+    for selection in market.selections:
+        if selection.handicap is not None:
+            return float(selection.handicap)
+        if selection.total:
+            try:
+                return float(selection.total)
+            except ValueError:
+                continue
+    return None
+
+class Ladder:
+    """Sorted lines of one market type and period, with the markets offered on each.
+
+    Several markets can share a line (e.g. a handicap offered both as a main
+    and an alternate market), so each line holds its markets by id.
+    """
+
+    def __init__(self):
+        self.lines: List[float] = []
+        self.markets: Dict[float, Dict[int, DetailedMarket]] = {}
+        # (line, market id) of the market flagged isMainLine
+        self.main: Optional[Tuple[float, int]] = None
+
+    def upsert(self, line: float, market: DetailedMarket):
+        if line not in self.markets:
+            bisect.insort(self.lines, line)
+            self.markets[line] = {}
+        self.markets[line][market.id] = market
+        if market.isMainLine:
+            self.main = (line, market.id)
+        elif self.main == (line, market.id):
+            self.main = None
+
+    def remove(self, line: float, market_id: int):
+        on_line = self.markets.get(line)
+        if on_line is None or on_line.pop(market_id, None) is None:
+            return
+        if not on_line:
+            del self.markets[line]
+            del self.lines[bisect.bisect_left(self.lines, line)]
+        if self.main == (line, market_id):
+            self.main = None
+
+    def market_at(self, line: float) -> Optional[DetailedMarket]:
+        """The market on ``line``, preferring the main one when several share it"""
+        on_line = self.markets.get(line)
+        if not on_line:
+            return None
+        if self.main is not None and self.main[0] == line:
+            return on_line[self.main[1]]
+        return next(iter(on_line.values()))
+
+    def main_market(self) -> Optional[DetailedMarket]:
+        return self.markets[self.main[0]][self.main[1]] if self.main is not None else None
+
+    def nearest(self, target: float) -> Optional[float]:
+        i = bisect.bisect_left(self.lines, target)
+        candidates = self.lines[max(i - 1, 0):i + 1]
+        return min(candidates, key=lambda line: abs(line - target)) if candidates else None
+
+    def alternates(self) -> List[DetailedMarket]:
+        main_id = self.main[1] if self.main is not None else None
+        return [market for line in self.lines for market_id, market in self.markets[line].items()
+                if market_id != main_id]
+
+class LineLadderIndex:
+    """Per-match ladders of handicap and total lines keyed by (market type, period).
+
+    ``update`` is incremental: only markets whose line moved, appeared or
+    disappeared touch the sorted line arrays.
+    """
+
+    def __init__(self):
+        self.ladders: Dict[int, Dict[LadderKey, Ladder]] = {}
+        self.positions: Dict[int, Dict[int, Tuple[LadderKey, float]]] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(market: DetailedMarket) -> LadderKey:
+        period = market.period
+        return (market.type, period.type if period else None, period.number if period else None)
+
+    def update(self, match_id: int, markets: List[DetailedMarket]):
+        """Replace the indexed markets of one match with a fresh market list."""
+        with self.lock:
+            ladders = self.ladders.setdefault(match_id, {})
+            previous = self.positions.get(match_id, {})
+            current: Dict[int, Tuple[LadderKey, float]] = {}
+
+            for market in markets:
+                line = market_line(market)
+                if line is not None:
+                    current[market.id] = (self.key(market), line)
+
+            for market_id, (key, line) in previous.items():
+                if current.get(market_id) != (key, line):
+                    ladders[key].remove(line, market_id)
+            for market in markets:
+                if market.id in current:
+                    key, line = current[market.id]
+                    ladders.setdefault(key, Ladder()).upsert(line, market)
+
+            for key in [key for key, ladder in ladders.items() if not ladder.lines]:
+                del ladders[key]
+            self.positions[match_id] = current
+
+    def remove_match(self, match_id: int):
+        with self.lock:
+            self.ladders.pop(match_id, None)
+            self.positions.pop(match_id, None)
+
+    def _ladder(self, match_id: int, market_type: int, period: Optional[Period]) -> Optional[Ladder]:
+        key = (market_type, period.type if period else None, period.number if period else None)
+        return self.ladders.get(match_id, {}).get(key)
+
+    def lines(self, match_id: int, market_type: int, period: Optional[Period] = None) -> List[float]:
+        with self.lock:
+            ladder = self._ladder(match_id, market_type, period)
+            return list(ladder.lines) if ladder else []
+
+    def main_line(self, match_id: int, market_type: int,
+                  period: Optional[Period] = None) -> Optional[DetailedMarket]:
+        with self.lock:
+            ladder = self._ladder(match_id, market_type, period)
+            return ladder.main_market() if ladder else None
+
+    def nearest_line(self, match_id: int, market_type: int, target: float,
+                     period: Optional[Period] = None) -> Optional[DetailedMarket]:
+        with self.lock:
+            ladder = self._ladder(match_id, market_type, period)
+            line = ladder.nearest(target) if ladder else None
+            return ladder.market_at(line) if line is not None else None
+
+    def alternate_lines(self, match_id: int, market_type: int,
+                        period: Optional[Period] = None) -> List[DetailedMarket]:
+        with self.lock:
+            ladder = self._ladder(match_id, market_type, period)
+            return ladder.alternates() if ladder else []
+
+@dataclass
+class MarketsResult:
+    match_id: int
+    markets: Optional[List[DetailedMarket]] = None
+    error: Optional[Exception] = None
+
+@dataclass
+class ShardResult:
+    game_ids: Tuple[int, ...]
+    matches: Optional[List[Match]] = None
+    error: Optional[Exception] = None
+
+@dataclass
+class RefreshResult:
+    matches: List[Match]
+    markets: Dict[int, List[DetailedMarket]]
+    changed: List[int]
+    removed: List[int]
+    errors: Dict[int, Exception]
+
+def match_summary(data: Dict) -> str:
+    """Fingerprint the cheap match-list fields that move whenever detailed markets do."""
+    return fingerprint((
+        json.dumps(data.get("market"), sort_keys=True),
+        data.get("totalOpenMarkets"),
+        data.get("isLive"),
+        data.get("startTime"),
+    ))
+
 class ThunderpickScraper:
     BASE_URL = "https://thunderpick.io/api"
+    GAME_IDS = [1,2,3,4,6,7,8,9,19,20,21,23,32,34,35,38,39,40,41,42,49,50,51]
     
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, rate_limit: Optional[float] = None, max_workers: Optional[int] = None):
+        host = urlsplit(self.BASE_URL).hostname
+        # Enough workers for the adaptive concurrency limit to reach its maximum; the
+        # controller, not the pool, decides how many requests are in flight
+        self.max_workers = max_workers or pool_size(host)
+        # One pooled connection per worker so concurrent fetches don't queue on the adapter
+        self.session = create_session(pool_maxsize=self.max_workers, source="thunderpick")
+        # Requests to thunderpick.io share one process-wide budget (rate_limit.HOST_RATES
+        # or RATE_LIMITS) that the session spends; ``rate_limit`` overrides it
+        self.rate_limiter = configure_host(host, rate_limit) if rate_limit is not None else limiter_for(host)
+        self.ladders = LineLadderIndex()
+        # State for refresh(): last summary per match plus the parsed objects behind it
+        self.summaries = ChangeDetector()
+        self.match_cache: Dict[int, Match] = {}
+        self.market_cache: Dict[int, List[DetailedMarket]] = {}
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
             "Accept": "application/json",
@@ -141,10 +348,18 @@ class ThunderpickScraper:
             "Content-Type": "application/json"
         })
 
-    def get_matches(self) -> List[Match]:
+    def get_matches(self, game_ids: Optional[List[int]] = None) -> List[Match]:
         """Fetch all matches from Thunderpick API."""
+        match_list = self._fetch_match_list(game_ids)
+        with metrics.parse_timer("thunderpick", "match"), profiling.stage("thunderpick", "match"):
+            matches = [self._parse_match(match_data) for match_data in match_list]
+        metrics.count_records("thunderpick", "match", len(matches))
+        return matches
+
+    def _fetch_match_list(self, game_ids: Optional[List[int]] = None) -> List[Dict]:
+        """Post the match list query and return the raw match dicts."""
         payload = {
-            "gameIds": [1,2,3,4,6,7,8,9,19,20,21,23,32,34,35,38,39,40,41,42,49,50,51],
+            "gameIds": list(game_ids) if game_ids is not None else self.GAME_IDS,
             "competitionId": None,
             "country": None
         }
@@ -158,20 +373,40 @@ class ThunderpickScraper:
         try:
             data = response.json()
         except json.JSONDecodeError as e:
-            print(f"Could not parse JSON! Response was:\n{response.text[:500]}")
+            print(f"Could not parse JSON! Response was:\n{response.text[:500]}", file=sys.stderr)
             raise e
 
         if not data.get("ok"):
             raise Exception("Failed to fetch matches from Thunderpick")
 
-        matches = []
-        match_list = data["data"].get("matches", []) or data["data"].get("upcoming", [])
+        return data["data"].get("matches", []) or data["data"].get("upcoming", [])
 
-        for match_data in match_list:
-            match = self._parse_match(match_data)
-            matches.append(match)
+    def _fetch_shard(self, game_ids: Tuple[int, ...]) -> ShardResult:
+        try:
+            return ShardResult(game_ids, matches=self.get_matches(game_ids))
+        except Exception as e:
+            return ShardResult(game_ids, error=e)
 
-        return matches
+    def get_matches_sharded(self, game_ids: Optional[Iterable[int]] = None,
+                            shard_size: int = 1) -> Iterator[ShardResult]:
+        """Fetch the match list as one request per group of ``shard_size`` games.
+
+        Shards run in parallel and are yielded as they complete, so a slow game
+        only delays its own shard.
+        """
+        game_ids = list(game_ids) if game_ids is not None else self.GAME_IDS
+        shards = [tuple(game_ids[i:i + shard_size]) for i in range(0, len(game_ids), shard_size)]
+        return self._fetch_shards(shards)
+
+    def _fetch_shards(self, shards: List[Tuple[int, ...]]) -> Iterator[ShardResult]:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self._fetch_shard, shard) for shard in shards]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
 
     def _parse_match(self, data: Dict) -> Match:
         """Parse raw match data into Match object."""
@@ -210,26 +445,212 @@ class ThunderpickScraper:
         if not data.get("ok"):
             raise Exception(f"Failed to fetch markets for match {match_id}")
             
-        return [DetailedMarket.from_dict(market_data) for market_data in data.get("data", [])]
+        with metrics.parse_timer("thunderpick", "markets"), profiling.stage("thunderpick", "markets"):
+            markets = [DetailedMarket.from_dict(market_data) for market_data in data.get("data", [])]
+        metrics.count_records("thunderpick", "markets", len(markets))
+        self.ladders.update(match_id, markets)
+        return markets
+
+    def _fetch_markets_result(self, match_id: int) -> MarketsResult:
+        try:
+            return MarketsResult(match_id, markets=self.get_match_markets(match_id))
+        except Exception as e:
+            return MarketsResult(match_id, error=e)
+
+    def get_markets_for_matches(self, match_ids: Iterable[int]) -> Iterator[MarketsResult]:
+        """Fetch markets for many matches concurrently, yielding results in completion order.
+
+        A failing match is reported through ``MarketsResult.error`` instead of
+        aborting the remaining fetches.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self._fetch_markets_result, match_id) for match_id in match_ids]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    @metrics.produces("thunderpick", "match_odds")
+    def iter_match_odds(self, matches: Iterable[Match]) -> Iterator[Dict]:
+        """Yield MatchOdds-shaped records from the main market on each match."""
+        for match in matches:
+            if match.market is None:
+                continue
+            record = match_odds_record(
+                "thunderpick", match.id, match.competition.name, match.startTime,
+                [match.teams["home"].name, match.teams["away"].name],
+                [match.market.home.get("odds"), match.market.away.get("odds")]
+            )
+            if record:
+                yield record
+
+    def emit_markets(self, table, match: Match, markets: List[DetailedMarket]):
+        """Add every selection of a match's detailed markets to a MarketTable."""
+        teams = (match.teams["home"].name, match.teams["away"].name)
+        for market in markets:
+            market_type = classify_market(market.name)
+            period = market.period.number if market.period and market.period.number else 0
+            fallback_line = market_line(market)
+            for selection in market.selections:
+                side = normalize_outcome(selection.type or selection.name, teams)
+                if selection.handicap is not None:
+                    line = home_side_line(market_type, side, float(selection.handicap))
+                elif selection.total:
+                    line = float(selection.total)
+                else:
+                    line = fallback_line
+                table.append("thunderpick", match.id, market_type, period, line, side, selection.odds)
+
+    def emit_board_markets(self, table, result: RefreshResult):
+        """Add the cached detailed markets of every match of a refresh to a MarketTable."""
+        for match in result.matches:
+            self.emit_markets(table, match, result.markets.get(match.id) or [])
+
+    def checkpoint_state(self) -> Dict:
+        return {
+            "summaries": dict(self.summaries.fingerprints),
+            "match_cache": dict(self.match_cache),
+            "market_cache": dict(self.market_cache),
+        }
+
+    def restore_state(self, state: Dict):
+        """Reload cached matches and markets so the first refresh only re-fetches changed matches"""
+        self.match_cache = dict(state["match_cache"])
+        self.market_cache = dict(state["market_cache"])
+        # A summary without cached markets would make refresh skip that match for good
+        self.summaries.fingerprints = {
+            match_id: digest for match_id, digest in state["summaries"].items()
+            if match_id in self.match_cache and match_id in self.market_cache
+        }
+        for match_id, markets in self.market_cache.items():
+            self.ladders.update(match_id, markets)
+
+    def _drop_match(self, match_id: int):
+        self.match_cache.pop(match_id, None)
+        self.market_cache.pop(match_id, None)
+        self.ladders.remove_match(match_id)
+
+    def refresh(self) -> RefreshResult:
+        """Refresh the board, re-parsing and re-fetching markets only for changed matches.
+
+        Matches whose summary fields are unchanged since the previous call reuse
+        their cached ``Match`` and detailed markets. A match that fails to parse
+        or whose market fetch fails is forgotten so the next refresh retries it.
+        """
+        match_list = self._fetch_match_list()
+        changes = self.summaries.update(
+            (match_data["id"], match_summary(match_data), match_data) for match_data in match_list
+        )
+
+        changed = []
+        errors = {}
+        for match_data in changes.added + changes.changed:
+            match_id = match_data["id"]
+            try:
+                self.match_cache[match_id] = self._parse_match(match_data)
+            except (KeyError, TypeError, ValueError) as e:
+                # Unparseable now; forgetting the summary makes the next refresh retry it
+                errors[match_id] = e
+                self.summaries.forget(match_id)
+                self._drop_match(match_id)
+                continue
+            changed.append(match_id)
+        for match_id in changes.removed:
+            self._drop_match(match_id)
+
+        for result in self.get_markets_for_matches(changed):
+            if result.error is not None:
+                errors[result.match_id] = result.error
+                self.summaries.forget(result.match_id)
+            else:
+                self.market_cache[result.match_id] = result.markets
+
+        return RefreshResult(
+            matches=[self.match_cache[match_data["id"]] for match_data in match_list
+                     if match_data["id"] in self.match_cache],
+            markets=self.market_cache,
+            changed=changed,
+            removed=changes.removed,
+            errors=errors
+        )
+
+class ShardPoller:
+    """Keeps a merged match board fresh by polling game shards on separate cadences.
+
+    A shard is hot while it has a live match or one starting within
+    ``hot_window`` seconds; hot shards are re-polled every ``hot_interval``
+    seconds and the rest every ``cold_interval`` seconds.
+    """
+
+    def __init__(self, scraper: ThunderpickScraper, game_ids: Optional[Iterable[int]] = None,
+                 shard_size: int = 1, hot_interval: float = 10.0, cold_interval: float = 120.0,
+                 hot_window: float = 3600.0):
+        self.scraper = scraper
+        self.shard_size = shard_size
+        self.hot_interval = hot_interval
+        self.cold_interval = cold_interval
+        self.hot_window = hot_window
+        game_ids = list(game_ids) if game_ids is not None else scraper.GAME_IDS
+        self.shards = [tuple(game_ids[i:i + shard_size]) for i in range(0, len(game_ids), shard_size)]
+        self.next_due: Dict[Tuple[int, ...], float] = {shard: 0.0 for shard in self.shards}
+        self.shard_matches: Dict[Tuple[int, ...], Set[int]] = {}
+        self.matches: Dict[int, Match] = {}
+
+    def is_hot(self, matches: List[Match]) -> bool:
+        now = datetime.now().astimezone()
+        return any(
+            match.isLive or (match.startTime - now).total_seconds() <= self.hot_window
+            for match in matches
+        )
+
+    def poll(self) -> List[ShardResult]:
+        """Fetch every shard that is due and merge its matches into ``self.matches``"""
+        now = time.monotonic()
+        due = [shard for shard in self.shards if self.next_due[shard] <= now]
+        if not due:
+            return []
+
+        results = []
+        for result in self.scraper._fetch_shards(due):
+            shard = result.game_ids
+            if result.error is not None:
+                # Retry a failing shard on the hot cadence without dropping its last good matches
+                self.next_due[shard] = time.monotonic() + self.hot_interval
+                results.append(result)
+                continue
+
+            for match_id in self.shard_matches.get(shard, set()):
+                self.matches.pop(match_id, None)
+            for match in result.matches:
+                self.matches[match.id] = match
+            self.shard_matches[shard] = {match.id for match in result.matches}
+
+            interval = self.hot_interval if self.is_hot(result.matches) else self.cold_interval
+            self.next_due[shard] = time.monotonic() + interval
+            results.append(result)
+
+        return results
 
 if __name__ == "__main__":
     scraper = ThunderpickScraper()
-    matches = scraper.get_matches()
-    for match in matches:
+    matches = {match.id: match for match in scraper.get_matches()}
+    for result in scraper.get_markets_for_matches(matches):
+        match = matches[result.match_id]
         print(f"\n{match.name} - {match.startTime}")
         print(f"Home: {match.teams['home'].name}")
         print(f"Away: {match.teams['away'].name}")
         
-        try:
-            markets = scraper.get_match_markets(match.id)
+        if result.error is not None:
+            print(f"Error fetching markets: {result.error}")
+        else:
             print("\nAvailable markets:")
-            for market in markets:
+            for market in result.markets:
                 print(f"\n{market.name}:")
                 for selection in market.selections:
                     odds_str = f" ({selection.odds})" if selection.odds else ""
                     handicap_str = f" [H: {selection.handicap}]" if selection.handicap is not None else ""
                     total_str = f" [T: {selection.total}]" if selection.total else ""
                     print(f"  {selection.name}{odds_str}{handicap_str}{total_str}")
-        except Exception as e:
-            print(f"Error fetching markets: {e}")
         print("\n" + "-"*50) 
\ No newline at end of file